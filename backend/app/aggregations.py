@@ -0,0 +1,252 @@
+"""
+MongoDB aggregation pipelines for the Contribution Tracking API.
+Builds server-side equivalents of the per-contribution helpers in
+utilities.py so statistics can be computed without loading every
+contribution document into Python.
+"""
+from typing import List
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+# A contribution counts as paid when paid_date is set to a non-empty value,
+# mirroring the `c.get("paid_date")` checks used across the routers.
+IS_PAID = {"$gt": [{"$ifNull": ["$paid_date", ""]}, ""]}
+
+AMOUNT = {"$ifNull": ["$amount", 0]}
+
+
+def _parse_date(field: str) -> dict:
+    """Parse a YYYY-MM-DD string field into a date"""
+    return {"$dateFromString": {"dateString": field, "format": "%Y-%m-%d"}}
+
+
+# Days between due_date and paid_date; negative when paid early
+RAW_DELAY_DAYS = {"$floor": {"$divide": [
+    {"$subtract": [_parse_date("$paid_date"), _parse_date("$due_date")]},
+    MS_PER_DAY
+]}}
+
+# Server-side version of calculate_delay_days(due_date, paid_date) for paid contributions
+PAID_DELAY_DAYS = {"$max": [0, RAW_DELAY_DAYS]}
+
+
+# classify_member() rules on the server: group contributions by member and
+# keep the members classified as "High-risk Delay" (unpaid contributions and
+# either more than 2 of them or an average paid delay above 15 days).
+# Compacted years (all paid, see compaction.py) count towards the average
+# delay, so they are joined in for the members with unpaid contributions.
+HIGH_RISK_MEMBER_STAGES = [
+    {"$group": {
+        "_id": "$member_id",
+        "missed_count": {"$sum": {"$cond": [IS_PAID, 0, 1]}},
+        "paid_count": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+        "delay_sum": {"$sum": {"$cond": [IS_PAID, PAID_DELAY_DAYS, 0]}}
+    }},
+    {"$match": {"missed_count": {"$gt": 0}}},
+    {"$lookup": {
+        "from": "contribution_summaries",
+        "localField": "_id",
+        "foreignField": "member_id",
+        "as": "compacted"
+    }},
+    {"$addFields": {
+        "paid_count": {"$add": ["$paid_count", {"$sum": "$compacted.paid_count"}]},
+        "delay_sum": {"$add": ["$delay_sum", {"$sum": "$compacted.delay_sum"}]}
+    }},
+    {"$match": {
+        "$or": [
+            {"missed_count": {"$gt": 2}},
+            {"$expr": {"$and": [
+                {"$gt": ["$paid_count", 0]},
+                {"$gt": ["$delay_sum", {"$multiply": ["$paid_count", 15]}]}
+            ]}}
+        ]
+    }},
+    {"$count": "count"}
+]
+
+
+def paid_by_month_pipeline() -> List[dict]:
+    """Amount and number of paid contributions per due month (YYYY-MM)"""
+    return [
+        {"$match": {"paid_date": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {"$substrBytes": ["$due_date", 0, 7]},
+            "raised": {"$sum": AMOUNT},
+            "paid_count": {"$sum": 1}
+        }}
+    ]
+
+
+def dashboard_stats_pipeline(current_month: str) -> List[dict]:
+    """
+    Single $facet pipeline returning overall totals, current-month totals
+    and the number of members classified as "High-risk Delay".
+
+    The high-risk facet applies classify_member() rules on the server:
+    a member is high-risk when they have unpaid contributions and either
+    more than 2 of them or an average paid delay above 15 days.
+    """
+    return [
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total_contributions": {"$sum": 1},
+                    "paid_contributions": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+                    "total_collected": {"$sum": {"$cond": [IS_PAID, AMOUNT, 0]}},
+                    "total_pending": {"$sum": {"$cond": [IS_PAID, 0, AMOUNT]}}
+                }}
+            ],
+            "current_month": [
+                {"$match": {"due_date": {"$regex": f"^{current_month}"}}},
+                {"$group": {
+                    "_id": None,
+                    "total_contributions": {"$sum": 1},
+                    "paid_contributions": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+                    "collected_amount": {"$sum": {"$cond": [IS_PAID, AMOUNT, 0]}}
+                }}
+            ],
+            "high_risk": HIGH_RISK_MEMBER_STAGES
+        }}
+    ]
+
+
+def compacted_totals_pipeline() -> List[dict]:
+    """Totals of the contributions folded into contribution_summaries"""
+    return [
+        {"$group": {
+            "_id": None,
+            "total_contributions": {"$sum": "$count"},
+            "paid_contributions": {"$sum": "$paid_count"},
+            "total_collected": {"$sum": "$amount"}
+        }}
+    ]
+
+
+def monthly_summary_pipeline(month: str, next_month: str) -> List[dict]:
+    """
+    $facet pipeline with the totals of contributions due in month (YYYY-MM)
+    and the number of members who were high-risk on their history up to
+    the end of that month.
+    """
+    return [
+        {"$match": {"due_date": {"$lt": f"{next_month}-01"}}},
+        {"$facet": {
+            "month": [
+                {"$match": {"due_date": {"$gte": f"{month}-01"}}},
+                {"$group": {
+                    "_id": None,
+                    "contribution_count": {"$sum": 1},
+                    "expected": {"$sum": AMOUNT},
+                    "collected": {"$sum": {"$cond": [IS_PAID, AMOUNT, 0]}},
+                    "paid_count": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+                    "late_count": {"$sum": {"$cond": [
+                        IS_PAID, {"$cond": [{"$gt": [PAID_DELAY_DAYS, 0]}, 1, 0]}, 0
+                    ]}},
+                    "delay_total": {"$sum": {"$cond": [IS_PAID, PAID_DELAY_DAYS, 0]}}
+                }}
+            ],
+            "high_risk": HIGH_RISK_MEMBER_STAGES
+        }}
+    ]
+
+
+# Histogram buckets for paid delays: [lower, upper) in days, last one open ended
+DELAY_BUCKETS = [0, 1, 4, 8, 16, 31, 61]
+
+
+def delay_histogram_pipeline() -> List[dict]:
+    """Paid contributions per delay bucket ($bucket over calculate_delay_days)"""
+    return [
+        {"$match": {"paid_date": {"$nin": [None, ""]}}},
+        {"$bucket": {
+            "groupBy": PAID_DELAY_DAYS,
+            "boundaries": DELAY_BUCKETS,
+            "default": "overflow",
+            "output": {
+                "count": {"$sum": 1},
+                "amount": {"$sum": AMOUNT}
+            }
+        }}
+    ]
+
+
+def _collection_totals() -> dict:
+    """$group accumulators for expected vs collected amounts"""
+    return {
+        "contribution_count": {"$sum": 1},
+        "paid_count": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+        "expected": {"$sum": AMOUNT},
+        "collected": {"$sum": {"$cond": [IS_PAID, AMOUNT, 0]}}
+    }
+
+
+def due_day_cohort_pipeline() -> List[dict]:
+    """Collection totals per day of month contributions are due"""
+    return [
+        # Walk the due_date index instead of the collection
+        {"$sort": {"due_date": 1}},
+        {"$group": {"_id": {"$toInt": {"$substrBytes": ["$due_date", 8, 2]}}, **_collection_totals()}},
+        {"$sort": {"_id": 1}}
+    ]
+
+
+def join_month_cohort_pipeline() -> List[dict]:
+    """
+    Collection totals per join month, taken as the month of each member's
+    first contribution so no $lookup into members is needed.
+    """
+    return [
+        # Walk the member_id index instead of the collection
+        {"$sort": {"member_id": 1}},
+        {"$group": {
+            "_id": "$member_id",
+            "first_due_date": {"$min": "$due_date"},
+            **_collection_totals()
+        }},
+        {"$group": {
+            "_id": {"$substrBytes": ["$first_due_date", 0, 7]},
+            "members": {"$sum": 1},
+            "contribution_count": {"$sum": "$contribution_count"},
+            "paid_count": {"$sum": "$paid_count"},
+            "expected": {"$sum": "$expected"},
+            "collected": {"$sum": "$collected"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+
+
+def payment_pattern_pipeline() -> List[dict]:
+    """
+    Members per payment pattern and consistency, using the rules of
+    IntelligenceEngine.analyze_payment_patterns()
+    """
+    return [
+        # Walk the member_id index instead of the collection
+        {"$sort": {"member_id": 1}},
+        {"$group": {
+            "_id": "$member_id",
+            "paid_count": {"$sum": {"$cond": [IS_PAID, 1, 0]}},
+            "avg_delay": {"$avg": {"$cond": [IS_PAID, RAW_DELAY_DAYS, None]}},
+            "payment_days": {"$addToSet": {"$cond": [IS_PAID, {"$substrBytes": ["$paid_date", 8, 2]}, None]}}
+        }},
+        {"$project": {
+            "pattern": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$paid_count", 0]}, "then": "No payments yet"},
+                    {"case": {"$lte": ["$avg_delay", 2]}, "then": "On-time payer"},
+                    {"case": {"$lte": ["$avg_delay", 7]}, "then": "Early week delay"},
+                    {"case": {"$lte": ["$avg_delay", 15]}, "then": "Mid-month delay"}
+                ],
+                "default": "Extended delay"
+            }},
+            "consistency": {"$cond": [
+                {"$lte": [{"$size": {"$setDifference": ["$payment_days", [None]]}}, 3]}, "High", "Variable"
+            ]}
+        }},
+        {"$group": {
+            "_id": {"pattern": "$pattern", "consistency": "$consistency"},
+            "members": {"$sum": 1}
+        }}
+    ]
@@ -0,0 +1,168 @@
+"""
+In-process caching for computed API results.
+Keeps short-lived copies of heavy aggregations so polling dashboards
+don't recompute them on every refresh, and coalesces concurrent misses
+so a burst of requests triggers a single computation.
+"""
+from contextvars import ContextVar
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+
+# Collection versions the current request reads at (set by
+# versions.conditional_get). cached() makes them part of the key: entries
+# are only invalidated in the worker that made a write, so another worker
+# would otherwise serve its stale entry under the new ETag until the TTL.
+request_versions: ContextVar[str] = ContextVar("request_versions", default="")
+
+
+class TTLCache:
+    """
+    Time-based cache for computed results with single-flight loading
+    and tag-based invalidation
+    """
+
+    def __init__(self):
+        # key -> (expires_at, value, tags)
+        self._entries: Dict[str, Tuple[float, Any, Tuple[str, ...]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # Bumped on every invalidation so results computed before a write are not stored
+        self._epoch = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        """Store a value for ttl seconds"""
+        self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop a single key, or everything when no key is given"""
+        self._epoch += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Drop every entry that depends on any of the given tags"""
+        self._epoch += 1
+        stale = [key for key, (_, _, entry_tags) in self._entries.items()
+                 if any(tag in entry_tags for tag in tags)]
+        for key in stale:
+            self._entries.pop(key, None)
+
+    def _record(self, namespace: str, outcome: str) -> None:
+        counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0})
+        counters[outcome] += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = (),
+        namespace: Optional[str] = None
+    ) -> Any:
+        """
+        Return the cached value for key, computing it on a miss.
+        Concurrent misses for the same key wait on the first computation
+        instead of starting their own.
+        """
+        namespace = namespace or key
+
+        value = self.get(key)
+        if value is not None:
+            self._record(namespace, "hits")
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._record(namespace, "coalesced")
+            return await asyncio.shield(pending)
+
+        self._record(namespace, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        epoch = self._epoch
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if epoch == self._epoch:
+            self.set(key, value, ttl, tags)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> Dict:
+        """Hit/miss counters per namespace plus current size"""
+        totals = {"hits": 0, "misses": 0, "coalesced": 0}
+        for counters in self._stats.values():
+            for outcome, count in counters.items():
+                totals[outcome] += count
+
+        lookups = totals["hits"] + totals["misses"] + totals["coalesced"]
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "totals": totals,
+            "hit_ratio": round((totals["hits"] + totals["coalesced"]) / lookups, 3) if lookups else 0,
+            "namespaces": {name: dict(counters) for name, counters in self._stats.items()}
+        }
+
+
+# Shared cache instance
+response_cache = TTLCache()
+
+
+def cached(namespace: str, ttl: float, tags: Iterable[str] = (), vary_on: Iterable[str] = ()):
+    """
+    Cache an async endpoint's result in response_cache.
+
+    Args:
+        namespace: Cache key prefix, also used for hit/miss statistics
+        ttl: Seconds to keep the result
+        tags: Collections the result depends on; writes to them invalidate it
+        vary_on: Endpoint parameters that are part of the cache key
+
+    The collection versions recorded by conditional_get() for the request
+    are part of the key too.
+    """
+    tags = tuple(tags)
+    vary_on = tuple(vary_on)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = namespace
+            if vary_on:
+                key += ":" + ":".join(f"{name}={kwargs.get(name)}" for name in vary_on)
+            versions = request_versions.get()
+            if versions:
+                key += "@" + versions
+
+            return await response_cache.get_or_compute(
+                key, ttl, lambda: func(*args, **kwargs), tags=tags, namespace=namespace
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,177 @@
+"""
+Compaction of old paid contributions.
+Fully paid contributions due before the compaction horizon are folded
+into one summary per member and year (contribution_summaries) and moved
+to the compressed contributions_archive collection. Each member document
+also carries the totals over all its summaries (member["compacted"]), so
+the statistics and intelligence helpers combine them with the remaining
+raw contributions without an extra query. Counts, delay sums and sums of
+squares keep averages and standard deviations exact.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import heapq
+import logging
+import os
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+from .db import get_database
+from .utilities import calculate_delay_days
+
+logger = logging.getLogger(__name__)
+
+# Contributions due more than this many months ago are compacted once paid
+CONTRIBUTION_COMPACTION_MONTHS = int(os.getenv("CONTRIBUTION_COMPACTION_MONTHS", "24"))
+CONTRIBUTION_COMPACTION_BATCH_SIZE = int(os.getenv("CONTRIBUTION_COMPACTION_BATCH_SIZE", "1000"))
+# Keep at least a year raw: streaks, reminders and predictions read recent contributions
+MIN_COMPACTION_MONTHS = 12
+
+DUPLICATE_KEY = 11000
+
+HISTORY_FIELDS = {"_id": 0, "member_id": 1, "due_date": 1, "paid_date": 1, "amount": 1}
+
+
+def compaction_cutoff(months: int) -> str:
+    """First day (YYYY-MM-DD) of the month `months` months before the current one"""
+    today = datetime.now()
+    index = today.year * 12 + today.month - 1 - months
+    return f"{index // 12}-{index % 12 + 1:02d}-01"
+
+
+def _summary_increments(contributions: Iterable[dict]) -> dict:
+    """$inc document folding paid contributions into a summary"""
+    inc = defaultdict(int)
+    for c in contributions:
+        delay = calculate_delay_days(c["due_date"], c["paid_date"])
+        inc["count"] += 1
+        inc["paid_count"] += 1
+        inc["amount"] += c.get("amount") or 0
+        inc["delay_sum"] += delay
+        inc["delay_sum_sq"] += delay * delay
+        inc["late_count"] += 1 if delay > 0 else 0
+        # Signed delay (early payments negative), for payment pattern analysis
+        inc["raw_delay_sum"] += (datetime.strptime(c["paid_date"], "%Y-%m-%d")
+                                 - datetime.strptime(c["due_date"], "%Y-%m-%d")).days
+        inc[f"paid_days.{int(c['paid_date'][8:10])}"] += 1
+    return dict(inc)
+
+
+def _prefixed(inc: dict, prefix: str) -> dict:
+    return {f"{prefix}.{key}": value for key, value in inc.items()}
+
+
+def compact_contributions(
+    months: Optional[int] = None,
+    batch_size: int = CONTRIBUTION_COMPACTION_BATCH_SIZE,
+    database: Optional[Database] = None
+) -> int:
+    """
+    Fold paid contributions due more than `months` months ago (default
+    CONTRIBUTION_COMPACTION_MONTHS) into yearly summaries, batch_size at a
+    time. Returns the number of contributions compacted. An interrupted
+    run can leave the counters short; rebuild_contribution_summaries()
+    recomputes them from the archive.
+    """
+    database = database if database is not None else get_database()
+    cutoff = compaction_cutoff(max(months or CONTRIBUTION_COMPACTION_MONTHS, MIN_COMPACTION_MONTHS))
+    query = {"due_date": {"$lt": cutoff}, "paid_date": {"$nin": [None, ""]}}
+
+    compacted = 0
+    while True:
+        batch = list(database.contributions.find(query).limit(batch_size))
+        if not batch:
+            break
+
+        try:
+            database.contributions_archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Archived by an earlier run that stopped before deleting them
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+        database.contributions.delete_many({"_id": {"$in": [c["_id"] for c in batch]}})
+
+        by_year, by_member = defaultdict(list), defaultdict(list)
+        for c in batch:
+            by_year[(c["member_id"], c["due_date"][:4])].append(c)
+            by_member[c["member_id"]].append(c)
+
+        database.contribution_summaries.bulk_write([
+            UpdateOne(
+                {"_id": f"{member_id}:{year}"},
+                {"$inc": _summary_increments(contributions),
+                 "$max": {"through": max(c["due_date"] for c in contributions)},
+                 "$setOnInsert": {"member_id": member_id, "year": int(year)}},
+                upsert=True
+            )
+            for (member_id, year), contributions in by_year.items()
+        ], ordered=False)
+        database.members.bulk_write([
+            UpdateOne(
+                {"member_id": member_id},
+                {"$inc": _prefixed(_summary_increments(contributions), "compacted"),
+                 "$max": {"compacted.through": max(c["due_date"] for c in contributions)}}
+            )
+            for member_id, contributions in by_member.items()
+        ], ordered=False)
+        compacted += len(batch)
+
+    if compacted:
+        logger.info(f"Compacted {compacted} paid contributions due before {cutoff}")
+    return compacted
+
+
+def _fold(summary: dict, contribution: dict) -> None:
+    for key, value in _summary_increments([contribution]).items():
+        if key.startswith("paid_days."):
+            days = summary.setdefault("paid_days", {})
+            day = key.split(".", 1)[1]
+            days[day] = days.get(day, 0) + value
+        else:
+            summary[key] = summary.get(key, 0) + value
+    summary["through"] = max(summary.get("through", ""), contribution["due_date"])
+
+
+def rebuild_contribution_summaries(database: Optional[Database] = None) -> int:
+    """Recompute the yearly summaries and member totals from contributions_archive; returns the member count"""
+    database = database if database is not None else get_database()
+
+    yearly: Dict[str, dict] = {}
+    totals: Dict[str, dict] = {}
+    for c in database.contributions_archive.find({}, HISTORY_FIELDS):
+        key = f"{c['member_id']}:{c['due_date'][:4]}"
+        _fold(yearly.setdefault(key, {"member_id": c["member_id"], "year": int(c["due_date"][:4])}), c)
+        _fold(totals.setdefault(c["member_id"], {}), c)
+
+    database.contribution_summaries.delete_many({"_id": {"$nin": list(yearly)}})
+    if yearly:
+        database.contribution_summaries.bulk_write(
+            [ReplaceOne({"_id": key}, summary, upsert=True) for key, summary in yearly.items()],
+            ordered=False
+        )
+    database.members.update_many({"member_id": {"$nin": list(totals)}, "compacted": {"$exists": True}},
+                                 {"$unset": {"compacted": ""}})
+    if totals:
+        database.members.bulk_write(
+            [UpdateOne({"member_id": member_id}, {"$set": {"compacted": summary}})
+             for member_id, summary in totals.items()],
+            ordered=False
+        )
+    return len(totals)
+
+
+def full_history(database: Database, query: Optional[dict] = None, projection: Optional[dict] = None):
+    """
+    Live and archived contributions matching query, merged in
+    (member_id, due_date) order. For rebuilds that need every contribution.
+    """
+    projection = projection or HISTORY_FIELDS
+    order = [("member_id", 1), ("due_date", 1)]
+    return heapq.merge(
+        database.contributions.find(query or {}, projection).sort(order),
+        database.contributions_archive.find(query or {}, projection).sort(order),
+        key=lambda c: (c["member_id"], c["due_date"])
+    )
@@ -1,11 +1,30 @@
 """
 Database configuration and connection module.
 Handles MongoDB connection using environment variables.
+
+The client is created by the app lifespan on startup (or lazily on first
+use by scripts and tests) and closed on shutdown; importing this module
+never opens a connection. Module-level collection handles resolve against
+the current client when used.
+
+Reads follow the client's read preference unless a route opts into a read
+policy (see read_policy): analytics routes read from secondaries within a
+staleness bound, while auth and payment flows stay on the primary.
 """
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
 from pymongo import MongoClient
+from pymongo.read_preferences import (
+    Nearest, Primary, PrimaryPreferred, ReadPreference, Secondary, SecondaryPreferred
+)
 from dotenv import load_dotenv
 
+from .metrics import command_listener, pool_listener
+
 # Load environment variables
 load_dotenv()
 
@@ -13,29 +32,185 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
 
-# MongoDB Client
-client = MongoClient(MONGO_URI)
-db = client[DATABASE_NAME]
+# Connection pool configuration
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+# How long a request waits for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Comma-separated wire compressors, e.g. "zstd,snappy,zlib" (zstd/snappy need extra packages)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
 
-# Collections
-admins_collection = db.admins  # Admin users only
-members_collection = db.members  # Regular members only
-contributions_collection = db.contributions
-notifications_collection = db.notifications
-predictions_collection = db.predictions
-tickets_collection = db.tickets
+# Read policy for analytics routes (predictions, dashboard stats, member lists)
+ANALYTICS_READ_PREFERENCE = os.getenv("ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+# How far behind the primary a secondary may be and still serve analytics reads.
+# MongoDB requires at least 90; 0 removes the bound.
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "90"))
+
+PRIMARY = "primary"
+ANALYTICS = "analytics"
+
+_READ_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _read_preference(mode: str, max_staleness: int):
+    if mode not in _READ_MODES:
+        raise ValueError(f"Unknown read preference '{mode}' (choose from {', '.join(_READ_MODES)})")
+    if mode == "primary":
+        return ReadPreference.PRIMARY
+    return _READ_MODES[mode](max_staleness=max_staleness or -1)
+
+
+# Policy name -> read preference applied to collections used under it
+READ_POLICIES = {
+    PRIMARY: ReadPreference.PRIMARY,
+    ANALYTICS: _read_preference(ANALYTICS_READ_PREFERENCE, ANALYTICS_MAX_STALENESS_SECONDS),
+}
+
+# Policy of the current request; None uses the client's read preference
+_read_policy: ContextVar[Optional[str]] = ContextVar("read_policy", default=None)
+
+_client: Optional[MongoClient] = None
+_collections = {}
+_lock = threading.Lock()
+
+
+def client_options() -> dict:
+    """MongoClient keyword arguments built from the environment"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        # Listeners feed /metrics, Server-Timing and /health pool stats
+        "event_listeners": [command_listener, pool_listener],
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+def connect() -> MongoClient:
+    """Create the shared client if it doesn't exist yet"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MongoClient(MONGO_URI, **client_options())
+        return _client
+
+
+def get_client() -> MongoClient:
+    """Shared client, connecting on first use"""
+    return _client or connect()
 
 
 def get_database():
     """Get database instance"""
-    return db
+    return get_client()[DATABASE_NAME]
 
 
 def get_collection(collection_name: str):
-    """Get a specific collection by name"""
-    return db[collection_name]
+    """Get a specific collection by name, with the current read policy applied"""
+    policy = _read_policy.get()
+    collection = _collections.get((collection_name, policy))
+    if collection is None:
+        collection = get_database()[collection_name]
+        if policy is not None:
+            collection = collection.with_options(read_preference=READ_POLICIES[policy])
+        _collections[(collection_name, policy)] = collection
+    return collection
+
+
+def set_read_policy(policy: Optional[str]):
+    """Apply a read policy to the rest of the current request (or task)"""
+    if policy is not None and policy not in READ_POLICIES:
+        raise ValueError(f"Unknown read policy '{policy}'")
+    return _read_policy.set(policy)
+
+
+@contextmanager
+def read_policy(policy: Optional[str]):
+    """Apply a read policy inside a block, restoring the previous one after"""
+    token = set_read_policy(policy)
+    try:
+        yield
+    finally:
+        _read_policy.reset(token)
 
 
 def close_connection():
     """Close MongoDB connection"""
-    client.close()
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _collections.clear()
+
+
+def ping() -> None:
+    """Round trip to the server; raises PyMongoError when it is unreachable"""
+    get_client().admin.command("ping")
+
+
+def pool_stats() -> dict:
+    """Connection pool usage per server"""
+    servers = {}
+    for address, pool in pool_listener.snapshot().items():
+        servers[address] = {
+            "open": pool["open"],
+            "in_use": pool["in_use"],
+            "utilization": round(pool["in_use"] / MONGO_MAX_POOL_SIZE, 3)
+        }
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "servers": servers
+    }
+
+
+class LazyCollection:
+    """
+    Module-level collection handle that binds to the shared client on use
+    """
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self._name), attr)
+
+    def __getitem__(self, key):
+        return get_collection(self._name)[key]
+
+    def __repr__(self):
+        return f"LazyCollection({self._name!r})"
+
+
+# Collections
+admins_collection = LazyCollection("admins")  # Admin users only
+members_collection = LazyCollection("members")  # Regular members only
+contributions_collection = LazyCollection("contributions")
+notifications_collection = LazyCollection("notifications")
+predictions_collection = LazyCollection("predictions")
+tickets_collection = LazyCollection("tickets")
+versions_collection = LazyCollection("collection_versions")  # Per-collection write counters for ETags
+fund_totals_collection = LazyCollection("fund_totals")  # Running totals of paid contributions
+monthly_summary_collection = LazyCollection("monthly_summary")  # Per-month aggregates frozen at month close
+notifications_archive_collection = LazyCollection("notifications_archive")  # Notifications past retention
+notification_summary_collection = LazyCollection("notification_summary")  # Per-member notification counters
+contributions_archive_collection = LazyCollection("contributions_archive")  # Paid contributions past the compaction horizon
+contribution_summaries_collection = LazyCollection("contribution_summaries")  # Per-member yearly totals of compacted contributions
+idempotency_keys_collection = LazyCollection("idempotency_keys")  # Stored responses of Idempotency-Key requests
+gateway_events_collection = LazyCollection("gateway_events")  # Payment gateway events keyed by transaction id
+refresh_tokens_collection = LazyCollection("refresh_tokens")  # Hashed refresh tokens (app/refresh_tokens.py)
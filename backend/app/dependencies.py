@@ -1,20 +1,40 @@
 """
 Dependency functions for FastAPI endpoints.
-Contains authentication and authorization dependencies.
+Contains authentication, authorization and read policy dependencies.
 """
 from fastapi import Depends, HTTPException, status
+from typing import Optional
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .db import admins_collection, members_collection
+from .db import ANALYTICS, PRIMARY, admins_collection, members_collection, read_policy, set_read_policy
 from .auth import decode_access_token
 
 # Security
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get current authenticated user from token"""
-    token = credentials.credentials
+    return get_user_from_token(credentials.credentials)
+
+
+def find_user(email: str) -> Optional[dict]:
+    """Admin or member document for an email, or None"""
+    # Always on the primary: a just-registered or just-changed account must resolve
+    with read_policy(PRIMARY):
+        # Check admins collection first
+        user = admins_collection.find_one({"email": email})
+        
+        # If not found, check members collection
+        if user is None:
+            user = members_collection.find_one({"email": email})
+    
+    return user
+
+
+def get_user_from_token(token: str) -> dict:
+    """Resolve an access token to its admin or member document"""
     payload = decode_access_token(token)
     
     if payload is None:
@@ -30,13 +50,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Could not validate credentials"
         )
     
-    # Check admins collection first
-    user = admins_collection.find_one({"email": email})
-    
-    # If not found, check members collection
-    if user is None:
-        user = members_collection.find_one({"email": email})
-        
+    user = find_user(email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,3 +68,26 @@ async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
             detail="Admin access required"
         )
     return current_user
+
+
+async def require_admin_stream(
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> dict:
+    """Require admin role, also accepting the token as a query parameter.
+    Browsers' EventSource cannot send an Authorization header."""
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    
+    return await require_admin(get_user_from_token(token))
+
+
+async def analytics_reads() -> None:
+    """Serve the route's reads from secondaries within the staleness bound.
+    Async so the policy is set in the request's own context."""
+    set_read_policy(ANALYTICS)
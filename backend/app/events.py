@@ -0,0 +1,259 @@
+"""
+Live update events for admin dashboards.
+Watches MongoDB change streams on contributions, tickets and notifications
+and fans incremental events out to Server-Sent Events subscribers. Recent
+events are kept in a ring buffer so polling clients and reconnecting
+streams can catch up from their last event id.
+
+Change streams need a replica set (a single-node local replica set is
+enough). Against a standalone mongod the broker falls back to polling the
+collection version counters and emits "resync" events instead.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import threading
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .db import get_database, versions_collection
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ["contributions", "tickets", "notifications"]
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+EVENT_POLL_INTERVAL_SECONDS = float(os.getenv("EVENT_POLL_INTERVAL_SECONDS", "5"))
+
+# Error codes returned when $changeStream is unavailable (standalone server)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+# The resume token can't be used any more (InvalidResumeToken,
+# ChangeStreamFatalError, ChangeStreamHistoryLost): start a fresh stream
+CHANGE_STREAM_RESUME_FAILED_CODES = {260, 280, 286}
+
+
+def _serialize(value):
+    """Make change stream values JSON friendly"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _serialize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_serialize(v) for v in value]
+    return value
+
+
+def change_to_event(change: Dict) -> Optional[Dict]:
+    """
+    Translate a change stream document into a dashboard event.
+    Returns None for changes dashboards don't care about.
+    """
+    collection = change.get("ns", {}).get("coll")
+    operation = change.get("operationType")
+    doc = change.get("fullDocument") or {}
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+
+    if collection == "contributions":
+        if operation == "insert":
+            return {
+                "type": "contribution_generated",
+                "data": {
+                    "contribution_id": doc.get("_id"),
+                    "member_id": doc.get("member_id"),
+                    "due_date": doc.get("due_date"),
+                    "amount": doc.get("amount"),
+                    "month": doc.get("month")
+                }
+            }
+        # Paying updates also set payment_ref (app/payments.py); a paid_date
+        # correction on an already paid contribution doesn't, and isn't a new payment
+        if operation == "update" and updated.get("paid_date") and updated.get("payment_ref"):
+            return {
+                "type": "payment_recorded",
+                "data": {
+                    "contribution_id": change.get("documentKey", {}).get("_id"),
+                    "member_id": doc.get("member_id"),
+                    "due_date": doc.get("due_date"),
+                    "amount": doc.get("amount"),
+                    "paid_date": updated["paid_date"]
+                }
+            }
+        return None
+
+    if collection == "tickets" and operation in ("insert", "update", "replace"):
+        return {
+            "type": "ticket_created" if operation == "insert" else "ticket_updated",
+            "data": {
+                "ticket_id": doc.get("ticket_id"),
+                "member_id": doc.get("member_id"),
+                "request_type": doc.get("request_type"),
+                "status": doc.get("status")
+            }
+        }
+
+    if collection == "notifications" and operation == "insert":
+        if doc.get("notification_type") != "reminder":
+            return None
+        return {
+            "type": "reminder_sent",
+            "data": {
+                "member_id": doc.get("member_id"),
+                "sent_at": doc.get("sent_at"),
+                "priority": doc.get("priority")
+            }
+        }
+
+    return None
+
+
+class EventBroker:
+    """
+    Fan-out of change stream events to SSE subscribers with a replay buffer
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self._buffer = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._resume_token = None
+        self.mode = "stopped"
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def start(self) -> None:
+        """Start watching in a background thread (call from the event loop)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background watcher"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.mode = "stopped"
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._watch_change_streams()
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                    logger.warning("Change streams unavailable (standalone MongoDB?); polling version counters")
+                    self._poll_versions()
+                    return
+                if e.code in CHANGE_STREAM_RESUME_FAILED_CODES and self._resume_token is not None:
+                    # Changes since the token are lost; clients refetch instead
+                    logger.warning(f"Change stream can't resume ({str(e)}); restarting from now")
+                    self._resume_token = None
+                    self.publish({"type": "resync", "data": {"collections": list(WATCHED_COLLECTIONS)}})
+                    continue
+                logger.error(f"Change stream error: {str(e)}")
+                self._stop.wait(EVENT_POLL_INTERVAL_SECONDS)
+            except PyMongoError as e:
+                logger.error(f"Change stream error: {str(e)}")
+                self._stop.wait(EVENT_POLL_INTERVAL_SECONDS)
+
+    def _watch_change_streams(self) -> None:
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": WATCHED_COLLECTIONS},
+            "operationType": {"$in": ["insert", "update", "replace"]}
+        }}]
+
+        with get_database().watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=self._resume_token,
+            max_await_time_ms=1000
+        ) as stream:
+            self.mode = "change_stream"
+            logger.info("Event broker watching change streams")
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    continue
+                self._resume_token = stream.resume_token
+                event = change_to_event(change)
+                if event:
+                    self.publish(event)
+
+    def _poll_versions(self) -> None:
+        """Fallback for standalone servers: emit resync events when versions move"""
+        self.mode = "polling"
+        known: Optional[Dict[str, int]] = None
+        while not self._stop.is_set():
+            try:
+                current = {doc["_id"]: doc.get("version", 0) for doc in versions_collection.find()}
+                if known is not None:
+                    changed = [name for name, version in current.items() if known.get(name) != version]
+                    if changed:
+                        self.publish({"type": "resync", "data": {"collections": sorted(changed)}})
+                known = current
+            except PyMongoError as e:
+                logger.error(f"Version polling error: {str(e)}")
+            self._stop.wait(EVENT_POLL_INTERVAL_SECONDS)
+
+    def publish(self, event: Dict) -> None:
+        """Publish an event from any thread"""
+        if self._loop is None or self._loop.is_closed():
+            self._dispatch(event)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: Dict) -> None:
+        self._last_id += 1
+        event = {
+            "id": self._last_id,
+            "type": event["type"],
+            "data": _serialize(event.get("data", {})),
+            "at": datetime.now().isoformat()
+        }
+        self._buffer.append(event)
+
+        for queue in list(self._subscribers):
+            if queue.qsize() >= queue.maxsize - 1:
+                # Slow consumer: close its stream instead of growing without bound;
+                # it reconnects with Last-Event-ID and catches up from the buffer
+                self._subscribers.discard(queue)
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait(event)
+
+    def events_since(self, last_id: int) -> Optional[List[Dict]]:
+        """
+        Buffered events after last_id, or None when the client fell
+        behind the buffer and must refetch everything
+        """
+        if last_id > self._last_id:
+            # Ids restart with the process; the client's id is from an older run
+            return None
+        if self._buffer and last_id < self._buffer[0]["id"] - 1:
+            return None
+        return [event for event in self._buffer if event["id"] > last_id]
+
+    def subscribe(self, max_pending: int = 500) -> asyncio.Queue:
+        # One extra slot is reserved for the close sentinel
+        queue = asyncio.Queue(maxsize=max_pending + 1)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+
+# Shared broker instance
+event_broker = EventBroker()
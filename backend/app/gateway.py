@@ -0,0 +1,331 @@
+"""
+Payment gateway webhook ingestion.
+The webhook endpoint verifies the signature, parses the event and inserts
+it into gateway_events with status "received", keyed by the gateway's
+transaction id (a redelivered or replayed event is a duplicate key), and
+only then acknowledges it. Applying is what gets batched: WebhookIngestor
+drains an in-process queue of transaction ids and records the stored
+events with payments.record_payment_batch, which updates the totals,
+summaries and streaks once per batch.
+
+An acknowledged event is therefore always in MongoDB. One stored but not
+applied when the process stopped (crash, or the stop timeout) is applied
+on the next start or when the gateway redelivers it; while the queue is
+full the endpoint answers 503 so the gateway retries later.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .db import gateway_events_collection
+from .metrics import (
+    gateway_batch_duration, gateway_batch_size, gateway_events_applied_total, gateway_queue_depth
+)
+from .payments import record_payment_batch
+from .versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+# Shared secret the gateway signs webhook bodies with; webhooks are refused without one
+GATEWAY_WEBHOOK_SECRET = os.getenv("GATEWAY_WEBHOOK_SECRET", "")
+# Signed timestamps older (or newer) than this are rejected as replays
+GATEWAY_SIGNATURE_TOLERANCE_SECONDS = int(os.getenv("GATEWAY_SIGNATURE_TOLERANCE_SECONDS", "300"))
+GATEWAY_QUEUE_SIZE = int(os.getenv("GATEWAY_QUEUE_SIZE", "20000"))
+GATEWAY_BATCH_SIZE = int(os.getenv("GATEWAY_BATCH_SIZE", "500"))
+# How long a batch waits to fill up before it is applied anyway
+GATEWAY_BATCH_WAIT_MS = int(os.getenv("GATEWAY_BATCH_WAIT_MS", "50"))
+GATEWAY_RETRY_SECONDS = float(os.getenv("GATEWAY_RETRY_SECONDS", "2"))
+
+SIGNATURE_HEADER = "X-Gateway-Signature"
+PAYMENT_SUCCEEDED = "payment.succeeded"
+
+# gateway_events status between insert and apply
+RECEIVED = "received"
+DUPLICATE_KEY = 11000
+
+
+class InvalidEvent(ValueError):
+    """Webhook body that isn't a well-formed gateway event"""
+
+
+def sign(body: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Signature header value for a body: t=<unix time>,v1=<hex HMAC-SHA256 of "t.body">"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(body: bytes, header: Optional[str], secret: str, now: Optional[float] = None) -> bool:
+    """Check a signature header against the body and the timestamp tolerance"""
+    if not header or not secret:
+        return False
+    parts = {}
+    for item in header.split(","):
+        name, _, value = item.strip().partition("=")
+        parts.setdefault(name, []).append(value)
+    try:
+        timestamp = int(parts["t"][0])
+    except (KeyError, ValueError):
+        return False
+
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > GATEWAY_SIGNATURE_TOLERANCE_SECONDS:
+        return False
+    expected = sign(body, secret, timestamp).split("v1=", 1)[1]
+    # Several v1 entries are allowed while the secret is being rotated
+    return any(hmac.compare_digest(expected, candidate) for candidate in parts.get("v1", []))
+
+
+def parse_event(body: bytes) -> Optional[dict]:
+    """
+    Payment from a webhook body (transaction_id, event_id, contribution_id,
+    amount and paid_date). Returns None for event types we don't handle;
+    raises InvalidEvent when the body is malformed.
+    """
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise InvalidEvent("Body is not JSON")
+    if not isinstance(event, dict) or not isinstance(event.get("data"), dict):
+        raise InvalidEvent("Event has no data object")
+    if event.get("type") != PAYMENT_SUCCEEDED:
+        return None
+
+    data = event["data"]
+    for field in ("transaction_id", "contribution_id", "amount", "paid_at"):
+        if data.get(field) in (None, ""):
+            raise InvalidEvent(f"Event data has no {field}")
+    try:
+        paid_date = datetime.fromisoformat(str(data["paid_at"])).strftime("%Y-%m-%d")
+        amount = float(data["amount"])
+    except (TypeError, ValueError):
+        raise InvalidEvent("Event data has an invalid paid_at or amount")
+
+    return {
+        "transaction_id": str(data["transaction_id"]),
+        "event_id": event.get("id"),
+        "contribution_id": str(data["contribution_id"]),
+        "amount": amount,
+        "paid_date": paid_date
+    }
+
+
+def _record(events: List[dict]) -> Dict[str, int]:
+    """Record stored events as payments and keep each one's outcome"""
+    results = record_payment_batch([
+        {"contribution_id": e["contribution_id"], "paid_date": e["paid_date"], "amount": e["amount"]}
+        for e in events
+    ])
+    counts, now = {}, datetime.now()
+    updates = []
+    for event, result in zip(events, results):
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        updates.append(UpdateOne({"_id": event["transaction_id"]}, {"$set": {
+            "status": result["status"], "detail": result.get("detail"), "applied_at": now
+        }}))
+    gateway_events_collection.bulk_write(updates, ordered=False)
+    if counts.get("paid") or counts.get("updated"):
+        bump_versions("contributions")
+    return counts
+
+
+def store_events(events: List[dict]) -> List[str]:
+    """
+    Insert payment events into gateway_events as received. Returns the
+    transaction ids still to be applied: the new ones plus any stored
+    earlier but never applied. Events already applied are left out.
+    """
+    unique = {}
+    for event in events:
+        unique.setdefault(event["transaction_id"], event)
+    if not unique:
+        return []
+
+    now = datetime.now()
+    documents = [{"_id": transaction_id, **{k: v for k, v in event.items() if k != "transaction_id"},
+                  "status": RECEIVED, "received_at": now}
+                 for transaction_id, event in unique.items()]
+    seen = []
+    try:
+        gateway_events_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") != DUPLICATE_KEY:
+                raise
+            seen.append(documents[error["index"]]["_id"])
+
+    # Seen before but never applied (the process stopped first): apply now
+    pending = set(unique) - set(seen)
+    if seen:
+        pending.update(e["_id"] for e in gateway_events_collection.find(
+            {"_id": {"$in": seen}, "status": RECEIVED}, {"_id": 1}
+        ))
+    return [t for t in unique if t in pending]
+
+
+def apply_stored(transaction_ids: List[str]) -> Dict[str, int]:
+    """
+    Apply stored events that are still received. Returns counts of the
+    record_payment_batch statuses plus "duplicate" for ids already applied.
+    """
+    unique = list(dict.fromkeys(transaction_ids))
+    received = list(gateway_events_collection.find({"_id": {"$in": unique}, "status": RECEIVED}))
+    counts = _record([{**e, "transaction_id": e["_id"]} for e in received]) if received else {}
+    counts["duplicate"] = len(transaction_ids) - len(received)
+    return counts
+
+
+def apply_events(events: List[dict]) -> Dict[str, int]:
+    """
+    Store and apply a batch of payment events, skipping transaction ids
+    already applied. Returns counts of the record_payment_batch statuses
+    plus "duplicate".
+    """
+    pending = store_events(events)
+    if not pending:
+        return {"duplicate": len(events)}
+    counts = apply_stored(pending)
+    counts["duplicate"] += len(events) - len(pending)
+    return counts
+
+
+def recover_received(batch_size: int = GATEWAY_BATCH_SIZE) -> int:
+    """Apply events stored but never applied; returns how many"""
+    recovered = 0
+    while True:
+        pending = list(gateway_events_collection.find({"status": RECEIVED}).limit(batch_size))
+        if not pending:
+            return recovered
+        _record([{**e, "transaction_id": e["_id"]} for e in pending])
+        recovered += len(pending)
+
+
+class WebhookIngestor:
+    """
+    Bounded queue of stored gateway events (by transaction id) and the
+    task that applies them in batches
+    """
+
+    def __init__(self, queue_size: int = GATEWAY_QUEUE_SIZE, batch_size: int = GATEWAY_BATCH_SIZE,
+                 batch_wait_ms: int = GATEWAY_BATCH_WAIT_MS):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counts: Dict[str, int] = {}
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start applying events (call from the event loop)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Apply what is queued (up to timeout seconds), then stop"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopped with {self._queue.qsize()} gateway events unapplied; "
+                           "they are applied on the next start")
+        self._task = None
+
+    @property
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def enqueue(self, transaction_id: str) -> bool:
+        """Queue a stored event for applying; False when the queue is full"""
+        try:
+            self._queue.put_nowait(transaction_id)
+        except asyncio.QueueFull:
+            return False
+        gateway_queue_depth.inc()
+        return True
+
+    async def _run(self) -> None:
+        try:
+            recovered = await asyncio.to_thread(recover_received)
+            if recovered:
+                logger.info(f"Applied {recovered} gateway events left over from the last run")
+        except PyMongoError as e:
+            logger.error(f"Could not apply left-over gateway events: {str(e)}")
+
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            if None in batch:
+                stopping = True
+                batch = [transaction_id for transaction_id in batch if transaction_id is not None]
+            # The stop sentinel may leave a partial batch behind it
+            while stopping and not self._queue.empty():
+                transaction_id = self._queue.get_nowait()
+                if transaction_id is not None:
+                    batch.append(transaction_id)
+            if batch:
+                gateway_queue_depth.dec(amount=len(batch))
+                await self._apply(batch)
+
+    async def _apply(self, batch: List[str]) -> None:
+        """Apply a batch, retrying until MongoDB accepts it (applied events are skipped on retry)"""
+        while True:
+            started = time.perf_counter()
+            try:
+                counts = await asyncio.to_thread(apply_stored, batch)
+            except PyMongoError as e:
+                logger.error(f"Applying {len(batch)} gateway events failed, retrying: {str(e)}")
+                await asyncio.sleep(GATEWAY_RETRY_SECONDS)
+                continue
+            gateway_batch_duration.observe(time.perf_counter() - started)
+            gateway_batch_size.observe(len(batch))
+            self.batches += 1
+            for outcome, count in counts.items():
+                self._counts[outcome] = self._counts.get(outcome, 0) + count
+                gateway_events_applied_total.inc(outcome, amount=count)
+            return
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "events": dict(self._counts)
+        }
+
+
+# Shared ingestor instance
+gateway_ingestor = WebhookIngestor()
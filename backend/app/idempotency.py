@@ -0,0 +1,171 @@
+"""
+Idempotency-Key support for write endpoints.
+A client that retries a timed-out payment or generation call with the
+same Idempotency-Key header gets the stored response of the first call
+instead of the work being done twice. Keys live in idempotency_keys with
+a unique (scope, key) index, so concurrent retries can't both claim one,
+and a TTL index removes them after IDEMPOTENCY_TTL_HOURS.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import functools
+import hashlib
+import os
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.security import HTTPAuthorizationCredentials
+from pymongo.errors import DuplicateKeyError
+
+from .auth import decode_access_token
+from .db import idempotency_keys_collection
+from .dependencies import optional_security
+from .responses import dumps
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# A key still in progress after this long belongs to a request that died; it can be claimed again
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKey:
+    """
+    Idempotency-Key of a request, scoped to its route and caller, with a
+    fingerprint of the body so a reused key with a different request is
+    rejected
+    """
+
+    __slots__ = ("scope", "key", "fingerprint")
+
+    def __init__(self, scope: str, key: str, fingerprint: str):
+        self.scope = scope
+        self.key = key
+        self.fingerprint = fingerprint
+
+
+def claim(scope: str, key: str, fingerprint: str = "") -> Optional[dict]:
+    """
+    Claim a key for the current request. Returns None when this call owns
+    it now, otherwise the record of the request that claimed it first.
+    """
+    now = datetime.utcnow()
+    record = {
+        "scope": scope,
+        "key": key,
+        "fingerprint": fingerprint,
+        "status": IN_PROGRESS,
+        "claimed_at": now,
+        "expires_at": now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    }
+    try:
+        idempotency_keys_collection.insert_one(record)
+        return None
+    except DuplicateKeyError:
+        pass
+
+    # Take over a claim abandoned by a request that died mid-way
+    stale = idempotency_keys_collection.find_one_and_update(
+        {"scope": scope, "key": key, "fingerprint": fingerprint, "status": IN_PROGRESS,
+         "claimed_at": {"$lt": now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}},
+        {"$set": {"claimed_at": now, "expires_at": record["expires_at"]}}
+    )
+    if stale is not None:
+        return None
+    return idempotency_keys_collection.find_one({"scope": scope, "key": key}) or {"status": IN_PROGRESS}
+
+
+def complete(scope: str, key: str, status_code: int, body: bytes, media_type: str) -> None:
+    """Store the response of a claimed key for retries to replay"""
+    idempotency_keys_collection.update_one(
+        {"scope": scope, "key": key},
+        {"$set": {"status": COMPLETED, "response": {
+            "status_code": status_code, "body": body, "media_type": media_type
+        }}}
+    )
+
+
+def release(scope: str, key: str) -> None:
+    """Drop a claim without a stored response, so a retry does the work again"""
+    idempotency_keys_collection.delete_one({"scope": scope, "key": key, "status": IN_PROGRESS})
+
+
+async def idempotency_key(
+    request: Request,
+    key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[IdempotencyKey]:
+    """The request's Idempotency-Key (None without the header) for @idempotent endpoints"""
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    # Keys are per caller: the same key from two users names two requests
+    payload = decode_access_token(credentials.credentials) if credentials else None
+    caller = (payload or {}).get("sub", "")
+    body = await request.body()
+    return IdempotencyKey(
+        scope=f"{request.method} {request.url.path} {caller}",
+        key=key,
+        fingerprint=hashlib.sha256(body).hexdigest()
+    )
+
+
+def _replay(record: dict, key: IdempotencyKey) -> Response:
+    if record.get("fingerprint", key.fingerprint) != key.fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    if record.get("status") != COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress; retry later"
+        )
+    response = record["response"]
+    return Response(
+        content=response["body"],
+        status_code=response["status_code"],
+        media_type=response["media_type"],
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def idempotent(func):
+    """
+    Make an async endpoint honor the Idempotency-Key header. The endpoint
+    must take `idempotency: Optional[IdempotencyKey] = Depends(idempotency_key)`.
+    The first successful response is stored and replayed to retries with
+    the same key; a failed request releases its key.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = kwargs.get("idempotency")
+        if key is None:
+            return await func(*args, **kwargs)
+
+        record = claim(key.scope, key.key, key.fingerprint)
+        if record is not None:
+            return _replay(record, key)
+
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException:
+            release(key.scope, key.key)
+            raise
+
+        if isinstance(result, Response):
+            complete(key.scope, key.key, result.status_code, bytes(result.body), result.media_type)
+        else:
+            complete(key.scope, key.key, status.HTTP_200_OK, dumps(jsonable_encoder(result)), "application/json")
+        return result
+    return wrapper
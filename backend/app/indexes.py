@@ -0,0 +1,112 @@
+"""
+MongoDB indexes and collection options used by the API.
+Created on startup (create_indexes is a no-op for indexes that already
+exist) and by the dataset generator after bulk inserts.
+"""
+from typing import Optional
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from .db import get_database
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "contributions": [
+        # Per-member history; also covers the per-member analytics groupings
+        IndexModel([("member_id", ASCENDING), ("due_date", ASCENDING),
+                    ("paid_date", ASCENDING), ("amount", ASCENDING)], name="member_history"),
+        # Month ranges (dashboard, month close) and due-day cohorts
+        IndexModel([("due_date", ASCENDING), ("paid_date", ASCENDING),
+                    ("amount", ASCENDING)], name="due_date_amounts"),
+        # Paid contributions: delay histogram and fund totals rebuild
+        IndexModel([("paid_date", ASCENDING), ("due_date", ASCENDING),
+                    ("amount", ASCENDING)], name="paid_date_amounts"),
+    ],
+    "members": [
+        # Streak leaderboards
+        IndexModel([("streak.current", DESCENDING), ("member_id", ASCENDING)], name="streak_current"),
+        IndexModel([("streak.best", DESCENDING), ("member_id", ASCENDING)], name="streak_best"),
+        # Employee ID lookups (admin search, statement reconciliation)
+        IndexModel([("employee_id", ASCENDING)], name="employee_id"),
+        # Admin member search: prefix matches and fuzzy name words (app/search.py)
+        IndexModel([("search.terms", ASCENDING)], name="search_terms"),
+        IndexModel([("search.words", ASCENDING)], name="search_words"),
+    ],
+    "notifications": [
+        # Scheduler dedupe lookup
+        IndexModel([("member_id", ASCENDING), ("contribution_id", ASCENDING),
+                    ("notification_type", ASCENDING), ("sent_at", DESCENDING)], name="reminder_dedupe"),
+        # Member notification list
+        IndexModel([("member_id", ASCENDING), ("sent_at", DESCENDING)], name="member_recent"),
+        # Reminder history
+        IndexModel([("notification_type", ASCENDING), ("sent_at", DESCENDING)], name="type_recent"),
+        # Archival batches
+        IndexModel([("sent_at", ASCENDING)], name="sent_at"),
+    ],
+    "notifications_archive": [
+        IndexModel([("member_id", ASCENDING), ("sent_at", DESCENDING)], name="member_recent"),
+        IndexModel([("notification_type", ASCENDING), ("sent_at", DESCENDING)], name="type_recent"),
+    ],
+    "contributions_archive": [
+        # Member contribution list and history rebuilds (app/compaction.py)
+        IndexModel([("member_id", ASCENDING), ("due_date", ASCENDING),
+                    ("paid_date", ASCENDING), ("amount", ASCENDING)], name="member_history"),
+        # Fund totals rebuild
+        IndexModel([("paid_date", ASCENDING), ("due_date", ASCENDING),
+                    ("amount", ASCENDING)], name="paid_date_amounts"),
+        # Month close refuses compacted months (app/rollups.py)
+        IndexModel([("due_date", ASCENDING)], name="due_date"),
+    ],
+    "contribution_summaries": [
+        # High-risk count joins summaries by member
+        IndexModel([("member_id", ASCENDING), ("year", ASCENDING)], name="member_year"),
+    ],
+    "gateway_events": [
+        # Events stored but not yet applied (app/gateway.py recovery)
+        IndexModel([("status", ASCENDING)], name="status_received",
+                   partialFilterExpression={"status": "received"}),
+    ],
+    "refresh_tokens": [
+        # Revocation on password change and on reuse of a rotated token
+        IndexModel([("email", ASCENDING)], name="email"),
+        IndexModel([("family", ASCENDING)], name="family"),
+        # Expire tokens at their expires_at
+        IndexModel([("expires_at", ASCENDING)], name="expires_at", expireAfterSeconds=0),
+    ],
+    "idempotency_keys": [
+        # One claim per key and caller/route (app/idempotency.py)
+        IndexModel([("scope", ASCENDING), ("key", ASCENDING)], name="scope_key", unique=True),
+        # Expire keys at their expires_at
+        IndexModel([("expires_at", ASCENDING)], name="expires_at", expireAfterSeconds=0),
+    ],
+}
+
+# Options for collections that must be created explicitly (options can't change later)
+COLLECTIONS = {
+    # Rarely read; trade some CPU for a smaller footprint
+    "notifications_archive": {"storageEngine": {"wiredTiger": {"configString": "block_compressor=zstd"}}},
+    "contributions_archive": {"storageEngine": {"wiredTiger": {"configString": "block_compressor=zstd"}}},
+}
+
+
+def ensure_indexes(database: Optional[Database] = None) -> bool:
+    """Create missing collections and indexes; returns False (and logs) if the server refused"""
+    database = database if database is not None else get_database()
+    try:
+        existing = set(database.list_collection_names())
+        for collection, options in COLLECTIONS.items():
+            if collection not in existing:
+                try:
+                    database.create_collection(collection, **options)
+                except CollectionInvalid:
+                    pass  # Created by another worker in the meantime
+        for collection, indexes in INDEXES.items():
+            database[collection].create_indexes(indexes)
+    except PyMongoError as e:
+        logger.warning(f"Could not create indexes: {e}")
+        return False
+    return True
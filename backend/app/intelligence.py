@@ -1,8 +1,11 @@
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import statistics
 import random
 
+from .utilities import contribution_stats
+
 class IntelligenceEngine:
     """
     Advanced behavior analysis and prediction engine
@@ -14,11 +17,13 @@ class IntelligenceEngine:
         Calculate risk score (0-100) based on payment behavior
         Higher score = higher risk
         """
-        if not contributions:
+        # Totals of contributions folded into yearly summaries (compaction.py)
+        compacted = (member or {}).get("compacted") or {}
+        total = len(contributions) + compacted.get("count", 0)
+        if not total:
             return 50.0  # Neutral for new members
         
-        total = len(contributions)
-        paid = sum(1 for c in contributions if c.get("paid_date"))
+        paid = sum(1 for c in contributions if c.get("paid_date")) + compacted.get("paid_count", 0)
         missed = total - paid
         
         # Base score from missed payment ratio
@@ -35,8 +40,9 @@ class IntelligenceEngine:
                 if delay > 0:
                     delays.append(delay)
         
-        if delays:
-            avg_delay = statistics.mean(delays)
+        late_count = len(delays) + compacted.get("late_count", 0)
+        if late_count:
+            avg_delay = (sum(delays) + compacted.get("delay_sum", 0)) / late_count
             delay_score = min(avg_delay / 30 * 40, 40)  # Cap at 40
             base_score += delay_score
         
@@ -48,7 +54,9 @@ class IntelligenceEngine:
         Predict if member is likely to delay next payment
         Returns prediction with confidence and estimated delay days
         """
-        if len(contributions) < 2:
+        # The recent window is always raw; compacted years only add history
+        history = len(contributions) + ((member or {}).get("compacted") or {}).get("count", 0)
+        if history < 2 or not contributions:
             return {
                 "will_delay": False,
                 "confidence": 0.3,
@@ -99,7 +107,7 @@ class IntelligenceEngine:
             # More nuanced confidence calculation
             # Base confidence on: consistency of delays + data quality
             paid_ratio = len(paid_delays) / len(recent) if recent else 0
-            data_quality = min(len(contributions) / 10, 1.0)  # More history = higher confidence (cap at 10)
+            data_quality = min(history / 10, 1.0)  # More history = higher confidence (cap at 10)
             
             # Calculate variance in delays (lower variance = more predictable = higher confidence)
             if len(recent_delays) > 1:
@@ -142,13 +150,8 @@ class IntelligenceEngine:
         
         # 1. POSITIVE REINFORCEMENT (For Regular/Good Members)
         if classification == "Regular" and not prediction.get("will_delay"):
-            streak = 5 # Simulated streak data
+            streak = member.get("streak", {}).get("current", 0)
             templates = [
-                (
-                    f"Hi {name}, you've been an amazing supporter! 🌟 Thanks to your 5-month streak of timely contributions, "
-                    f"we've been able to fund essential community projects. Your upcoming contribution of ₹{amount} due in {days_until_due} days "
-                    f"helps keep this momentum going. Thank you for being a pillar of our community!"
-                ),
                 (
                     f"Hello {name}, your consistency is inspiring! 🌠 Your timely support helps us plan better for our community initiatives. "
                     f"We're looking forward to your contribution of ₹{amount} in {days_until_due} days. Thanks for leading by example!"
@@ -158,6 +161,12 @@ class IntelligenceEngine:
                     f"Your next payment of ₹{amount} is coming up in {days_until_due} days. Thank you for being someone we can count on!"
                 )
             ]
+            if streak >= 2:
+                templates.append(
+                    f"Hi {name}, you've been an amazing supporter! 🌟 Thanks to your {streak}-month streak of timely contributions, "
+                    f"we've been able to fund essential community projects. Your upcoming contribution of ₹{amount} due in {days_until_due} days "
+                    f"helps keep this momentum going. Thank you for being a pillar of our community!"
+                )
             return random.choice(templates)
         
         # 2. SOCIAL PROOF (For Neutral/Occasional Delay)
@@ -179,6 +188,12 @@ class IntelligenceEngine:
                     f"Join the majority of our community in staying current and supporting our shared vision!"
                 )
             ]
+            best = member.get("streak", {}).get("best", 0)
+            if best >= 3:
+                templates.append(
+                    f"Hi {name}, you once paid on time {best} months in a row — that's the kind of consistency our community runs on! "
+                    f"Your contribution of ₹{amount} is due in {days_until_due} days. Let's start a new streak together."
+                )
             return random.choice(templates)
         
         # 3. EMPATHY & SUPPORT (For High-Risk/Struggling Members)
@@ -215,14 +230,15 @@ class IntelligenceEngine:
                 return random.choice(templates)
     
     @staticmethod
-    def analyze_payment_patterns(contributions: List[dict]) -> Dict:
+    def analyze_payment_patterns(contributions: List[dict], compacted: Optional[dict] = None) -> Dict:
         """
         Analyze payment timing patterns to find preferences
         """
-        if not contributions:
+        compacted = compacted or {}
+        if not contributions and not compacted.get("count"):
             return {"pattern": "No data", "preferred_day": None}
         
-        payment_days = []
+        payment_days = Counter({int(day): n for day, n in compacted.get("paid_days", {}).items()})
         payment_delays = []
         
         for c in contributions:
@@ -231,7 +247,7 @@ class IntelligenceEngine:
                 due_date = datetime.strptime(c["due_date"], "%Y-%m-%d")
                 
                 # Day of month when paid
-                payment_days.append(paid_date.day)
+                payment_days[paid_date.day] += 1
                 
                 # Delay in days
                 delay = (paid_date - due_date).days
@@ -241,8 +257,9 @@ class IntelligenceEngine:
             return {"pattern": "No payments yet", "preferred_day": None}
         
         # Find most common payment day
-        preferred_day = statistics.mode(payment_days) if payment_days else None
-        avg_delay = statistics.mean(payment_delays) if payment_delays else 0
+        preferred_day = payment_days.most_common(1)[0][0]
+        paid_count = len(payment_delays) + compacted.get("paid_count", 0)
+        avg_delay = (sum(payment_delays) + compacted.get("raw_delay_sum", 0)) / paid_count
         
         # Determine pattern
         if avg_delay <= 2:
@@ -258,7 +275,7 @@ class IntelligenceEngine:
             "pattern": pattern,
             "preferred_day": preferred_day,
             "average_delay": round(avg_delay, 1),
-            "consistency": "High" if len(set(payment_days)) <= 3 else "Variable"
+            "consistency": "High" if len(payment_days) <= 3 else "Variable"
         }
     
     @staticmethod
@@ -268,7 +285,8 @@ class IntelligenceEngine:
         """
         risk_score = IntelligenceEngine.calculate_risk_score(contributions, member)
         prediction = IntelligenceEngine.predict_delay_likelihood(contributions, member)
-        patterns = IntelligenceEngine.analyze_payment_patterns(contributions)
+        patterns = IntelligenceEngine.analyze_payment_patterns(contributions, member.get("compacted"))
+        stats = contribution_stats(contributions, member.get("compacted"))
         
         # Calculate contribution health
         if risk_score < 30:
@@ -296,7 +314,8 @@ class IntelligenceEngine:
             "prediction": prediction,
             "payment_patterns": patterns,
             "recommendation": recommendation,
-            "total_contributions": len(contributions),
-            "paid_count": sum(1 for c in contributions if c.get("paid_date")),
-            "success_rate": round((sum(1 for c in contributions if c.get("paid_date")) / len(contributions) * 100), 1) if contributions else 0
+            "total_contributions": stats["total_contributions"],
+            "paid_count": stats["paid_count"],
+            "success_rate": round(stats["paid_count"] / stats["total_contributions"] * 100, 1) if stats["total_contributions"] else 0,
+            "delay_stdev_days": round(stats["delay_stdev"], 1)
         }
@@ -3,10 +3,13 @@ Enhanced Contribution Tracking API - Main Application
 Clean entry point with router registration only.
 All routes are organized in the routers/ directory.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,13 +19,38 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
+    # Startup: Create the MongoDB client (connections open in the background)
+    from .db import connect, close_connection
+    connect()
+    # Startup: Create missing indexes
+    from .indexes import ensure_indexes
+    ensure_indexes()
+    # Startup: Add search keys to members created before member search
+    from .search import backfill_search_fields
+    backfill_search_fields()
     # Startup: Initialize scheduler
     from .scheduler import start_scheduler
     start_scheduler()
+    # Startup: Watch change streams for live dashboard events
+    from .events import event_broker
+    event_broker.start()
+    # Startup: Apply payment gateway webhook events in batches
+    from .gateway import gateway_ingestor
+    gateway_ingestor.start()
     yield
     # Shutdown: Stop scheduler
     from .scheduler import stop_scheduler
     stop_scheduler()
+    event_broker.stop()
+    await gateway_ingestor.stop()
+    # Shutdown: Close pooled MongoDB connections
+    close_connection()
+
+from .cache import cached
+from .dependencies import analytics_reads
+from .versions import ETagMiddleware, conditional_get
+from .responses import FastJSONResponse, GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
+from .metrics import MetricsMiddleware, registry
 
 # Import routers
 from .routers import (
@@ -32,7 +60,10 @@ from .routers import (
     contribution_routes,
     admin_routes,
     prediction_routes,
-    password_routes
+    password_routes,
+    event_routes,
+    analytics_routes,
+    webhook_routes
 )
 
 # Create FastAPI app with lifespan management
@@ -40,7 +71,8 @@ app = FastAPI(
     title="Enhanced Contribution Tracking API",
     version="2.0",
     description="Intelligent contribution tracking with predictive analytics and automated reminders",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -56,6 +88,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attach ETags chosen by conditional_get() to read responses
+app.add_middleware(ETagMiddleware)
+
+# Compress large payloads (member and contribution lists)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+# Outermost: latency, status codes and per-request MongoDB work
+app.add_middleware(MetricsMiddleware)
+
 # Include routers with prefixes and tags
 app.include_router(auth_routes.router, prefix="/auth", tags=["Authentication"])
 app.include_router(password_routes.router, prefix="/auth", tags=["Authentication"])
@@ -64,6 +105,9 @@ app.include_router(ticket_routes.router, prefix="/member/tickets", tags=["Ticket
 app.include_router(contribution_routes.router, prefix="/contributions", tags=["Contributions"])
 app.include_router(admin_routes.router, prefix="/admin", tags=["Admin"])
 app.include_router(prediction_routes.router, prefix="/admin/predictions", tags=["Predictions"])
+app.include_router(event_routes.router, prefix="/events", tags=["Live Updates"])
+app.include_router(analytics_routes.router, prefix="/admin/analytics", tags=["Analytics"])
+app.include_router(webhook_routes.router, prefix="/webhooks", tags=["Payment Gateway"])
 
 # Public endpoints
 @app.get("/", tags=["Root"])
@@ -86,34 +130,49 @@ def root():
 
 @app.get("/health", tags=["Root"])
 def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "version": "2.0"}
+    """Readiness check: pings MongoDB and reports connection pool usage"""
+    from pymongo.errors import PyMongoError
+    from .db import ping, pool_stats
+
+    started = time.perf_counter()
+    try:
+        ping()
+    except PyMongoError as e:
+        return JSONResponse(status_code=503, content={
+            "status": "unavailable",
+            "version": "2.0",
+            "database": {"status": "unreachable", "error": str(e)}
+        })
+
+    return {
+        "status": "healthy",
+        "version": "2.0",
+        "database": {
+            "status": "ok",
+            "ping_ms": round((time.perf_counter() - started) * 1000, 1),
+            "pool": pool_stats()
+        }
+    }
+
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+def metrics():
+    """Prometheus metrics: request latency, status codes and MongoDB commands"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
-@app.get("/members", tags=["Public"])
-async def get_all_members_public():
+@app.get("/members", tags=["Public"], dependencies=[Depends(analytics_reads)])
+@cached("public:members", ttl=30, tags=("members", "contributions"))
+async def get_all_members_public(_etag: None = Depends(conditional_get("members", "contributions"))):
     """Get all members with statistics (public for demo)"""
     from .db import members_collection, contributions_collection
-    from .utilities import calculate_delay_days, classify_member
+    from .utilities import contribution_stats
     
     members = []
     
     for member in members_collection.find():
         contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
-        
-        total_contributions = len(contributions)
-        paid_count = sum(1 for c in contributions if c.get("paid_date"))
-        missed_count = total_contributions - paid_count
-        
-        delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                  for c in contributions if c.get("paid_date")]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        
-        unpaid_contributions = [c for c in contributions if not c.get("paid_date")]
-        current_delay = max([calculate_delay_days(c["due_date"]) 
-                           for c in unpaid_contributions], default=0)
-        
-        classification = classify_member(missed_count, avg_delay)
+        stats = contribution_stats(contributions, member.get("compacted"))
         
         members.append({
             "member_id": member["member_id"],
@@ -123,59 +182,47 @@ async def get_all_members_public():
             "email": member.get("email"),
             "monthly_amount": member["monthly_amount"],
             "due_day": member["due_day"],
-            "total_contributions": total_contributions,
-            "paid_count": paid_count,
-            "missed_count": missed_count,
-            "avg_delay_days": round(avg_delay, 1),
-            "current_delay_days": current_delay,
-            "classification": classification,
+            "total_contributions": stats["total_contributions"],
+            "paid_count": stats["paid_count"],
+            "missed_count": stats["missed_count"],
+            "avg_delay_days": round(stats["avg_delay"], 1),
+            "current_delay_days": stats["current_delay"],
+            "classification": stats["classification"],
             "status": "Active"
         })
     
-    return members
+    return FastJSONResponse(members)
 
 
-@app.get("/dashboard/high-risk", tags=["Public"])
-async def get_high_risk_members():
+@app.get("/dashboard/high-risk", tags=["Public"], dependencies=[Depends(analytics_reads)])
+@cached("public:high_risk", ttl=60, tags=("members", "contributions"))
+async def get_high_risk_members(_etag: None = Depends(conditional_get("members", "contributions"))):
     """Get high-risk members (public for demo)"""
     from .db import members_collection, contributions_collection
-    from .utilities import calculate_delay_days, classify_member
+    from .utilities import contribution_stats
     
     high_risk_members = []
     
     for member in members_collection.find():
         contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
+        stats = contribution_stats(contributions, member.get("compacted"))
         
-        if len(contributions) < 2:
+        if stats["total_contributions"] < 2:
             continue
         
-        total_contributions = len(contributions)
-        paid_count = sum(1 for c in contributions if c.get("paid_date"))
-        missed_count = total_contributions - paid_count
-        
-        delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                  for c in contributions if c.get("paid_date")]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        
-        classification = classify_member(missed_count, avg_delay)
-        
-        if classification == "High-risk Delay":
-            unpaid_contributions = [c for c in contributions if not c.get("paid_date")]
-            current_delay = max([calculate_delay_days(c["due_date"]) 
-                               for c in unpaid_contributions], default=0)
-            
+        if stats["classification"] == "High-risk Delay":
             high_risk_members.append({
                 "member_id": member["member_id"],
                 "name": member["name"],
                 "phone": member["phone"],
                 "email": member.get("email"),
-                "missed_payments": missed_count,
-                "avg_delay_days": round(avg_delay, 1),
-                "current_delay_days": current_delay,
-                "classification": classification
+                "missed_payments": stats["missed_count"],
+                "avg_delay_days": round(stats["avg_delay"], 1),
+                "current_delay_days": stats["current_delay"],
+                "classification": stats["classification"]
             })
     
-    return high_risk_members
+    return FastJSONResponse(high_risk_members)
 
 
 @app.get("/reminders/{member_id}", tags=["Reminders"])
@@ -183,7 +230,7 @@ async def get_reminder_preview(member_id: str):
     """Get a preview of the ethical reminder for a member"""
     from fastapi import HTTPException
     from .db import members_collection, contributions_collection
-    from .utilities import calculate_delay_days, classify_member
+    from .utilities import contribution_stats
     from .intelligence import IntelligenceEngine
     from datetime import datetime
     
@@ -194,19 +241,9 @@ async def get_reminder_preview(member_id: str):
     contributions = list(contributions_collection.find({"member_id": member_id}))
     
     # Calculate stats
-    total_contributions = len(contributions)
-    paid_count = sum(1 for c in contributions if c.get("paid_date"))
-    missed_count = total_contributions - paid_count
-    
-    delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-              for c in contributions if c.get("paid_date")]
-    avg_delay = sum(delays) / len(delays) if delays else 0
-    
+    stats = contribution_stats(contributions, member.get("compacted"))
+    classification = stats["classification"]
     unpaid_contributions = [c for c in contributions if not c.get("paid_date")]
-    current_delay = max([calculate_delay_days(c["due_date"]) 
-                       for c in unpaid_contributions], default=0)
-    
-    classification = classify_member(missed_count, avg_delay)
     
     # Generate Message
     prediction = IntelligenceEngine.predict_delay_likelihood(contributions, member)
@@ -228,7 +265,7 @@ async def get_reminder_preview(member_id: str):
         "member_id": member_id,
         "member_name": member["name"],
         "classification": classification,
-        "missed_payments": missed_count,
-        "delay_days": current_delay,
+        "missed_payments": stats["missed_count"],
+        "delay_days": stats["current_delay"],
         "reminder_message": message
     }
@@ -0,0 +1,335 @@
+"""
+Request and database instrumentation.
+Records per-route latency histograms, in-flight requests and status codes,
+counts MongoDB commands, documents returned and DB time per request
+through a pymongo CommandListener, and tracks connection pool usage.
+Everything is rendered in Prometheus text format for GET /metrics, and
+each response carries a Server-Timing header so N+1 query patterns are
+visible from the browser dev tools.
+"""
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Commands that are driver housekeeping rather than application queries
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue",
+                    "endSessions", "buildInfo", "killCursors"}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """Cumulative histogram with labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        for labels, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {bucket_count}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "MongoDB commands issued per HTTP request", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in MongoDB per HTTP request", ("method", "route")))
+mongo_commands_total = registry.register(Counter(
+    "mongo_commands_total", "MongoDB commands by name and outcome", ("command", "outcome")))
+mongo_command_duration = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command",)))
+mongo_documents_returned_total = registry.register(Counter(
+    "mongo_documents_returned_total", "Documents returned by MongoDB commands", ("command",)))
+mongo_pool_connections = registry.register(Gauge(
+    "mongo_pool_connections", "MongoDB pool connections by server and state", ("address", "state")))
+mongo_pool_checkout_failures_total = registry.register(Counter(
+    "mongo_pool_checkout_failures_total", "Failed MongoDB connection checkouts by reason", ("reason",)))
+gateway_webhooks_total = registry.register(Counter(
+    "gateway_webhooks_total", "Payment gateway webhook deliveries by outcome", ("outcome",)))
+gateway_events_applied_total = registry.register(Counter(
+    "gateway_events_applied_total", "Payment gateway events applied by result status", ("status",)))
+gateway_queue_depth = registry.register(Gauge(
+    "gateway_queue_depth", "Payment gateway events waiting to be applied"))
+gateway_batch_size = registry.register(Histogram(
+    "gateway_batch_size", "Payment gateway events applied per batch", buckets=QUERY_COUNT_BUCKETS))
+gateway_batch_duration = registry.register(Histogram(
+    "gateway_batch_duration_seconds", "Time to apply one batch of payment gateway events"))
+login_rate_limited_total = registry.register(Counter(
+    "login_rate_limited_total", "Password attempts rejected by the rate limiter by bucket", ("bucket",)))
+
+
+class RequestDBStats:
+    """Database work attributed to a single request"""
+
+    __slots__ = ("queries", "documents", "duration", "commands")
+
+    def __init__(self):
+        self.queries = 0
+        self.documents = 0
+        self.duration = 0.0
+        self.commands = []
+
+
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def track_db_stats() -> RequestDBStats:
+    """Start attributing MongoDB commands in the current context to a new stats object"""
+    stats = RequestDBStats()
+    _request_db_stats.set(stats)
+    return stats
+
+
+def _documents_in_reply(reply) -> int:
+    """Number of documents in a find/aggregate/getMore reply batch"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return 0
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Counts MongoDB commands and attributes them to the current request
+    """
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, outcome: str, documents: int = 0):
+        name = event.command_name
+        if name in IGNORED_COMMANDS:
+            return
+
+        seconds = event.duration_micros / 1_000_000
+        mongo_commands_total.inc(name, outcome)
+        mongo_command_duration.observe(seconds, name)
+        if documents:
+            mongo_documents_returned_total.inc(name, amount=documents)
+
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.documents += documents
+            stats.duration += seconds
+            stats.commands.append(name)
+
+    def succeeded(self, event):
+        self._record(event, "success", _documents_in_reply(event.reply))
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+
+command_listener = MongoCommandListener()
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks open and checked-out connections per server for /health and /metrics
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # address -> {"open": n, "in_use": n}
+        self._pools: Dict[str, Dict[str, int]] = {}
+
+    def _adjust(self, address, state: str, delta: int) -> None:
+        key = "%s:%s" % address
+        with self._lock:
+            pool = self._pools.setdefault(key, {"open": 0, "in_use": 0})
+            pool[state] += delta
+        mongo_pool_connections.inc(key, state, amount=delta)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        key = "%s:%s" % event.address
+        with self._lock:
+            pool = self._pools.pop(key, None)
+        if pool:
+            for state, count in pool.items():
+                mongo_pool_connections.dec(key, state, amount=count)
+
+    def connection_created(self, event):
+        self._adjust(event.address, "open", 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._adjust(event.address, "open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures_total.inc(str(event.reason))
+
+    def connection_checked_out(self, event):
+        self._adjust(event.address, "in_use", 1)
+
+    def connection_checked_in(self, event):
+        self._adjust(event.address, "in_use", -1)
+
+
+pool_listener = MongoPoolListener()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status codes and per-request DB work,
+    and adding a Server-Timing header
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = track_db_stats()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                timing = (f'db;dur={stats.duration * 1000:.1f};desc="{stats.queries} queries, {stats.documents} docs", '
+                          f'app;dur={elapsed_ms:.1f}')
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            # Label by route template to keep cardinality bounded
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            elapsed = time.perf_counter() - start
+
+            http_requests_total.inc(method, route_path, str(status_code))
+            http_request_duration.observe(elapsed, method, route_path)
+            http_request_db_queries.observe(stats.queries, method, route_path)
+            http_request_db_duration.observe(stats.duration, method, route_path)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, Literal
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Optional, Literal
 from datetime import datetime
 import re
 
@@ -29,6 +29,10 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -63,6 +67,18 @@ class PaymentSubmit(BaseModel):
     contribution_id: str
     paid_date: str
 
+class PaymentEntry(BaseModel):
+    contribution_id: str
+    paid_date: str
+    amount: Optional[float] = None  # Amount received; checked against the contribution when given
+
+class PaymentBatch(BaseModel):
+    payments: List[PaymentEntry] = Field(min_length=1, max_length=500)
+
+class ReconciledPayments(BaseModel):
+    # Matches from a reconciled bank statement, confirmed by the admin
+    payments: List[PaymentEntry] = Field(min_length=1, max_length=200000)
+
 class NotificationPreferences(BaseModel):
     email: bool = True
     sms: bool = False
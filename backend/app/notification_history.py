@@ -0,0 +1,149 @@
+"""
+Notification history with retention.
+Notifications are recorded here so each member's summary counters are
+incremented as they are sent. A nightly job moves notifications older
+than NOTIFICATION_RETENTION_DAYS in batches into notifications_archive
+(created compressed with zstd, see indexes.py), which keeps the
+scheduler's dedupe lookup and the history endpoint on a small working
+set. The counters cover archived notifications too.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+import os
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+from .db import (
+    get_database,
+    notifications_collection,
+    notifications_archive_collection,
+    notification_summary_collection
+)
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "1000"))
+# The scheduler skips members reminded in the last 2 days; keep those live
+MIN_RETENTION_DAYS = 7
+
+DUPLICATE_KEY = 11000
+
+
+def _summary_increments(notification: dict) -> dict:
+    increments = {"total": 1, f"types.{notification.get('notification_type', 'other')}": 1}
+    if notification.get("priority"):
+        increments[f"priorities.{notification['priority']}"] = 1
+    return increments
+
+
+def record_notification(notification: dict) -> None:
+    """Store a sent notification and count it in the member's summary"""
+    notifications_collection.insert_one(notification)
+    notification_summary_collection.update_one(
+        {"_id": notification["member_id"]},
+        {"$inc": _summary_increments(notification), "$max": {"last_sent_at": notification["sent_at"]}},
+        upsert=True
+    )
+
+
+def get_notification_summary(member_id: str) -> dict:
+    """A member's notification counters (zeros if none were sent)"""
+    summary = notification_summary_collection.find_one({"_id": member_id}) or {}
+    return {
+        "total": summary.get("total", 0),
+        "archived": summary.get("archived", 0),
+        "types": summary.get("types", {}),
+        "priorities": summary.get("priorities", {}),
+        "last_sent_at": summary.get("last_sent_at")
+    }
+
+
+def archive_notifications(
+    older_than_days: Optional[int] = None,
+    batch_size: int = NOTIFICATION_ARCHIVE_BATCH_SIZE,
+    database: Optional[Database] = None
+) -> int:
+    """
+    Move notifications sent more than older_than_days ago (default
+    NOTIFICATION_RETENTION_DAYS) to notifications_archive, oldest first,
+    batch_size at a time. Safe to rerun after an interruption. Returns the
+    number of notifications moved.
+    """
+    database = database if database is not None else get_database()
+    days = max(older_than_days or NOTIFICATION_RETENTION_DAYS, MIN_RETENTION_DAYS)
+    cutoff = datetime.now() - timedelta(days=days)
+
+    moved = 0
+    while True:
+        batch = list(database.notifications.find({"sent_at": {"$lt": cutoff}}).sort("sent_at", 1).limit(batch_size))
+        if not batch:
+            break
+
+        archived_at = datetime.now()
+        for notification in batch:
+            notification["archived_at"] = archived_at
+        try:
+            database.notifications_archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Copied by an earlier run that stopped before deleting them
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+        database.notifications.delete_many({"_id": {"$in": [n["_id"] for n in batch]}})
+
+        per_member = Counter(n["member_id"] for n in batch)
+        database.notification_summary.bulk_write([
+            UpdateOne({"_id": member_id}, {"$inc": {"archived": count}}, upsert=True)
+            for member_id, count in per_member.items()
+        ], ordered=False)
+        moved += len(batch)
+
+    if moved:
+        logger.info(f"Archived {moved} notifications sent before {cutoff:%Y-%m-%d}")
+    return moved
+
+
+def rebuild_notification_summary(database: Optional[Database] = None) -> int:
+    """Recompute every member's counters from both collections; returns the number of members"""
+    database = database if database is not None else get_database()
+    group = [{"$group": {
+        "_id": {"member_id": "$member_id", "type": {"$ifNull": ["$notification_type", "other"]},
+                "priority": "$priority"},
+        "count": {"$sum": 1},
+        "last_sent_at": {"$max": "$sent_at"}
+    }}]
+
+    summaries = defaultdict(lambda: {"total": 0, "archived": 0, "types": {}, "priorities": {}, "last_sent_at": None})
+    for collection, archived in ((database.notifications, False), (database.notifications_archive, True)):
+        for row in collection.aggregate(group):
+            key, count = row["_id"], row["count"]
+            summary = summaries[key["member_id"]]
+            summary["total"] += count
+            summary["archived"] += count if archived else 0
+            summary["types"][key["type"]] = summary["types"].get(key["type"], 0) + count
+            if key.get("priority"):
+                summary["priorities"][key["priority"]] = summary["priorities"].get(key["priority"], 0) + count
+            if summary["last_sent_at"] is None or row["last_sent_at"] > summary["last_sent_at"]:
+                summary["last_sent_at"] = row["last_sent_at"]
+
+    database.notification_summary.delete_many({"_id": {"$nin": list(summaries)}})
+    if summaries:
+        database.notification_summary.bulk_write([
+            ReplaceOne({"_id": member_id}, summary, upsert=True)
+            for member_id, summary in summaries.items()
+        ], ordered=False)
+    return len(summaries)
+
+
+def recent_notifications(query: dict, limit: int, include_archive: bool = False) -> List[dict]:
+    """Latest notifications matching query, newest first, optionally including archived ones"""
+    notifications = list(notifications_collection.find(query, {"_id": 0}).sort("sent_at", -1).limit(limit))
+    if include_archive and len(notifications) < limit:
+        # Everything archived is older than everything still live
+        notifications += notifications_archive_collection.find(query, {"_id": 0}).sort(
+            "sent_at", -1).limit(limit - len(notifications))
+    return notifications
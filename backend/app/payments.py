@@ -0,0 +1,269 @@
+"""
+Payment recording and community fund running totals.
+Every path that marks contributions paid goes through this module, so the
+fund_totals document (and the summary of a closed month, see rollups.py)
+is incremented exactly once per contribution and the impact dashboard can
+read it without scanning the contributions.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+import uuid
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from .db import contributions_collection, fund_totals_collection, get_database
+from .aggregations import paid_by_month_pipeline
+from .rollups import add_late_payments
+from .streaks import UNPAID, record_payments as update_streaks
+
+FUND_TOTALS_ID = "community"
+
+# Fields of newly paid contributions the totals, summaries and streaks need
+PAID_FIELDS = {"member_id": 1, "amount": 1, "due_date": 1, "missed_recorded": 1}
+
+# Entered amounts may differ from the contribution's by rounding only
+AMOUNT_TOLERANCE = 0.01
+
+# Initiatives shown on the impact dashboard and their share of every payment
+INITIATIVES = [
+    {
+        "id": 1,
+        "key": "education",
+        "name": "Community Education Fund",
+        "description": "Scholarships for 50 underprivileged students",
+        "target": 200000,
+        "share": 0.4,
+        "status": "In Progress"
+    },
+    {
+        "id": 2,
+        "key": "medical",
+        "name": "Emergency Medical Aid",
+        "description": "Support for urgent surgeries and medication",
+        "target": 150000,
+        "share": 0.3,
+        "status": "Active"
+    },
+    {
+        "id": 3,
+        "key": "infrastructure",
+        "name": "Infrastructure Repair",
+        "description": "Roof maintenance and hall renovation",
+        "target": 150000,
+        "share": 0.3,
+        "status": "Planning"
+    }
+]
+
+
+def _increments(paid: Iterable[dict]) -> dict:
+    """$inc document for newly paid contributions (amount and due_date)"""
+    inc = {"total_raised": 0, "paid_count": 0}
+    for contribution in paid:
+        amount = contribution.get("amount") or 0
+        month_key = f"months.{contribution['due_date'][:7]}"
+        inc["total_raised"] += amount
+        inc["paid_count"] += 1
+        inc[month_key] = inc.get(month_key, 0) + amount
+        for initiative in INITIATIVES:
+            key = f"initiatives.{initiative['key']}"
+            inc[key] = inc.get(key, 0) + amount * initiative["share"]
+    return inc
+
+
+def add_to_fund_totals(paid: list) -> None:
+    """Atomically add newly paid contributions to the running totals"""
+    if not paid:
+        return
+    fund_totals_collection.update_one(
+        {"_id": FUND_TOTALS_ID},
+        {"$inc": _increments(paid), "$set": {"updated_at": datetime.now()}},
+        upsert=True
+    )
+
+
+def _record_paid(paid: list, paid_date: Optional[str] = None) -> None:
+    """
+    Update the running totals, closed monthly summaries and streaks.
+    Without paid_date each contribution carries its own.
+    """
+    add_to_fund_totals(paid)
+    add_late_payments(paid, paid_date)
+    update_streaks(paid, paid_date)
+
+
+def to_object_id(contribution_id) -> Optional[ObjectId]:
+    """Contribution _id from its string form; None when it isn't a valid ObjectId"""
+    if isinstance(contribution_id, ObjectId):
+        return contribution_id
+    try:
+        return ObjectId(contribution_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+def mark_paid(contribution_id, paid_date: str) -> bool:
+    """
+    Mark one contribution paid. Returns False when it doesn't exist.
+    Re-recording an already paid contribution only corrects its paid_date.
+    Raises ValueError when paid_date isn't a YYYY-MM-DD date.
+    """
+    if not valid_date(paid_date):
+        raise ValueError(f"Invalid paid_date '{paid_date}'")
+    contribution_id = to_object_id(contribution_id)
+    if contribution_id is None:
+        return False
+
+    contribution = contributions_collection.find_one_and_update(
+        {"_id": contribution_id, "paid_date": UNPAID},
+        {"$set": {"paid_date": paid_date, "payment_ref": uuid.uuid4().hex}},
+        projection=PAID_FIELDS
+    )
+    if contribution is None:
+        result = contributions_collection.update_one(
+            {"_id": contribution_id},
+            {"$set": {"paid_date": paid_date}}
+        )
+        return result.matched_count > 0
+
+    _record_paid([contribution], paid_date)
+    return True
+
+
+def pay_all_unpaid(member_id: str, paid_date: str) -> int:
+    """Mark all of a member's unpaid contributions paid; returns how many"""
+    # Tag the documents this call paid, so a concurrent payment of the same
+    # contributions can't be counted twice
+    payment_ref = uuid.uuid4().hex
+    result = contributions_collection.update_many(
+        {"member_id": member_id, "paid_date": UNPAID},
+        {"$set": {"paid_date": paid_date, "payment_ref": payment_ref}}
+    )
+    if result.modified_count:
+        _record_paid(list(contributions_collection.find(
+            {"member_id": member_id, "payment_ref": payment_ref},
+            PAID_FIELDS
+        )), paid_date)
+    return result.modified_count
+
+
+def valid_date(value: str) -> bool:
+    """True for a YYYY-MM-DD date"""
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def paid_by_batch(contribution_ids: list, payment_ref: str) -> dict:
+    """Filter for the contributions a batch paid; bounded by _id so it uses the _id index"""
+    return {"_id": {"$in": contribution_ids}, "payment_ref": payment_ref}
+
+
+def record_payment_batch(entries: List[dict]) -> List[dict]:
+    """
+    Record many payments (contribution_id, paid_date and optionally the
+    amount received) with one unordered bulk write, then update the
+    running totals, closed monthly summaries and streaks once for the
+    whole batch. Returns one result per entry, in order, with a status of
+    "paid", "updated" (already paid; paid_date corrected, as mark_paid
+    does), "already_paid" (paid concurrently), "invalid", "duplicate",
+    "not_found" or "amount_mismatch".
+    """
+    results, pending, seen = [], {}, set()
+    for entry in entries:
+        result = {"contribution_id": entry["contribution_id"]}
+        results.append(result)
+        contribution_id = to_object_id(entry["contribution_id"])
+        if contribution_id is None:
+            result.update(status="invalid", detail="Invalid contribution ID")
+        elif not valid_date(entry["paid_date"]):
+            result.update(status="invalid", detail="paid_date must be YYYY-MM-DD")
+        elif contribution_id in seen:
+            result.update(status="duplicate", detail="Contribution appears earlier in the batch")
+        else:
+            seen.add(contribution_id)
+            pending[contribution_id] = (entry, result)
+
+    contributions = {
+        c["_id"]: c for c in contributions_collection.find(
+            {"_id": {"$in": list(pending)}}, {**PAID_FIELDS, "paid_date": 1}
+        )
+    } if pending else {}
+
+    # Tag the documents this batch paid, so a concurrent payment of the same
+    # contributions can't be counted twice
+    payment_ref = uuid.uuid4().hex
+    updates, newly_paid = [], []
+    for contribution_id, (entry, result) in pending.items():
+        contribution = contributions.get(contribution_id)
+        if contribution is None:
+            result.update(status="not_found", detail="Contribution not found")
+        elif entry.get("amount") is not None and \
+                abs(entry["amount"] - (contribution.get("amount") or 0)) > AMOUNT_TOLERANCE:
+            result.update(status="amount_mismatch",
+                          detail=f"Contribution amount is {contribution.get('amount') or 0}")
+        elif contribution.get("paid_date"):
+            updates.append(UpdateOne({"_id": contribution_id}, {"$set": {"paid_date": entry["paid_date"]}}))
+            result["status"] = "updated"
+        else:
+            updates.append(UpdateOne(
+                {"_id": contribution_id, "paid_date": UNPAID},
+                {"$set": {"paid_date": entry["paid_date"], "payment_ref": payment_ref}}
+            ))
+            newly_paid.append(contribution_id)
+            result["status"] = "paid"
+
+    if updates:
+        contributions_collection.bulk_write(updates, ordered=False)
+    if newly_paid:
+        paid = list(contributions_collection.find(paid_by_batch(newly_paid, payment_ref),
+                                                  {**PAID_FIELDS, "paid_date": 1}))
+        _record_paid(paid)
+        recorded = {c["_id"] for c in paid}
+        for contribution_id in newly_paid:
+            if contribution_id not in recorded:
+                pending[contribution_id][1]["status"] = "already_paid"
+    return results
+
+
+def get_fund_totals() -> dict:
+    """Current running totals (zeros before the first payment)"""
+    totals = fund_totals_collection.find_one({"_id": FUND_TOTALS_ID}) or {}
+    return {
+        "total_raised": totals.get("total_raised", 0),
+        "paid_count": totals.get("paid_count", 0),
+        "months": totals.get("months", {}),
+        "initiatives": totals.get("initiatives", {})
+    }
+
+
+def rebuild_fund_totals(database: Optional[Database] = None) -> dict:
+    """
+    Recompute fund_totals from the paid contributions, live and compacted,
+    and replace the document. Payments recorded while it runs may be lost,
+    so run it while the API is idle (scripts/rebuild_fund_totals.py).
+    """
+    database = database if database is not None else get_database()
+
+    months, total_raised, paid_count = {}, 0, 0
+    for collection in (database.contributions, database.contributions_archive):
+        for row in collection.aggregate(paid_by_month_pipeline()):
+            months[row["_id"]] = months.get(row["_id"], 0) + row["raised"]
+            total_raised += row["raised"]
+            paid_count += row["paid_count"]
+
+    document = {
+        "total_raised": total_raised,
+        "paid_count": paid_count,
+        "months": dict(sorted(months.items())),
+        "initiatives": {i["key"]: total_raised * i["share"] for i in INITIATIVES},
+        "updated_at": datetime.now(),
+        "rebuilt_at": datetime.now()
+    }
+    database.fund_totals.replace_one({"_id": FUND_TOTALS_ID}, document, upsert=True)
+    return document
@@ -0,0 +1,142 @@
+"""
+Login rate limiting.
+/auth/login runs a bcrypt verify for whoever posts, so a script hammering
+it can pin every core. Attempts are limited with token buckets per client
+IP and per email, checked before any database lookup or hashing; callers
+over the limit get 429 with Retry-After.
+
+Buckets live in a backend. The default LocalBackend keeps them in process
+memory, so each worker enforces its own limits; multi-worker deployments
+can plug in a shared store (Redis, memcached) with RATE_LIMIT_BACKEND set
+to "package.module:factory", where factory() returns an object with the
+same take() and reset() methods.
+"""
+from collections import OrderedDict
+from typing import Optional
+import importlib
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+
+from .metrics import login_rate_limited_total
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "")
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+# Burst size and sustained attempts per minute
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "2"))
+
+# Buckets kept by LocalBackend; the least recently used are dropped beyond this
+LOCAL_BACKEND_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class LocalBackend:
+    """
+    Token buckets in process memory (one set per worker)
+    """
+
+    def __init__(self, max_keys: int = LOCAL_BACKEND_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> [tokens, last update]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        """
+        Take one token from a bucket. Returns 0 when allowed, otherwise
+        the seconds until a token is available.
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * per_second)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / per_second if per_second > 0 else math.inf
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+def load_backend(path: str = RATE_LIMIT_BACKEND):
+    """Backend named by "package.module:factory", or LocalBackend when empty"""
+    if not path:
+        return LocalBackend()
+    module_name, _, factory = path.partition(":")
+    if not factory:
+        raise ValueError(f"RATE_LIMIT_BACKEND must look like 'package.module:factory', got '{path}'")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+class RateLimiter:
+    """
+    Named token-bucket rules (capacity, refills per minute) over a backend
+    """
+
+    def __init__(self, backend, rules: dict, enabled: bool = True):
+        self.backend = backend
+        self.rules = rules
+        self.enabled = enabled
+
+    def check(self, rule: str, value: str) -> None:
+        """Take a token for value under a rule; raises 429 when the bucket is empty"""
+        if not self.enabled or not value:
+            return
+        capacity, per_minute = self.rules[rule]
+        retry_after = self.backend.take(f"{rule}:{value}", capacity, per_minute / 60)
+        if retry_after:
+            login_rate_limited_total.inc(rule)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts; try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Client address, from X-Forwarded-For when the proxy is trusted"""
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        if forwarded.strip():
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+# Shared limiter for the password endpoints
+login_limiter = RateLimiter(
+    load_backend(),
+    rules={
+        "ip": (LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE),
+        "email": (LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE),
+    },
+    enabled=RATE_LIMIT_ENABLED
+)
+
+
+def limit_login(request: Request, email: Optional[str] = None) -> None:
+    """Apply the per-IP and (when given) per-email login limits; raises 429 when exceeded"""
+    login_limiter.check("ip", client_ip(request))
+    if email:
+        login_limiter.check("email", email.strip().lower())
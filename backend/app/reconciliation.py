@@ -0,0 +1,235 @@
+"""
+Bank statement reconciliation.
+Matches the credit rows of a bank CSV export to unpaid contributions by
+member reference (member ID or employee ID in the description), amount
+and date window. The statement is read row by row, the open
+contributions of the referenced members are loaded with one query into an
+in-memory hash index keyed by (member_id, amount), and every row is then
+matched with a dictionary lookup. Confirmed matches are recorded through
+payments.record_payment_batch, so the totals, summaries and streaks are
+updated once for the whole statement.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
+import os
+import re
+
+from .db import contributions_collection, members_collection
+from .streaks import UNPAID
+
+# Statements longer than this are rejected rather than half-processed
+MAX_STATEMENT_ROWS = int(os.getenv("RECONCILIATION_MAX_ROWS", "200000"))
+# A payment matches contributions due up to EARLY days after it or LATE days before it
+MATCH_DAYS_EARLY = int(os.getenv("RECONCILIATION_DAYS_EARLY", "15"))
+MATCH_DAYS_LATE = int(os.getenv("RECONCILIATION_DAYS_LATE", "60"))
+
+# Accepted header names (lowercased) for each column banks commonly export
+DATE_COLUMNS = ("date", "transaction date", "txn date", "value date", "posting date")
+AMOUNT_COLUMNS = ("amount", "credit", "credit amount", "deposit", "deposits")
+DEBIT_COLUMNS = ("debit", "debit amount", "withdrawal", "withdrawals")
+REFERENCE_COLUMNS = ("description", "reference", "narration", "details", "remarks", "particulars")
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d-%b-%Y")
+
+MEMBER_REFERENCE = re.compile(r"\bM\d{3,}\b", re.IGNORECASE)
+EMPLOYEE_REFERENCE = re.compile(r"\bEMP-[A-Z0-9]+-\d+\b", re.IGNORECASE)
+
+# Fields of open contributions the index needs
+OPEN_FIELDS = {"member_id": 1, "amount": 1, "due_date": 1}
+
+
+class StatementError(ValueError):
+    """The upload isn't a statement we can read (missing columns, too long)"""
+
+
+def _column(fieldnames: List[str], names: Tuple[str, ...]) -> Optional[str]:
+    by_name = {(field or "").strip().lower(): field for field in fieldnames}
+    return next((by_name[name] for name in names if name in by_name), None)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> Optional[str]:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value: str) -> Optional[str]:
+    """Statement date as YYYY-MM-DD; None when no known format fits"""
+    # Statements repeat a few hundred dates at most, so parse each once
+    return _parse_date((value or "").strip())
+
+
+def parse_amount(value: str) -> Optional[Decimal]:
+    """Amount with currency symbols and thousands separators removed"""
+    value = re.sub(r"[^\d.\-]", "", value or "")
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _cents(amount) -> int:
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+def read_statement(lines: Iterable[str]) -> Iterable[dict]:
+    """
+    Yield the rows of a CSV statement as dicts with line, date, amount
+    (a Decimal) and reference. Debits are skipped; rows whose date or
+    amount can't be read are yielded with an "error".
+    """
+    reader = csv.DictReader(lines)
+    fieldnames = reader.fieldnames or []
+    date_column = _column(fieldnames, DATE_COLUMNS)
+    amount_column = _column(fieldnames, AMOUNT_COLUMNS)
+    debit_column = _column(fieldnames, DEBIT_COLUMNS)
+    reference_column = _column(fieldnames, REFERENCE_COLUMNS)
+    missing = [name for name, column in (("date", date_column), ("amount", amount_column),
+                                         ("description", reference_column)) if column is None]
+    if missing:
+        raise StatementError(f"Statement has no {', '.join(missing)} column")
+
+    for count, row in enumerate(reader, start=1):
+        if count > MAX_STATEMENT_ROWS:
+            raise StatementError(f"Statement has more than {MAX_STATEMENT_ROWS} rows")
+        if debit_column and parse_amount(row.get(debit_column)):
+            continue
+        amount = parse_amount(row.get(amount_column))
+        if amount is not None and amount <= 0:
+            continue  # Single signed amount column: a debit
+        parsed = {
+            "line": reader.line_num,
+            "date": parse_date(row.get(date_column)),
+            "amount": amount,
+            "reference": (row.get(reference_column) or "").strip()
+        }
+        if parsed["date"] is None:
+            parsed["error"] = "Unreadable date"
+        elif amount is None:
+            parsed["error"] = "Unreadable amount"
+        yield parsed
+
+
+def _references(reference: str) -> Tuple[List[str], List[str]]:
+    """Member IDs and employee IDs mentioned in a description"""
+    return ([m.upper() for m in MEMBER_REFERENCE.findall(reference)],
+            [e.upper() for e in EMPLOYEE_REFERENCE.findall(reference)])
+
+
+def build_index(member_ids: Iterable[str]) -> Dict[Tuple[str, int], List[dict]]:
+    """Open contributions of the given members keyed by (member_id, amount in cents), oldest first"""
+    index = defaultdict(list)
+    member_ids = list(member_ids)
+    if not member_ids:
+        return index
+    cursor = contributions_collection.find(
+        {"member_id": {"$in": member_ids}, "paid_date": UNPAID}, OPEN_FIELDS
+    ).sort("due_date", 1)
+    for contribution in cursor:
+        index[(contribution["member_id"], _cents(contribution.get("amount") or 0))].append(contribution)
+    return index
+
+
+@lru_cache(maxsize=4096)
+def due_window(paid_date: str) -> Tuple[str, str]:
+    """Earliest and latest due_date a payment on paid_date can settle"""
+    paid = datetime.strptime(paid_date, "%Y-%m-%d")
+    return ((paid - timedelta(days=MATCH_DAYS_LATE)).strftime("%Y-%m-%d"),
+            (paid + timedelta(days=MATCH_DAYS_EARLY)).strftime("%Y-%m-%d"))
+
+
+def _row(row: dict, **fields) -> dict:
+    result = {"line": row["line"], "date": row["date"], "reference": row["reference"],
+              "amount": float(row["amount"]) if row["amount"] is not None else None}
+    result.update(fields)
+    return result
+
+
+def reconcile(lines: Iterable[str]) -> dict:
+    """
+    Match a statement to open contributions. Returns the matched rows (one
+    contribution each, with the statement date as paid_date), the
+    ambiguous rows (several contributions fit; their candidates are
+    listed) and the unmatched rows with a reason. A contribution is
+    matched to at most one row; rows are allocated in statement order.
+    """
+    rows = list(read_statement(lines))
+
+    # Employee IDs are only looked up for rows without a member ID
+    employee_ids = set()
+    for row in rows:
+        row["member_ids"], row["employee_ids"] = _references(row["reference"])
+        if not row["member_ids"]:
+            employee_ids.update(row["employee_ids"])
+
+    members_by_employee = {}
+    if employee_ids:
+        members_by_employee = {
+            m["employee_id"].upper(): m["member_id"] for m in members_collection.find(
+                {"employee_id": {"$in": sorted(employee_ids)}}, {"_id": 0, "member_id": 1, "employee_id": 1}
+            ) if m.get("employee_id")
+        }
+    for row in rows:
+        resolved = row["member_ids"] or [members_by_employee[e] for e in row["employee_ids"]
+                                         if e in members_by_employee]
+        row["member_id"] = resolved[0] if len(set(resolved)) == 1 else None
+        row["several_members"] = len(set(resolved)) > 1
+
+    index = build_index({row["member_id"] for row in rows if row["member_id"]})
+
+    matched, ambiguous, unmatched = [], [], []
+    used = set()
+    for row in rows:
+        if row.get("error"):
+            unmatched.append(_row(row, reason="invalid", detail=row["error"]))
+            continue
+        if row["several_members"]:
+            unmatched.append(_row(row, reason="several_members", detail="Description names more than one member"))
+            continue
+        if row["member_id"] is None:
+            unmatched.append(_row(row, reason="no_reference", detail="No known member or employee ID in the description"))
+            continue
+
+        open_contributions = index.get((row["member_id"], _cents(row["amount"])))
+        if not open_contributions:
+            unmatched.append(_row(row, member_id=row["member_id"], reason="no_open_contribution",
+                                  detail="Member has no unpaid contribution of this amount"))
+            continue
+        earliest, latest = due_window(row["date"])
+        candidates = [c for c in open_contributions
+                      if c["_id"] not in used and earliest <= c["due_date"] <= latest]
+        if not candidates:
+            unmatched.append(_row(row, member_id=row["member_id"], reason="outside_window",
+                                  detail="No unpaid contribution of this amount is due near the payment date"))
+        elif len(candidates) == 1:
+            contribution = candidates[0]
+            used.add(contribution["_id"])
+            matched.append(_row(row, member_id=row["member_id"], contribution_id=str(contribution["_id"]),
+                                due_date=contribution["due_date"], paid_date=row["date"]))
+        else:
+            ambiguous.append(_row(row, member_id=row["member_id"], paid_date=row["date"], candidates=[
+                {"contribution_id": str(c["_id"]), "due_date": c["due_date"]} for c in candidates
+            ]))
+
+    return {
+        "rows": len(rows),
+        "matched": matched,
+        "ambiguous": ambiguous,
+        "unmatched": unmatched
+    }
+
+
+def confirmed_payments(matched: List[dict]) -> List[dict]:
+    """record_payment_batch entries for matched rows"""
+    return [{"contribution_id": m["contribution_id"], "paid_date": m["paid_date"], "amount": m["amount"]}
+            for m in matched]
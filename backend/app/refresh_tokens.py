@@ -0,0 +1,88 @@
+"""
+Rotating refresh tokens.
+Login hands out a short-lived JWT access token and an opaque refresh
+token. POST /auth/refresh trades the refresh token for a new pair without
+a password check, so clients stay signed in without another bcrypt
+verify every ACCESS_TOKEN_EXPIRE_MINUTES.
+
+Only a SHA-256 hash of each token is stored, with a TTL index on its
+expiry. Every refresh rotates the token; presenting a token that was
+already rotated means it leaked, and revokes every token descended from
+the same login. Changing the password revokes all of a user's tokens.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import hashlib
+import os
+import secrets
+import uuid
+
+from .db import refresh_tokens_collection
+from .dependencies import find_user
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# A rotated token presented again within this window is a client race
+# (two tabs refreshing at once), not a stolen token
+REFRESH_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "10"))
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_refresh_token(email: str, role: str, family: Optional[str] = None) -> str:
+    """Create a refresh token for a user; family links the tokens of one login"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    refresh_tokens_collection.insert_one({
+        "_id": _hash(token),
+        "email": email,
+        "role": role,
+        "family": family or uuid.uuid4().hex,
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "rotated_at": None
+    })
+    return token
+
+
+def rotate_refresh_token(token: str) -> Optional[Tuple[dict, str]]:
+    """
+    Exchange a refresh token for a new one. Returns the record of the old
+    token (email and the account's current role) and the new token, or
+    None when the token is unknown, expired or already used, or the
+    account no longer exists.
+    """
+    now = datetime.utcnow()
+    record = refresh_tokens_collection.find_one_and_update(
+        {"_id": _hash(token), "rotated_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"rotated_at": now}}
+    )
+    if record is None:
+        reused = refresh_tokens_collection.find_one({"_id": _hash(token), "rotated_at": {"$ne": None}})
+        if reused and now - reused["rotated_at"] > timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS):
+            refresh_tokens_collection.delete_many({"family": reused["family"]})
+        return None
+
+    user = find_user(record["email"])
+    if user is None:
+        # The account was deleted; none of its tokens may be used again
+        revoke_user_tokens(record["email"])
+        return None
+
+    role = user.get("role", "member")
+    return {**record, "role": role}, issue_refresh_token(record["email"], role, record["family"])
+
+
+def revoke_refresh_token(token: str) -> bool:
+    """Revoke a token and every token of the same login (logout)"""
+    record = refresh_tokens_collection.find_one({"_id": _hash(token)}, {"family": 1})
+    if record is None:
+        return False
+    refresh_tokens_collection.delete_many({"family": record["family"]})
+    return True
+
+
+def revoke_user_tokens(email: str) -> int:
+    """Revoke all of a user's refresh tokens; returns how many"""
+    return refresh_tokens_collection.delete_many({"email": email}).deleted_count
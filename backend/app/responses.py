@@ -0,0 +1,59 @@
+"""
+Fast JSON responses for large list endpoints.
+Serializes with orjson when it is installed (native datetime support,
+ObjectId rendered as strings) and falls back to the standard library.
+Returning FastJSONResponse directly from an endpoint also skips FastAPI's
+jsonable_encoder pass, which dominates on lists of thousands of dicts.
+"""
+from datetime import date, datetime
+from typing import Any
+import json
+import os
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+# Set FAST_JSON_RESPONSES=false to force the standard library encoder
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true" and orjson is not None
+
+# Compress responses larger than this many bytes
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+
+
+def _default(value: Any) -> Any:
+    """Encode types neither orjson nor json handle natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes using the fastest available encoder"""
+    if FAST_JSON_ENABLED:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
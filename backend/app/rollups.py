@@ -0,0 +1,150 @@
+"""
+Monthly summary rollups for trend analytics.
+Closing a month freezes its contribution aggregates into one
+monthly_summary document, so trends over any number of months read that
+many small documents instead of scanning the contributions. Payments
+recorded later for a closed month are added to its summary as they come in.
+"""
+from datetime import datetime
+from typing import List, Optional
+import logging
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from .db import get_database, monthly_summary_collection
+from .aggregations import monthly_summary_pipeline
+from .utilities import calculate_delay_days
+
+logger = logging.getLogger(__name__)
+
+
+def next_month(month: str) -> str:
+    """The month after a YYYY-MM month"""
+    year, number = (int(p) for p in month.split("-"))
+    return f"{year + number // 12}-{number % 12 + 1:02d}"
+
+
+def previous_month(month: str) -> str:
+    """The month before a YYYY-MM month"""
+    year, number = (int(p) for p in month.split("-"))
+    return f"{year - 1}-12" if number == 1 else f"{year}-{number - 1:02d}"
+
+
+def current_month() -> str:
+    return datetime.now().strftime("%Y-%m")
+
+
+class CompactedMonthError(ValueError):
+    """The month's paid contributions were moved to contributions_archive"""
+
+
+def close_month(month: str, database: Optional[Database] = None) -> dict:
+    """
+    Compute and store the summary of contributions due in month (YYYY-MM).
+    Closing an already closed month recomputes it from the contributions.
+    Raises CompactedMonthError for a month with compacted contributions:
+    its paid ones are no longer in contributions, so a recompute would
+    overwrite the frozen summary with the unpaid ones only.
+    """
+    database = database if database is not None else get_database()
+    if database.contributions_archive.find_one(
+        {"due_date": {"$gte": f"{month}-01", "$lt": f"{next_month(month)}-01"}}, {"_id": 1}
+    ):
+        raise CompactedMonthError(f"{month} has compacted contributions; its summary is kept")
+    facets = next(database.contributions.aggregate(monthly_summary_pipeline(month, next_month(month))))
+
+    totals = facets["month"][0] if facets["month"] else {}
+    summary = {
+        "contribution_count": totals.get("contribution_count", 0),
+        "expected": totals.get("expected", 0),
+        "collected": totals.get("collected", 0),
+        "paid_count": totals.get("paid_count", 0),
+        "late_count": totals.get("late_count", 0),
+        "delay_total": totals.get("delay_total", 0),
+        # Frozen at close: later payments don't reclassify members
+        "high_risk_count": facets["high_risk"][0]["count"] if facets["high_risk"] else 0,
+        "late_payments_after_close": 0,
+        "closed": True,
+        "closed_at": datetime.now()
+    }
+    database.monthly_summary.replace_one({"_id": month}, summary, upsert=True)
+    return {"month": month, **summary}
+
+
+def close_pending_months(database: Optional[Database] = None) -> List[str]:
+    """
+    Close every month since the last closed one, up to the previous month.
+    With no closed months yet only the previous month is closed; use
+    scripts/close_months.py --all to backfill history.
+    """
+    database = database if database is not None else get_database()
+    last_month = previous_month(current_month())
+
+    latest = database.monthly_summary.find_one({"closed": True}, {"_id": 1}, sort=[("_id", -1)])
+    month = next_month(latest["_id"]) if latest else last_month
+
+    closed = []
+    while month <= last_month:
+        try:
+            close_month(month, database)
+            closed.append(month)
+        except CompactedMonthError as e:
+            logger.warning(str(e))
+        month = next_month(month)
+
+    if closed:
+        logger.info(f"Closed monthly summaries: {', '.join(closed)}")
+    return closed
+
+
+def add_late_payments(paid: list, paid_date: Optional[str] = None) -> None:
+    """
+    Add newly paid contributions (amount and due_date) to the summaries of
+    their months if those are already closed; open months are unaffected.
+    Without paid_date each contribution carries its own.
+    """
+    this_month = current_month()
+    increments = {}
+    for contribution in paid:
+        month = contribution["due_date"][:7]
+        if month >= this_month:
+            continue  # Not closed yet
+        delay = calculate_delay_days(contribution["due_date"], paid_date or contribution["paid_date"])
+        inc = increments.setdefault(month, {
+            "collected": 0, "paid_count": 0, "late_count": 0, "delay_total": 0,
+            "late_payments_after_close": 0
+        })
+        inc["collected"] += contribution.get("amount") or 0
+        inc["paid_count"] += 1
+        inc["late_count"] += 1 if delay > 0 else 0
+        inc["delay_total"] += delay
+        inc["late_payments_after_close"] += 1
+
+    if increments:
+        monthly_summary_collection.bulk_write([
+            UpdateOne({"_id": month, "closed": True}, {"$inc": inc})
+            for month, inc in increments.items()
+        ], ordered=False)
+
+
+def get_trends(months: int) -> List[dict]:
+    """The latest `months` closed monthly summaries, oldest first"""
+    summaries = list(monthly_summary_collection.find({"closed": True}).sort("_id", -1).limit(months))
+
+    trends = []
+    for summary in reversed(summaries):
+        expected, paid_count = summary["expected"], summary["paid_count"]
+        trends.append({
+            "month": summary["_id"],
+            "expected": round(expected, 2),
+            "collected": round(summary["collected"], 2),
+            "collection_rate": round(summary["collected"] / expected * 100, 1) if expected else 0.0,
+            "contribution_count": summary["contribution_count"],
+            "paid_count": paid_count,
+            "late_count": summary["late_count"],
+            "avg_delay_days": round(summary["delay_total"] / paid_count, 1) if paid_count else 0.0,
+            "high_risk_count": summary["high_risk_count"],
+            "late_payments_after_close": summary.get("late_payments_after_close", 0)
+        })
+    return trends
@@ -2,22 +2,21 @@
 Admin routes for the Contribution Tracking API.
 Handles admin dashboard, member management, ticket management, and notifications.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from datetime import datetime
 from typing import Optional
 
 from ..db import (
     members_collection,
     contributions_collection,
-    notifications_collection,
+    contribution_summaries_collection,
     tickets_collection,
     admins_collection
 )
 from ..models import MemberCreate
-from ..dependencies import require_admin
+from ..dependencies import analytics_reads, require_admin
 from ..utilities import (
-    calculate_delay_days,
-    classify_member,
+    contribution_stats,
     validate_phone,
     validate_email,
     generate_employee_id,
@@ -26,9 +25,24 @@ from ..utilities import (
 )
 from ..intelligence import IntelligenceEngine
 from ..notifications import notification_engine
+from ..aggregations import compacted_totals_pipeline, dashboard_stats_pipeline
+from ..cache import response_cache, cached
+from ..responses import FastJSONResponse
+from ..versions import bump_versions, conditional_get
+from ..search import MIN_QUERY_LENGTH, search_members, with_search_fields
+from ..notification_history import get_notification_summary, recent_notifications, record_notification
+from ..idempotency import IdempotencyKey, claim, idempotency_key, idempotent, release
 
 router = APIRouter()
 
+# Dashboard.jsx polls the stats endpoint; serve repeated refreshes from cache
+DASHBOARD_STATS_TTL_SECONDS = 15
+
+MAX_SEARCH_PAGE_SIZE = 50
+
+# Claimed per month while contributions are generated (app/idempotency.py)
+GENERATION_SCOPE = "contributions:generate"
+
 
 from ..auth import get_password_hash
 
@@ -81,7 +95,8 @@ async def register_member_admin(member: MemberCreate, admin: dict = Depends(requ
         }
     }
     
-    members_collection.insert_one(member_data)
+    members_collection.insert_one(with_search_fields(member_data))
+    bump_versions("members")
     return {
         "status": "success",
         "message": "Member registered with default password 'pass123'",
@@ -92,29 +107,19 @@ async def register_member_admin(member: MemberCreate, admin: dict = Depends(requ
 
 
 @router.get("/members")
-async def get_all_members_admin(admin: dict = Depends(require_admin)):
+async def get_all_members_admin(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
     """Admin: Get all members with statistics"""
     members = []
     
     for member in members_collection.find():
         contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
-        
-        total_contributions = len(contributions)
-        paid_count = sum(1 for c in contributions if c.get("paid_date"))
-        missed_count = total_contributions - paid_count
-        
-        delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                  for c in contributions if c.get("paid_date")]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        
-        unpaid_contributions = [c for c in contributions if not c.get("paid_date")]
-        current_delay = max([calculate_delay_days(c["due_date"]) 
-                           for c in unpaid_contributions], default=0)
-        
-        classification = classify_member(missed_count, avg_delay)
+        stats = contribution_stats(contributions, member.get("compacted"))
         
         # Determine priority for proactive fund collection
-        priority = "Early Reminder" if classification == "High-risk Delay" else "Normal"
+        priority = "Early Reminder" if stats["classification"] == "High-risk Delay" else "Normal"
         
         members.append({
             "member_id": member["member_id"],
@@ -124,16 +129,16 @@ async def get_all_members_admin(admin: dict = Depends(require_admin)):
             "email": member.get("email"),
             "monthly_amount": member["monthly_amount"],
             "due_day": member["due_day"],
-            "total_contributions": total_contributions,
-            "paid_count": paid_count,
-            "missed_count": missed_count,
-            "avg_delay_days": round(avg_delay, 1),
-            "current_delay_days": current_delay,
-            "classification": classification,
+            "total_contributions": stats["total_contributions"],
+            "paid_count": stats["paid_count"],
+            "missed_count": stats["missed_count"],
+            "avg_delay_days": round(stats["avg_delay"], 1),
+            "current_delay_days": stats["current_delay"],
+            "classification": stats["classification"],
             "priority": priority,
             "active": True
         })
-    return members
+    return FastJSONResponse(members)
 
 
 @router.patch("/members/{member_id}/payment-settings")
@@ -158,6 +163,7 @@ async def update_member_payment_settings(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Member not found")
     
+    bump_versions("members")
     return {
         "status": "success",
         "message": "Payment settings updated",
@@ -170,7 +176,8 @@ async def update_member_payment_settings(
 @router.get("/tickets")
 async def get_all_tickets_admin(
     status_filter: Optional[str] = None,
-    admin: dict = Depends(require_admin)
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("tickets", "members"))
 ):
     """Admin: Get all tickets with optional status filter"""
     query = {}
@@ -197,7 +204,7 @@ async def get_all_tickets_admin(
             "admin_response": t.get("admin_response")
         })
     
-    return result
+    return FastJSONResponse(result)
 
 
 @router.patch("/{ticket_id}")
@@ -232,6 +239,9 @@ async def update_ticket_status(
             {"member_id": ticket["member_id"]},
             {"$set": update_field}
         )
+        bump_versions("tickets", "members")
+    else:
+        bump_versions("tickets")
     
     return {
         "status": "success",
@@ -240,6 +250,28 @@ async def update_ticket_status(
     }
 
 
+def _member_summary(member: dict, contributions: list) -> dict:
+    """Profile and payment statistics shown in admin search results"""
+    stats = contribution_stats(contributions, member.get("compacted"))
+    
+    return {
+        "member_id": member["member_id"],
+        "employee_id": member.get("employee_id", "N/A"),
+        "name": member["name"],
+        "phone": member["phone"],
+        "email": member.get("email"),
+        "monthly_amount": member["monthly_amount"],
+        "due_day": member["due_day"],
+        "total_contributions": stats["total_contributions"],
+        "paid_count": stats["paid_count"],
+        "missed_count": stats["missed_count"],
+        "avg_delay_days": round(stats["avg_delay"], 1),
+        "current_delay_days": stats["current_delay"],
+        "classification": stats["classification"],
+        "status": "Active"
+    }
+
+
 @router.get("/search")
 async def search_members_by_employee_id(
     employee_id: str,
@@ -252,91 +284,103 @@ async def search_members_by_employee_id(
         raise HTTPException(status_code=404, detail="Member not found")
     
     contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
-    total_contributions = len(contributions)
-    paid_count = sum(1 for c in contributions if c.get("paid_date"))
-    missed_count = total_contributions - paid_count
-    
-    delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-              for c in contributions if c.get("paid_date")]
-    avg_delay = sum(delays) / len(delays) if delays else 0
-    
-    unpaid_contributions = [c for c in contributions if not c.get("paid_date")]
-    current_delay = max([calculate_delay_days(c["due_date"]) 
-                       for c in unpaid_contributions], default=0)
-    
-    classification = classify_member(missed_count, avg_delay)
-    
-    return {
-        "member_id": member["member_id"],
-        "employee_id": member.get("employee_id", "N/A"),
-        "name": member["name"],
-        "phone": member["phone"],
-        "email": member.get("email"),
-        "monthly_amount": member["monthly_amount"],
-        "due_day": member["due_day"],
-        "total_contributions": total_contributions,
-        "paid_count": paid_count,
-        "missed_count": missed_count,
-        "avg_delay_days": round(avg_delay, 1),
-        "current_delay_days": current_delay,
-        "classification": classification,
-        "status": "Active"
-    }
+    return _member_summary(member, contributions)
 
 
-@router.get("/dashboard/stats")
-async def get_dashboard_stats_admin(admin: dict = Depends(require_admin)):
+@router.get("/members/search")
+async def search_members_admin(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
+    """Admin: Ranked prefix and fuzzy search over member name, phone, email and IDs"""
+    found = await search_members(q, page, page_size)
+    
+    # Statistics for the page's members in one query
+    member_ids = [m["member_id"] for m in found["results"]]
+    by_member = {member_id: [] for member_id in member_ids}
+    for c in contributions_collection.find(
+        {"member_id": {"$in": member_ids}},
+        {"_id": 0, "member_id": 1, "due_date": 1, "paid_date": 1}
+    ):
+        by_member[c["member_id"]].append(c)
+    
+    found["results"] = [
+        {**_member_summary(m, by_member[m["member_id"]]), "score": m["score"], "match": m["match"]}
+        for m in found["results"]
+    ]
+    return FastJSONResponse(found)
+
+
+@router.get("/dashboard/stats", dependencies=[Depends(analytics_reads)])
+@cached("admin:dashboard_stats", ttl=DASHBOARD_STATS_TTL_SECONDS, tags=("members", "contributions"))
+async def get_dashboard_stats_admin(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
     """Admin: Dashboard statistics with predictions"""
     total_members = members_collection.count_documents({})
     
-    all_contributions = list(contributions_collection.find())
-    total_contributions = len(all_contributions)
-    paid_contributions = sum(1 for c in all_contributions if c.get("paid_date"))
-    unpaid_contributions = total_contributions - paid_contributions
+    # Totals, current month and high-risk count in one round trip
+    current_month = datetime.now().strftime("%Y-%m")
+    facets = next(contributions_collection.aggregate(dashboard_stats_pipeline(current_month)))
     
-    total_collected = sum((c.get("amount") or 0) for c in all_contributions if c.get("paid_date"))
-    total_pending = sum((c.get("amount") or 0) for c in all_contributions if not c.get("paid_date"))
+    totals = facets["totals"][0] if facets["totals"] else {}
+    monthly = facets["current_month"][0] if facets["current_month"] else {}
+    high_risk_count = facets["high_risk"][0]["count"] if facets["high_risk"] else 0
     
-    # Current month
-    current_month = datetime.now().strftime("%Y-%m")
-    monthly_contributions = [c for c in all_contributions if c["due_date"].startswith(current_month)]
-    monthly_paid = sum(1 for c in monthly_contributions if c.get("paid_date"))
-    monthly_collected = sum((c.get("amount") or 0) for c in monthly_contributions if c.get("paid_date"))
+    # Compacted contributions are all paid
+    compacted = next(contribution_summaries_collection.aggregate(compacted_totals_pipeline()), {})
     
-    # High-risk count
-    high_risk_count = 0
-    for member in members_collection.find():
-        contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
-        missed_count = sum(1 for c in contributions if not c.get("paid_date"))
-        delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                  for c in contributions if c.get("paid_date")]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        
-        if classify_member(missed_count, avg_delay) == "High-risk Delay":
-            high_risk_count += 1
+    total_contributions = totals.get("total_contributions", 0) + compacted.get("total_contributions", 0)
+    paid_contributions = totals.get("paid_contributions", 0) + compacted.get("paid_contributions", 0)
+    total_collected = totals.get("total_collected", 0) + compacted.get("total_collected", 0)
     
     return {
         "total_members": total_members,
         "total_contributions": total_contributions,
         "paid_contributions": paid_contributions,
-        "unpaid_contributions": unpaid_contributions,
+        "unpaid_contributions": total_contributions - paid_contributions,
         "total_collected": round(total_collected, 2),
-        "total_pending": round(total_pending, 2),
+        "total_pending": round(totals.get("total_pending", 0), 2),
         "current_month": {
             "month": current_month,
-            "total_contributions": len(monthly_contributions),
-            "paid_contributions": monthly_paid,
-            "collected_amount": round(monthly_collected, 2)
+            "total_contributions": monthly.get("total_contributions", 0),
+            "paid_contributions": monthly.get("paid_contributions", 0),
+            "collected_amount": round(monthly.get("collected_amount", 0), 2)
         },
         "high_risk_members": high_risk_count
     }
 
 
+@router.get("/cache/stats")
+async def get_cache_stats(admin: dict = Depends(require_admin)):
+    """Admin: Response cache hit/miss counters"""
+    return response_cache.stats()
+
+
 from pydantic import BaseModel
 
 class ReminderRequest(BaseModel):
     custom_message: Optional[str] = None
 
+# Registered before /reminders/{member_id} so "trigger" isn't taken for a member id
+@router.post("/reminders/trigger")
+async def trigger_reminder_check(admin: dict = Depends(require_admin)):
+    """Manually trigger the automated reminder check (for testing/immediate execution)"""
+    from ..scheduler import check_and_send_reminders
+    
+    result = await check_and_send_reminders()
+    
+    return {
+        "message": "Reminder check triggered manually",
+        "result": result,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @router.post("/reminders/{member_id}")
 async def send_manual_reminder(member_id: str, request: ReminderRequest = None, admin: dict = Depends(require_admin)):
     """Admin: Manually send reminder to a member (optionally with custom message)"""
@@ -371,11 +415,7 @@ async def send_manual_reminder(member_id: str, request: ReminderRequest = None,
              return {"status": "info", "message": "No unpaid contributions to generate reminder for"}
 
         prediction = IntelligenceEngine.predict_delay_likelihood(contributions, member)
-        missed_count = len(unpaid)
-        delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                  for c in contributions if c.get("paid_date")]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        classification = classify_member(missed_count, avg_delay)
+        classification = contribution_stats(contributions, member.get("compacted"))["classification"]
         
         days_until = (due_date_obj - datetime.now()).days
         
@@ -384,7 +424,7 @@ async def send_manual_reminder(member_id: str, request: ReminderRequest = None,
         )
     
     # Always create a dashboard notification
-    notifications_collection.insert_one({
+    record_notification({
         "member_id": member_id,
         "notification_type": "reminder",
         "sent_at": datetime.now(),
@@ -414,14 +454,17 @@ async def send_manual_reminder(member_id: str, request: ReminderRequest = None,
 
 
 @router.post("/contributions/generate")
-async def generate_monthly_contributions(admin: dict = Depends(require_admin)):
+@idempotent
+async def generate_monthly_contributions(
+    admin: dict = Depends(require_admin),
+    idempotency: Optional[IdempotencyKey] = Depends(idempotency_key)
+):
     """
     Generate monthly contributions for all members
     This creates contribution records for the current month if they don't exist yet
     Now also sends automated reminder emails with statistics to all members!
     """
     from datetime import datetime
-    from ..utilities import calculate_delay_days, classify_member
     from ..intelligence import IntelligenceEngine
     from ..notifications import notification_engine
     import calendar
@@ -433,42 +476,56 @@ async def generate_monthly_contributions(admin: dict = Depends(require_admin)):
     # Calculate due date (10th of current month)
     due_date = f"{now.year}-{now.month:02d}-10"
     
-    # Check if contributions for this month already exist
-    existing_count = contributions_collection.count_documents({"month": current_month})
-    
-    if existing_count > 0:
+    # Only one admin generates a month at a time; without the claim two
+    # concurrent requests could both pass the existing_count check
+    if claim(GENERATION_SCOPE, current_month) is not None:
         return {
-            "status": "already_exists",
-            "message": f"Contributions for {current_month} already exist ({existing_count} contributions)",
+            "status": "in_progress",
+            "message": f"Contributions for {current_month} are being generated by another request",
             "month": current_month,
             "due_date": due_date
         }
     
-    # Get all members (exclude admins)
-    members = list(members_collection.find({"role": "member"}))
-    
-    if not members:
-        return {
-            "status": "no_members",
-            "message": "No members found to generate contributions for",
-            "month": current_month
-        }
-    
-    # Create contributions
-    contributions_to_insert = []
-    for member in members:
-        contribution = {
-            "member_id": member["member_id"],
-            "due_date": due_date,
-            "amount": member.get("monthly_amount", 500),  # Use member's monthly_amount or default to 500
-            "paid_date": None,
-            "month": current_month,  # For easy querying
-            "status": "pending"
-        }
-        contributions_to_insert.append(contribution)
-    
-    # Insert all contributions
-    result = contributions_collection.insert_many(contributions_to_insert)
+    try:
+        # Check if contributions for this month already exist
+        existing_count = contributions_collection.count_documents({"month": current_month})
+        
+        if existing_count > 0:
+            return {
+                "status": "already_exists",
+                "message": f"Contributions for {current_month} already exist ({existing_count} contributions)",
+                "month": current_month,
+                "due_date": due_date
+            }
+        
+        # Get all members (exclude admins)
+        members = list(members_collection.find({"role": "member"}))
+        
+        if not members:
+            return {
+                "status": "no_members",
+                "message": "No members found to generate contributions for",
+                "month": current_month
+            }
+        
+        # Create contributions
+        contributions_to_insert = []
+        for member in members:
+            contribution = {
+                "member_id": member["member_id"],
+                "due_date": due_date,
+                "amount": member.get("monthly_amount", 500),  # Use member's monthly_amount or default to 500
+                "paid_date": None,
+                "month": current_month,  # For easy querying
+                "status": "pending"
+            }
+            contributions_to_insert.append(contribution)
+        
+        # Insert all contributions
+        result = contributions_collection.insert_many(contributions_to_insert)
+    finally:
+        release(GENERATION_SCOPE, current_month)
+    bump_versions("contributions")
     
     # 📧 NEW: Send automated reminder emails to all members with statistics
     emails_sent = 0
@@ -482,15 +539,11 @@ async def generate_monthly_contributions(admin: dict = Depends(require_admin)):
             
             # Calculate member's statistics
             all_contributions = list(contributions_collection.find({"member_id": member_id}))
-            total_contributions = len(all_contributions)
-            paid_count = sum(1 for c in all_contributions if c.get("paid_date"))
-            missed_count = total_contributions - paid_count
-            
-            # Calculate classification
-            delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                     for c in all_contributions if c.get("paid_date")]
-            avg_delay = sum(delays) / len(delays) if delays else 0
-            classification = classify_member(missed_count, avg_delay)
+            stats = contribution_stats(all_contributions, member.get("compacted"))
+            total_contributions = stats["total_contributions"]
+            paid_count = stats["paid_count"]
+            missed_count = stats["missed_count"]
+            classification = stats["classification"]
             
             # Calculate days until due
             due_date_obj = datetime.strptime(due_date, "%Y-%m-%d")
@@ -598,44 +651,29 @@ async def get_reminder_schedule(admin: dict = Depends(require_admin)):
 
 
 
-@router.post("/reminders/trigger")
-async def trigger_reminder_check(admin: dict = Depends(require_admin)):
-    """Manually trigger the automated reminder check (for testing/immediate execution)"""
-    from ..scheduler import check_and_send_reminders
-    
-    result = await check_and_send_reminders()
-    
-    return {
-        "message": "Reminder check triggered manually",
-        "result": result,
-        "timestamp": datetime.now().isoformat()
-    }
-
-
-@router.get("/reminders/history")
-async def get_reminder_history(limit: int = 50, admin: dict = Depends(require_admin)):
-    """Get recent automated reminder sending history"""
-    
-    # Get recent reminders from notifications collection
-    reminders = list(notifications_collection.find(
-        {"notification_type": "reminder"},
-        {"_id": 0}
-    ).sort("sent_at", -1).limit(limit))
-    
-    # Convert datetime objects to ISO strings for JSON serialization
-    for reminder in reminders:
-        if isinstance(reminder.get("sent_at"), datetime):
-            reminder["sent_at"] = reminder["sent_at"].isoformat()
+@router.get("/reminders/history", dependencies=[Depends(analytics_reads)])
+async def get_reminder_history(
+    limit: int = 50,
+    member_id: Optional[str] = None,
+    include_archive: bool = False,
+    admin: dict = Depends(require_admin)
+):
+    """Get recent automated reminder sending history, optionally for one member and including archived reminders"""
+    query = {"notification_type": "reminder"}
+    if member_id:
+        query["member_id"] = member_id
+    reminders = recent_notifications(query, limit, include_archive)
     
     # Calculate statistics
     high_risk_count = sum(1 for r in reminders if r.get("priority") == "Early Reminder")
     regular_count = sum(1 for r in reminders if r.get("priority") == "Normal")
     
-    return {
+    return FastJSONResponse({
         "total": len(reminders),
         "statistics": {
             "high_risk_reminders": high_risk_count,
             "regular_reminders": regular_count
         },
-        "reminders": reminders
-    }
+        "reminders": reminders,
+        **({"member_summary": get_notification_summary(member_id)} if member_id else {})
+    })
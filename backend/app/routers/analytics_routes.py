@@ -0,0 +1,138 @@
+"""
+Analytics routes for the Contribution Tracking API.
+Community-wide reports computed by server-side aggregations (see
+aggregations.py) or served from precomputed rollups.
+"""
+from fastapi import APIRouter, Depends, Query
+
+from ..db import contributions_collection
+from ..dependencies import analytics_reads, require_admin
+from ..aggregations import (
+    DELAY_BUCKETS,
+    delay_histogram_pipeline,
+    due_day_cohort_pipeline,
+    join_month_cohort_pipeline,
+    payment_pattern_pipeline,
+)
+from ..cache import cached
+from ..rollups import get_trends
+from ..versions import conditional_get
+
+# Analytics: read from secondaries
+router = APIRouter(dependencies=[Depends(analytics_reads)])
+
+MAX_TREND_MONTHS = 120
+ANALYTICS_TTL_SECONDS = 300
+
+
+def _bucket_label(lower: int, upper) -> str:
+    if upper is None:
+        return f"{lower}+"
+    if upper - lower == 1:
+        return str(lower)
+    return f"{lower}-{upper - 1}"
+
+
+def _cohort(row: dict) -> dict:
+    """Collection totals of one cohort with its collection rate"""
+    expected = row["expected"]
+    return {
+        "contribution_count": row["contribution_count"],
+        "paid_count": row["paid_count"],
+        "expected": round(expected, 2),
+        "collected": round(row["collected"], 2),
+        "collection_rate": round(row["collected"] / expected * 100, 1) if expected else 0.0
+    }
+
+
+@router.get("/delay-distribution")
+@cached("analytics:delay_distribution", ttl=ANALYTICS_TTL_SECONDS, tags=("contributions",))
+async def get_delay_distribution(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("contributions"))
+):
+    """Admin: Histogram of payment delays (days late) across all paid contributions"""
+    counts = {row["_id"]: row for row in contributions_collection.aggregate(delay_histogram_pipeline())}
+
+    bounds = list(zip(DELAY_BUCKETS, DELAY_BUCKETS[1:] + [None]))
+    buckets = []
+    for lower, upper in bounds:
+        row = counts.get(lower if upper is not None else "overflow", {})
+        buckets.append({
+            "label": _bucket_label(lower, upper),
+            "min_days": lower,
+            "max_days": upper - 1 if upper is not None else None,
+            "count": row.get("count", 0),
+            "amount": round(row.get("amount", 0), 2)
+        })
+
+    return {
+        "total_paid": sum(b["count"] for b in buckets),
+        "buckets": buckets
+    }
+
+
+@router.get("/cohorts/due-day")
+@cached("analytics:due_day_cohorts", ttl=ANALYTICS_TTL_SECONDS, tags=("contributions",))
+async def get_due_day_cohorts(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("contributions"))
+):
+    """Admin: Collection rate by the day of month contributions are due"""
+    return [
+        {"due_day": row["_id"], **_cohort(row)}
+        for row in contributions_collection.aggregate(due_day_cohort_pipeline())
+    ]
+
+
+@router.get("/cohorts/join-month")
+@cached("analytics:join_month_cohorts", ttl=ANALYTICS_TTL_SECONDS, tags=("contributions",))
+async def get_join_month_cohorts(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("contributions"))
+):
+    """Admin: Collection rate by the month members made their first contribution"""
+    return [
+        {"join_month": row["_id"], "members": row["members"], **_cohort(row)}
+        for row in contributions_collection.aggregate(join_month_cohort_pipeline())
+    ]
+
+
+@router.get("/patterns")
+@cached("analytics:payment_patterns", ttl=ANALYTICS_TTL_SECONDS, tags=("contributions",))
+async def get_payment_pattern_distribution(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("contributions"))
+):
+    """Admin: Members per payment pattern (as in member insights) and consistency"""
+    patterns = {}
+    total_members = 0
+    for row in contributions_collection.aggregate(payment_pattern_pipeline()):
+        pattern = row["_id"]["pattern"]
+        entry = patterns.setdefault(pattern, {"pattern": pattern, "members": 0, "consistency": {}})
+        entry["members"] += row["members"]
+        total_members += row["members"]
+        # Members without payments have no payment days to judge
+        if pattern != "No payments yet":
+            consistency = row["_id"]["consistency"]
+            entry["consistency"][consistency] = entry["consistency"].get(consistency, 0) + row["members"]
+
+    distribution = sorted(patterns.values(), key=lambda p: p["members"], reverse=True)
+    for entry in distribution:
+        entry["percentage"] = round(entry["members"] / total_members * 100, 1) if total_members else 0.0
+
+    return {"total_members": total_members, "patterns": distribution}
+
+
+@router.get("/trends")
+async def get_monthly_trends(
+    months: int = Query(24, ge=1, le=MAX_TREND_MONTHS),
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("contributions", "monthly_summary"))
+):
+    """Admin: Collection rate, delays and high-risk members per closed month"""
+    trends = get_trends(months)
+    return {
+        "months": trends,
+        "closed_through": trends[-1]["month"] if trends else None
+    }
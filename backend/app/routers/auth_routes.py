@@ -2,21 +2,28 @@
 Authentication routes for the Contribution Tracking API.
 Handles user registration, login, and profile management.
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from datetime import datetime, timedelta
 
 from ..db import admins_collection, members_collection
-from ..models import UserCreate, UserLogin, Token
+from ..models import RefreshRequest, UserCreate, UserLogin, Token
 from ..auth import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from ..dependencies import get_current_user
 from ..utilities import validate_phone, generate_employee_id
+from ..versions import bump_versions
+from ..search import with_search_fields
+from ..refresh_tokens import issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+from ..rate_limit import limit_login
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=Token)
-async def register(user: UserCreate):
+async def register(user: UserCreate, request: Request):
     """Register a new user"""
+    # Registration hashes a password too, so it shares the per-IP budget
+    limit_login(request)
+    
     # Check if user exists
     if members_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -58,7 +65,8 @@ async def register(user: UserCreate):
         "created_at": datetime.now()
     }
     
-    members_collection.insert_one(user_dict)
+    members_collection.insert_one(with_search_fields(user_dict))
+    bump_versions("members")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -67,12 +75,19 @@ async def register(user: UserCreate):
         expires_delta=access_token_expires
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": issue_refresh_token(user.email, "member")
+    }
 
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin):
+async def login(user_login: UserLogin, request: Request):
     """Login and get access token"""
+    # Rejected before any lookup or bcrypt work
+    limit_login(request, user_login.email)
+    
     # Check admins collection first
     user = admins_collection.find_one({"email": user_login.email})
     
@@ -99,10 +114,37 @@ async def login(user_login: UserLogin):
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "refresh_token": issue_refresh_token(user["email"], user.get("role", "member")),
         "must_change_password": must_change_password
     }
 
 
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest):
+    """Exchange a refresh token for a new access token and refresh token (no password check)"""
+    rotated = rotate_refresh_token(request.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    record, refresh_token = rotated
+    access_token = create_access_token(
+        data={"sub": record["email"], "role": record["role"]},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout")
+async def logout(request: RefreshRequest):
+    """Revoke a refresh token and the others issued from the same login"""
+    revoke_refresh_token(request.refresh_token)
+    return {"status": "success", "message": "Logged out"}
+
+
 @router.get("/me")
 async def get_me(current_user: dict = Depends(get_current_user)):
     """Get current user profile"""
@@ -2,19 +2,29 @@
 Contribution routes for the Contribution Tracking API.
 Handles payment tracking, contribution records, and status management.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from typing import Optional
+import asyncio
+import codecs
 
 from ..db import members_collection, contributions_collection
-from ..models import PaymentSubmit
+from ..models import PaymentBatch, PaymentSubmit, ReconciledPayments
 from ..dependencies import require_admin, get_current_user
 from ..utilities import calculate_delay_days, get_payment_status
+from ..cache import cached
+from ..responses import FastJSONResponse
+from ..versions import bump_versions, conditional_get
+from ..idempotency import IdempotencyKey, idempotency_key, idempotent
+from ..payments import mark_paid, pay_all_unpaid, record_payment_batch, valid_date
+from ..reconciliation import StatementError, confirmed_payments, reconcile
 from datetime import datetime
 
 router = APIRouter()
 
 
 @router.get("/status")
-async def get_contributions_status():
+@cached("public:contribution_status", ttl=30, tags=("members", "contributions"))
+async def get_contributions_status(_etag: None = Depends(conditional_get("members", "contributions"))):
     """Get payment statuses for all contributions (public for demo)"""
     all_contributions = list(contributions_collection.find())
     
@@ -32,45 +42,102 @@ async def get_contributions_status():
                 "delay_days": calculate_delay_days(contribution["due_date"], contribution.get("paid_date"))
             })
     
-    return result
+    return FastJSONResponse(result)
 
 
 @router.post("/payment")
-async def record_payment(payment: PaymentSubmit):
-    """Record a payment for a contribution (admin or demo)"""
-    result = contributions_collection.update_one(
-        {"_id": payment.contribution_id},
-        {"$set": {"paid_date": payment.paid_date}}
-    )
-    
-    if result.matched_count == 0:
+@idempotent
+async def record_payment(
+    payment: PaymentSubmit,
+    admin: dict = Depends(require_admin),
+    idempotency: Optional[IdempotencyKey] = Depends(idempotency_key)
+):
+    """Admin: Record a payment for a contribution"""
+    if not valid_date(payment.paid_date):
+        raise HTTPException(status_code=422, detail="paid_date must be a YYYY-MM-DD date")
+    
+    if not mark_paid(payment.contribution_id, payment.paid_date):
         raise HTTPException(status_code=404, detail="Contribution not found")
     
+    bump_versions("contributions")
     return {"status": "success", "message": "Payment recorded"}
 
 
+def _batch_summary(results: list) -> dict:
+    """Response for record_payment_batch results; bumps the contributions version if anything was written"""
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    
+    if counts.get("paid") or counts.get("updated"):
+        bump_versions("contributions")
+    
+    return {
+        "status": "success",
+        "recorded": counts.get("paid", 0),
+        "updated": counts.get("updated", 0),
+        "failed": len(results) - counts.get("paid", 0) - counts.get("updated", 0),
+        "results": results
+    }
+
+
+@router.post("/payments/batch")
+async def record_payments_batch(batch: PaymentBatch, admin: dict = Depends(require_admin)):
+    """Admin: Record many payments at once (e.g. a stack of cash receipts); returns a result per entry"""
+    return _batch_summary(record_payment_batch([entry.model_dump() for entry in batch.payments]))
+
+
+@router.post("/reconcile")
+async def reconcile_statement(
+    file: UploadFile = File(...),
+    apply: bool = False,
+    admin: dict = Depends(require_admin)
+):
+    """
+    Admin: Match a bank statement (CSV) to unpaid contributions.
+    Returns matched, ambiguous and unmatched rows; with apply=true the
+    matched rows are recorded as payments straight away.
+    """
+    # Parsing and matching a large statement takes seconds: keep it off the event loop
+    lines = codecs.iterdecode(file.file, "utf-8-sig", errors="replace")
+    try:
+        result = await asyncio.to_thread(reconcile, lines)
+    except StatementError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if apply and result["matched"]:
+        results = await asyncio.to_thread(record_payment_batch, confirmed_payments(result["matched"]))
+        result["applied"] = _batch_summary(results)
+    
+    return FastJSONResponse(result)
+
+
+@router.post("/reconcile/apply")
+async def apply_reconciled_payments(confirmed: ReconciledPayments, admin: dict = Depends(require_admin)):
+    """Admin: Record the statement matches the admin confirmed (including resolved ambiguous rows)"""
+    entries = [entry.model_dump() for entry in confirmed.payments]
+    return FastJSONResponse(_batch_summary(await asyncio.to_thread(record_payment_batch, entries)))
+
+
 @router.post("/pay-all")
-async def pay_all_pending(current_user: dict = Depends(get_current_user)):
+@idempotent
+async def pay_all_pending(
+    current_user: dict = Depends(get_current_user),
+    idempotency: Optional[IdempotencyKey] = Depends(idempotency_key)
+):
     """Mark all unpaid contributions as paid for the current member"""
     member_id = current_user.get("member_id")
     
-    # Update all unpaid contributions for this member
-    result = contributions_collection.update_many(
-        {
-            "member_id": member_id,
-            "paid_date": None
-        },
-        {
-            "$set": {
-                "paid_date": datetime.now().strftime("%Y-%m-%d")
-            }
-        }
-    )
+    # Pay all unpaid contributions for this member
+    paid_count = pay_all_unpaid(member_id, datetime.now().strftime("%Y-%m-%d"))
+    
+    if paid_count:
+        bump_versions("contributions")
     
     return {
         "status": "success",
         "message": "Successfully paid!",
-        "contributions_paid": result.modified_count
+        "contributions_paid": paid_count
     }
 
 
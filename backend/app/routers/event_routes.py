@@ -0,0 +1,105 @@
+"""
+Live update routes for the Contribution Tracking API.
+Streams dashboard events over Server-Sent Events, with a polling
+endpoint for clients that can't keep a stream open.
+"""
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+
+from ..dependencies import require_admin, require_admin_stream
+from ..events import event_broker, WATCHED_COLLECTIONS
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event in text/event-stream format"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def resync_event() -> dict:
+    """Event telling a client it missed updates and must refetch"""
+    return {
+        "id": event_broker.last_event_id,
+        "type": "resync",
+        "data": {"collections": WATCHED_COLLECTIONS + ["members"]}
+    }
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    admin: dict = Depends(require_admin_stream)
+):
+    """Admin: Server-Sent Events stream of payments, generation, tickets and reminders"""
+    # Subscribe before replaying so nothing published in between is lost
+    queue = event_broker.subscribe()
+
+    async def event_stream():
+        sent_id = 0
+        try:
+            yield "retry: 5000\n\n"
+
+            if last_event_id and last_event_id.isdigit():
+                missed = event_broker.events_since(int(last_event_id))
+                if missed is None:
+                    event = resync_event()
+                    sent_id = event["id"]
+                    yield format_sse(event)
+                else:
+                    for event in missed:
+                        sent_id = event["id"]
+                        yield format_sse(event)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event is None:
+                    # Dropped as a slow consumer; the browser reconnects with Last-Event-ID
+                    break
+                if event["id"] <= sent_id:
+                    continue
+
+                sent_id = event["id"]
+                yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("")
+async def poll_events(since: Optional[int] = None, admin: dict = Depends(require_admin)):
+    """Admin: Polling fallback returning events after the given event id"""
+    if since is None:
+        return {"events": [], "last_event_id": event_broker.last_event_id, "mode": event_broker.mode, "resync": False}
+
+    events = event_broker.events_since(since)
+    if events is None:
+        return {
+            "events": [resync_event()],
+            "last_event_id": event_broker.last_event_id,
+            "mode": event_broker.mode,
+            "resync": True
+        }
+
+    return {
+        "events": events,
+        "last_event_id": events[-1]["id"] if events else since,
+        "mode": event_broker.mode,
+        "resync": False
+    }
@@ -2,34 +2,41 @@
 Member routes for the Contribution Tracking API.
 Handles member dashboard, contributions, notifications, and preferences.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from datetime import datetime
 
-from ..db import members_collection, contributions_collection, notifications_collection
+from ..db import (
+    members_collection,
+    contributions_collection,
+    contributions_archive_collection,
+    notifications_collection
+)
 from ..models import NotificationPreferences
 from ..dependencies import get_current_user
-from ..utilities import calculate_delay_days, classify_member, get_payment_status
+from ..utilities import calculate_delay_days, contribution_stats, get_payment_status
+from ..cache import cached
+from ..responses import FastJSONResponse
+from ..versions import bump_versions, conditional_get
+from ..payments import INITIATIVES, get_fund_totals
 
 router = APIRouter()
 
+MAX_LEADERBOARD_SIZE = 50
+
 
 @router.get("/dashboard")
-async def member_dashboard(current_user: dict = Depends(get_current_user)):
+async def member_dashboard(
+    current_user: dict = Depends(get_current_user),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
     """Get member's personal dashboard"""
     member_id = current_user["member_id"]
     
     # Get contributions
     contributions = list(contributions_collection.find({"member_id": member_id}))
     
-    # Calculate statistics
-    total_contributions = len(contributions)
-    paid_count = sum(1 for c in contributions if c.get("paid_date"))
-    missed_count = total_contributions - paid_count
-    
-    # Calculate delays
-    delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-              for c in contributions if c.get("paid_date")]
-    avg_delay = sum(delays) / len(delays) if delays else 0
+    # Calculate statistics (including compacted years)
+    stats = contribution_stats(contributions, current_user.get("compacted"))
     
     # Get upcoming dues
     upcoming = []
@@ -45,9 +52,6 @@ async def member_dashboard(current_user: dict = Depends(get_current_user)):
                 "status": "overdue" if days_until < 0 else "upcoming"
             })
     
-    # Classification
-    classification = classify_member(missed_count, avg_delay)
-    
     return {
         "member_info": {
             "name": current_user["name"],
@@ -55,11 +59,13 @@ async def member_dashboard(current_user: dict = Depends(get_current_user)):
             "monthly_amount": current_user["monthly_amount"]
         },
         "statistics": {
-            "total_contributions": total_contributions,
-            "paid_count": paid_count,
-            "missed_count": missed_count,
-            "avg_delay_days": round(avg_delay, 1),
-            "classification": classification
+            "total_contributions": stats["total_contributions"],
+            "paid_count": stats["paid_count"],
+            "missed_count": stats["missed_count"],
+            "avg_delay_days": round(stats["avg_delay"], 1),
+            "classification": stats["classification"],
+            "current_streak": current_user.get("streak", {}).get("current", 0),
+            "best_streak": current_user.get("streak", {}).get("best", 0)
         },
         "upcoming_dues": upcoming,
         "total_pending": sum(c["amount"] for c in contributions if not c.get("paid_date"))
@@ -67,10 +73,17 @@ async def member_dashboard(current_user: dict = Depends(get_current_user)):
 
 
 @router.get("/contributions")
-async def get_member_contributions(current_user: dict = Depends(get_current_user)):
+async def get_member_contributions(
+    current_user: dict = Depends(get_current_user),
+    _etag: None = Depends(conditional_get("contributions"))
+):
     """Get member's contribution history"""
     member_id = current_user["member_id"]
     contributions = list(contributions_collection.find({"member_id": member_id}))
+    if current_user.get("compacted"):
+        # Compacted contributions are all older than the live ones
+        archived = contributions_archive_collection.find({"member_id": member_id}).sort("due_date", 1)
+        contributions = list(archived) + contributions
     
     formatted = []
     for c in contributions:
@@ -83,7 +96,7 @@ async def get_member_contributions(current_user: dict = Depends(get_current_user
             "delay_days": calculate_delay_days(c["due_date"], c.get("paid_date"))
         })
     
-    return formatted
+    return FastJSONResponse(formatted)
 
 
 @router.get("/notifications")
@@ -92,13 +105,13 @@ async def get_member_notifications(current_user: dict = Depends(get_current_user
     member_id = current_user["member_id"]
     notifications = list(notifications_collection.find({"member_id": member_id}).sort("sent_at", -1).limit(20))
     
-    return [{
+    return FastJSONResponse([{
         "id": str(n["_id"]),
         "type": n["notification_type"],
         "sent_at": n["sent_at"],
         "message": n["message"],
         "status": n.get("status", "sent")
-    } for n in notifications]
+    } for n in notifications])
 
 
 @router.post("/preferences")
@@ -111,50 +124,64 @@ async def update_preferences(
         {"member_id": current_user["member_id"]},
         {"$set": {"notification_preferences": preferences.dict()}}
     )
+    bump_versions("members")
     return {"status": "success", "message": "Preferences updated"}
 
 
+@router.get("/leaderboard")
+@cached("member:streak_leaderboard", ttl=60, tags=("members", "contributions"), vary_on=("limit", "by"))
+async def get_streak_leaderboard(
+    limit: int = Query(10, ge=1, le=MAX_LEADERBOARD_SIZE),
+    by: str = Query("current", pattern="^(current|best)$"),
+    current_user: dict = Depends(get_current_user),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
+    """Top members by current or best on-time payment streak"""
+    # Served from the streak_current / streak_best indexes (app/indexes.py)
+    leaders = members_collection.find(
+        {f"streak.{by}": {"$gt": 0}},
+        {"_id": 0, "member_id": 1, "name": 1, "streak.current": 1, "streak.best": 1}
+    ).sort([(f"streak.{by}", -1), ("member_id", 1)]).limit(limit)
+
+    return FastJSONResponse([{
+        "rank": rank,
+        "member_id": m["member_id"],
+        "name": m["name"],
+        "current_streak": m["streak"].get("current", 0),
+        "best_streak": m["streak"].get("best", 0)
+    } for rank, m in enumerate(leaders, start=1)])
+
+
 @router.get("/impact/stats")
-async def get_community_impact(current_user: dict = Depends(get_current_user)):
-    """Get community impact statistics (Simulated for MVP)"""
+@cached("member:impact_stats", ttl=60, tags=("contributions",))
+async def get_community_impact(
+    current_user: dict = Depends(get_current_user),
+    _etag: None = Depends(conditional_get("contributions"))
+):
+    """Get community impact statistics (goal and allocations simulated for MVP)"""
     
-    # Calculate real total from DB
-    pipeline = [{"$group": {"_id": None, "total": {"$sum": "$amount"}}}]
-    result = list(contributions_collection.aggregate(pipeline))
-    total_raised = result[0]["total"] if result else 0
+    # Running totals of paid contributions, maintained by app/payments.py
+    totals = get_fund_totals()
+    total_raised = totals["total_raised"]
     
-    # Simulated Goal and Projects
+    # Simulated Goal
     GOAL = 500000
     
     return {
         "total_raised": total_raised,
+        "current_month_raised": totals["months"].get(datetime.now().strftime("%Y-%m"), 0),
         "monthly_goal": GOAL,
         "progress_percentage": min(round((total_raised / GOAL) * 100, 1), 100),
         "active_initiatives": [
             {
-                "id": 1,
-                "name": "Community Education Fund",
-                "description": "Scholarships for 50 underprivileged students",
-                "target": 200000,
-                "raised": total_raised * 0.4,
-                "status": "In Progress"
-            },
-            {
-                "id": 2,
-                "name": "Emergency Medical Aid",
-                "description": "Support for urgent surgeries and medication",
-                "target": 150000,
-                "raised": total_raised * 0.3,
-                "status": "Active"
-            },
-            {
-                "id": 3,
-                "name": "Infrastructure Repair",
-                "description": "Roof maintenance and hall renovation",
-                "target": 150000,
-                "raised": total_raised * 0.3,
-                "status": "Planning"
+                "id": initiative["id"],
+                "name": initiative["name"],
+                "description": initiative["description"],
+                "target": initiative["target"],
+                "raised": round(totals["initiatives"].get(initiative["key"], 0), 2),
+                "status": initiative["status"]
             }
+            for initiative in INITIATIVES
         ],
         "fund_allocation": {
             "Education": 40,
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from ..db import members_collection
 from ..auth import get_password_hash, verify_password
 from ..dependencies import get_current_user
+from ..refresh_tokens import issue_refresh_token, revoke_user_tokens
 
 router = APIRouter()
 
@@ -42,4 +43,11 @@ async def change_password(
         }
     )
     
-    return {"status": "success", "message": "Password changed successfully"}
+    # Sign out every other session; this one continues with a new refresh token
+    revoke_user_tokens(current_user["email"])
+    
+    return {
+        "status": "success",
+        "message": "Password changed successfully",
+        "refresh_token": issue_refresh_token(current_user["email"], current_user.get("role", "member"))
+    }
@@ -5,21 +5,27 @@ Handles predictive analytics and member insights.
 from fastapi import APIRouter, HTTPException, Depends
 
 from ..db import members_collection, contributions_collection
-from ..dependencies import require_admin
+from ..dependencies import analytics_reads, require_admin
 from ..intelligence import IntelligenceEngine
+from ..versions import conditional_get
+from ..responses import FastJSONResponse
 
-router = APIRouter()
+# Predictions are analytics: read from secondaries
+router = APIRouter(dependencies=[Depends(analytics_reads)])
 
 
 @router.get("/")
-async def get_predictions(admin: dict = Depends(require_admin)):
+async def get_predictions(
+    admin: dict = Depends(require_admin),
+    _etag: None = Depends(conditional_get("members", "contributions"))
+):
     """Admin: Get delay predictions for all members"""
     predictions = []
     
     for member in members_collection.find():
         contributions = list(contributions_collection.find({"member_id": member["member_id"]}))
         
-        if len(contributions) < 2:
+        if len(contributions) + member.get("compacted", {}).get("count", 0) < 2:
             continue
         
         prediction = IntelligenceEngine.predict_delay_likelihood(contributions, member)
@@ -38,7 +44,7 @@ async def get_predictions(admin: dict = Depends(require_admin)):
     
     # Sort by risk score
     predictions.sort(key=lambda x: x["risk_score"], reverse=True)
-    return predictions
+    return FastJSONResponse(predictions)
 
 
 @router.get("/{member_id}")
@@ -10,6 +10,8 @@ from ..db import members_collection, tickets_collection
 from ..models import TicketCreate
 from ..dependencies import get_current_user
 from ..utilities import generate_employee_id
+from ..versions import bump_versions, conditional_get
+from ..responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -42,6 +44,7 @@ async def create_ticket(
     }
     
     tickets_collection.insert_one(ticket)
+    bump_versions("tickets")
     
     return {
         "status": "success",
@@ -51,12 +54,15 @@ async def create_ticket(
 
 
 @router.get("/")
-async def get_member_tickets(current_user: dict = Depends(get_current_user)):
+async def get_member_tickets(
+    current_user: dict = Depends(get_current_user),
+    _etag: None = Depends(conditional_get("tickets"))
+):
     """Member: Get all tickets created by the member"""
     member_id = current_user["member_id"]
     tickets = list(tickets_collection.find({"member_id": member_id}).sort("created_at", -1))
     
-    return [{
+    return FastJSONResponse([{
         "ticket_id": t["ticket_id"],
         "employee_id": t["employee_id"],
         "request_type": t["request_type"],
@@ -67,7 +73,7 @@ async def get_member_tickets(current_user: dict = Depends(get_current_user)):
         "created_at": t["created_at"],
         "updated_at": t.get("updated_at"),
         "admin_response": t.get("admin_response")
-    } for t in tickets]
+    } for t in tickets])
 
 
 @router.get("/generate-employee-id")
@@ -0,0 +1,77 @@
+"""
+Payment gateway webhook routes for the Contribution Tracking API.
+Verifies and stores gateway events; app/gateway.py applies them in batches.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from pymongo.errors import PyMongoError
+import asyncio
+
+from .. import gateway
+from ..dependencies import require_admin
+from ..gateway import (
+    InvalidEvent, SIGNATURE_HEADER, apply_events, gateway_ingestor, parse_event, store_events, verify_signature
+)
+from ..metrics import gateway_webhooks_total
+
+router = APIRouter()
+
+
+@router.post("/gateway", status_code=status.HTTP_202_ACCEPTED)
+async def receive_gateway_event(request: Request):
+    """Payment gateway webhook: verify the signature, store the event and queue it for applying"""
+    if not gateway.GATEWAY_WEBHOOK_SECRET:
+        gateway_webhooks_total.inc("not_configured")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Gateway webhooks are not configured")
+    
+    body = await request.body()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER), gateway.GATEWAY_WEBHOOK_SECRET):
+        gateway_webhooks_total.inc("bad_signature")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+    
+    try:
+        event = parse_event(body)
+    except InvalidEvent as e:
+        gateway_webhooks_total.inc("invalid")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if event is None:
+        gateway_webhooks_total.inc("ignored")
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "ignored"})
+    
+    if not gateway_ingestor.running:
+        # No ingestor outside the app lifespan (tests, scripts): apply right away
+        counts = await asyncio.to_thread(apply_events, [event])
+        gateway_webhooks_total.inc("applied")
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "applied", "events": counts})
+    
+    if gateway_ingestor.full:
+        gateway_webhooks_total.inc("queue_full")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many pending events; retry later", headers={"Retry-After": "1"})
+    
+    # Stored before it is acknowledged: the gateway doesn't redeliver after a 2xx
+    try:
+        pending = await asyncio.to_thread(store_events, [event])
+    except PyMongoError:
+        gateway_webhooks_total.inc("store_failed")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Could not store the event; retry later", headers={"Retry-After": "5"})
+    if not pending:
+        gateway_webhooks_total.inc("duplicate")
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "duplicate"})
+    
+    if not gateway_ingestor.enqueue(event["transaction_id"]):
+        # Stored as received: applied when the gateway retries or on the next start
+        gateway_webhooks_total.inc("queue_full")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many pending events; retry later", headers={"Retry-After": "1"})
+    
+    gateway_webhooks_total.inc("queued")
+    return {"status": "queued"}
+
+
+@router.get("/gateway/stats")
+async def get_gateway_stats(admin: dict = Depends(require_admin)):
+    """Admin: Webhook queue depth and applied event counts since startup"""
+    return gateway_ingestor.stats()
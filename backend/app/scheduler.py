@@ -3,15 +3,23 @@ Automated Reminder Scheduler
 Sends payment reminders to members based on their priority level.
 High-risk members receive reminders 7 days before due date.
 Regular members receive reminders 3 days before due date.
+Also closes the monthly summaries used by trend analytics and breaks the
+payment streaks of members who missed a due date, archives old
+notifications and compacts old paid contributions.
 """
 from datetime import datetime, timedelta
 from typing import Dict, List
 import logging
 
 from .db import members_collection, contributions_collection, notifications_collection
-from .utilities import calculate_delay_days, classify_member
+from .utilities import contribution_stats
 from .intelligence import IntelligenceEngine
 from .notifications import notification_engine
+from .rollups import close_pending_months
+from .streaks import record_missed
+from .notification_history import archive_notifications, record_notification
+from .compaction import compact_contributions
+from .versions import bump_versions
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -110,7 +118,7 @@ async def send_member_reminder(member: Dict, contribution: Dict, classification:
             "days_before_due": days_until,
             "status": "sent"
         }
-        notifications_collection.insert_one(notification_doc)
+        record_notification(notification_doc)
         
         # Send email if configured
         results = []
@@ -118,16 +126,13 @@ async def send_member_reminder(member: Dict, contribution: Dict, classification:
         
         if prefs.get("email") and member.get("email"):
             # Calculate stats for this member
-            all_contributions = list(contributions_collection.find({"member_id": member_id}))
-            total_contributions = len(all_contributions)
-            paid_count = sum(1 for c in all_contributions if c.get("paid_date"))
-            missed_count = total_contributions - paid_count
+            stats = contribution_stats(all_contributions, member.get("compacted"))
             
             # Use enhanced email template with statistics
             html_body = notification_engine.generate_email_with_stats(
                 member_name, message,
                 member["monthly_amount"], due_date_str,
-                total_contributions, paid_count, missed_count,
+                stats["total_contributions"], stats["paid_count"], stats["missed_count"],
                 classification
             )
             
@@ -201,15 +206,7 @@ async def check_and_send_reminders():
                 
                 # Calculate member classification
                 all_contributions = list(contributions_collection.find({"member_id": member_id}))
-                total_contributions = len(all_contributions)
-                paid_count = sum(1 for c in all_contributions if c.get("paid_date"))
-                missed_count = total_contributions - paid_count
-                
-                delays = [calculate_delay_days(c["due_date"], c["paid_date"]) 
-                         for c in all_contributions if c.get("paid_date")]
-                avg_delay = sum(delays) / len(delays) if delays else 0
-                
-                classification = classify_member(missed_count, avg_delay)
+                classification = contribution_stats(all_contributions, member.get("compacted"))["classification"]
                 priority = "Early Reminder" if classification == "High-risk Delay" else "Normal"
                 
                 # Check each unpaid contribution
@@ -253,6 +250,67 @@ async def check_and_send_reminders():
         }
 
 
+async def run_month_close():
+    """
+    Month-close task: freeze the summaries of finished months.
+    Runs on the 1st of every month at 00:30 and once at startup, so months
+    missed while the app was down are closed as soon as it is back.
+    """
+    try:
+        closed = close_pending_months()
+        if closed:
+            bump_versions("monthly_summary")
+        return {"status": "completed", "closed_months": closed}
+    except Exception as e:
+        logger.error(f"❌ Month close failed: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+async def run_streak_check():
+    """
+    Daily streak task: reset the current streak of members with a
+    contribution that passed its due date unpaid. Runs at 00:15.
+    """
+    try:
+        affected = record_missed()
+        if affected:
+            bump_versions("members")
+        return {"status": "completed", "members_affected": affected}
+    except Exception as e:
+        logger.error(f"❌ Streak check failed: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+async def run_notification_archive():
+    """
+    Nightly retention task: move notifications past the retention period
+    to notifications_archive. Runs at 02:00.
+    """
+    try:
+        moved = archive_notifications()
+        if moved:
+            bump_versions("notifications")
+        return {"status": "completed", "archived": moved}
+    except Exception as e:
+        logger.error(f"❌ Notification archival failed: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+async def run_contribution_compaction():
+    """
+    Monthly compaction task: fold paid contributions past the compaction
+    horizon into yearly summaries. Runs on the 2nd at 01:00.
+    """
+    try:
+        compacted = compact_contributions()
+        if compacted:
+            bump_versions("contributions", "members")
+        return {"status": "completed", "compacted": compacted}
+    except Exception as e:
+        logger.error(f"❌ Contribution compaction failed: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
 def start_scheduler():
     """Initialize and start the reminder scheduler"""
     global scheduler
@@ -273,8 +331,60 @@ def start_scheduler():
             replace_existing=True
         )
         
+        # Close the previous month's summary on the 1st
+        scheduler.add_job(
+            run_month_close,
+            'cron',
+            day=1,
+            hour=0,
+            minute=30,
+            id='monthly_summary_close',
+            replace_existing=True,
+            # Run late rather than skip when the event loop was busy at 00:30
+            misfire_grace_time=None,
+            coalesce=True
+        )
+        
+        # Catch up on months that ended while the app was down
+        scheduler.add_job(
+            run_month_close,
+            id='monthly_summary_catch_up',
+            replace_existing=True
+        )
+        
+        # Break streaks for due dates missed yesterday
+        scheduler.add_job(
+            run_streak_check,
+            'cron',
+            hour=0,
+            minute=15,
+            id='streak_missed_check',
+            replace_existing=True
+        )
+        
+        # Archive old notifications off-peak
+        scheduler.add_job(
+            run_notification_archive,
+            'cron',
+            hour=2,
+            minute=0,
+            id='notification_archive',
+            replace_existing=True
+        )
+        
+        # Compact old paid contributions once the month close is done
+        scheduler.add_job(
+            run_contribution_compaction,
+            'cron',
+            day=2,
+            hour=1,
+            minute=0,
+            id='contribution_compaction',
+            replace_existing=True
+        )
+        
         scheduler.start()
-        logger.info("✅ Scheduler initialized successfully - Daily reminders at 9:00 AM")
+        logger.info("✅ Scheduler initialized successfully - Daily reminders at 9:00 AM, streak check at 00:15, archival at 02:00, month close on the 1st (and at startup), compaction on the 2nd")
         
     except Exception as e:
         logger.error(f"❌ Failed to start scheduler: {str(e)}")
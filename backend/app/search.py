@@ -0,0 +1,211 @@
+"""
+Admin member search.
+Every member carries normalized search keys, set when the member is
+created: search.terms (name words, full name, email, phone digits and
+IDs) for indexed prefix matching, and search.words (name words) for fuzzy
+matching. Misspelled names are resolved against an in-process trigram
+index of the distinct name words, so a fuzzy query still runs as an
+indexed lookup of a few exact words.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+import re
+import unicodedata
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from .cache import response_cache
+from .db import get_database, members_collection
+
+MIN_QUERY_LENGTH = 2
+# Matches ranked per query; the rest are reported as truncated
+MAX_CANDIDATES = 500
+# Fuzzy matching only fills in when prefix matching finds fewer members
+FUZZY_BELOW = 5
+FUZZY_MIN_SIMILARITY = 0.4
+# New names become fuzzy-searchable in other workers within this time
+VOCABULARY_TTL_SECONDS = 300
+
+SCORE_EXACT, SCORE_NAME_PREFIX, SCORE_PREFIX = 3.0, 2.0, 1.0
+
+# Fields of matched members returned to the caller
+MEMBER_FIELDS = {"_id": 0, "member_id": 1, "employee_id": 1, "name": 1, "phone": 1, "email": 1,
+                 "monthly_amount": 1, "due_day": 1, "search": 1, "compacted": 1}
+
+PHONE_QUERY = re.compile(r"[\d\s\-+()]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def name_words(name: Optional[str]) -> List[str]:
+    return re.findall(r"\w+", normalize(name))
+
+
+def digits(text: Optional[str]) -> str:
+    return re.sub(r"\D", "", text or "")
+
+
+def search_fields(member: dict) -> dict:
+    """Search keys for a member document"""
+    words = name_words(member.get("name"))
+    terms = set(words)
+    terms.add(" ".join(words))
+    terms.add(digits(member.get("phone")))
+    for field in ("email", "member_id", "employee_id"):
+        terms.add(normalize(member.get(field)))
+    terms.discard("")
+    return {"terms": sorted(terms), "words": sorted(set(words))}
+
+
+def with_search_fields(member: dict) -> dict:
+    """Add search keys to a member document before inserting it"""
+    member["search"] = search_fields(member)
+    return member
+
+
+def backfill_search_fields(database: Optional[Database] = None, batch_size: int = 1000) -> int:
+    """Add search keys to members created without them; returns how many were updated"""
+    database = database if database is not None else get_database()
+    missing = database.members.find(
+        {"search": {"$exists": False}},
+        {"name": 1, "phone": 1, "email": 1, "member_id": 1, "employee_id": 1}
+    )
+
+    updates, updated = [], 0
+    for member in missing:
+        updates.append(UpdateOne({"_id": member["_id"]}, {"$set": {"search": search_fields(member)}}))
+        if len(updates) >= batch_size:
+            database.members.bulk_write(updates, ordered=False)
+            updated += len(updates)
+            updates = []
+    if updates:
+        database.members.bulk_write(updates, ordered=False)
+        updated += len(updates)
+    return updated
+
+
+def trigrams(word: str) -> set:
+    """Trigrams of a word padded like pg_trgm ("  ab " -> "  a", " ab", "ab ")"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Name words by trigram, for finding the known words closest to a misspelled one"""
+
+    def __init__(self, words: Iterable[str]):
+        self._trigrams = {word: trigrams(word) for word in words}
+        self._postings = defaultdict(set)
+        for word, grams in self._trigrams.items():
+            for gram in grams:
+                self._postings[gram].add(word)
+
+    def __len__(self) -> int:
+        return len(self._trigrams)
+
+    def similar(self, word: str, min_similarity: float = FUZZY_MIN_SIMILARITY) -> Dict[str, float]:
+        """Known words at least min_similarity (Jaccard over trigrams) from word"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        matches = {}
+        for candidate, count in shared.items():
+            score = count / (len(grams) + len(self._trigrams[candidate]) - count)
+            if score >= min_similarity:
+                matches[candidate] = score
+        return matches
+
+
+async def get_vocabulary() -> TrigramIndex:
+    """Trigram index of every member name word, cached until members change"""
+    async def load():
+        # DISTINCT_SCAN over the search_words index
+        return TrigramIndex(members_collection.distinct("search.words"))
+
+    return await response_cache.get_or_compute(
+        "search:vocabulary", VOCABULARY_TTL_SECONDS, load, tags=("members",)
+    )
+
+
+def _prefix_matches(query: str) -> List[dict]:
+    """Members with a search term starting with query, scored by match quality"""
+    name_query = " ".join(name_words(query))
+    prefixes = {query, name_query} - {""}
+    members = members_collection.find(
+        {"search.terms": {"$in": [re.compile("^" + re.escape(p)) for p in prefixes]}},
+        MEMBER_FIELDS
+    ).limit(MAX_CANDIDATES + 1)
+
+    matches = []
+    for member in members:
+        terms = member["search"]["terms"]
+        if query in terms or name_query in terms:
+            score, match = SCORE_EXACT, "exact"
+        elif name_query and " ".join(name_words(member.get("name"))).startswith(name_query):
+            score, match = SCORE_NAME_PREFIX, "prefix"
+        else:
+            score, match = SCORE_PREFIX, "prefix"
+        matches.append({**member, "score": score, "match": match})
+    return matches
+
+
+async def _fuzzy_matches(query: str, exclude: set) -> List[dict]:
+    """Members whose name has a word similar to every word of query"""
+    words = [word for word in name_words(query) if len(word) >= 3]
+    if not words:
+        return []
+
+    vocabulary = await get_vocabulary()
+    similar = [vocabulary.similar(word) for word in words]
+    if not all(similar):
+        return []
+
+    members = members_collection.find(
+        {"$and": [{"search.words": {"$in": list(candidates)}} for candidates in similar],
+         "member_id": {"$nin": list(exclude)}},
+        MEMBER_FIELDS
+    ).limit(MAX_CANDIDATES + 1)
+
+    matches = []
+    for member in members:
+        member_words = member["search"]["words"]
+        score = sum(max(candidates.get(w, 0.0) for w in member_words) for candidates in similar) / len(similar)
+        matches.append({**member, "score": round(score, 3), "match": "fuzzy"})
+    return matches
+
+
+async def search_members(query: str, page: int = 1, page_size: int = 20) -> dict:
+    """
+    Ranked, paginated members matching query: exact matches first, then
+    name prefixes, other prefixes (phone, email, IDs, later name words)
+    and, when those find few members, fuzzy name matches.
+    """
+    query = normalize(query)
+    if PHONE_QUERY.fullmatch(query) and len(digits(query)) >= MIN_QUERY_LENGTH:
+        query = digits(query)
+
+    matches = _prefix_matches(query)
+    if len(matches) < FUZZY_BELOW:
+        matches += await _fuzzy_matches(query, {m["member_id"] for m in matches})
+
+    truncated = len(matches) > MAX_CANDIDATES
+    matches.sort(key=lambda m: (-m["score"], m.get("name") or "", m["member_id"]))
+    matches = matches[:MAX_CANDIDATES]
+
+    start = (page - 1) * page_size
+    return {
+        "query": query,
+        "page": page,
+        "page_size": page_size,
+        "total": len(matches),
+        "truncated": truncated,
+        "results": matches[start:start + page_size]
+    }
@@ -0,0 +1,147 @@
+"""
+On-time payment streaks.
+Each member document carries streak.current and streak.best: the number
+of consecutive contributions, in due date order, paid on or before their
+due date. Payments and missed due dates update them with a single
+atomic update per member instead of re-reading the member's history.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from .compaction import full_history
+from .db import contributions_collection, get_database, members_collection
+from .utilities import calculate_delay_days
+
+# Matches contributions that are not paid yet (mirrors `not c.get("paid_date")`)
+UNPAID = {"$in": [None, ""]}
+
+
+def is_on_time(contribution: dict, paid_date: Optional[str] = None) -> bool:
+    """Paid no later than its due date"""
+    paid_date = paid_date or contribution.get("paid_date")
+    return bool(paid_date) and calculate_delay_days(contribution["due_date"], paid_date) == 0
+
+
+def _runs(outcomes: list) -> tuple:
+    """
+    Split on-time (True) / broken (False) outcomes in order into
+    (on-time run before the first break, best run after it, run at the end, any break).
+    """
+    if False not in outcomes:
+        return len(outcomes), 0, len(outcomes), False
+
+    leading = outcomes.index(False)
+    best_after, run = 0, 0
+    for on_time in outcomes[leading:]:
+        run = run + 1 if on_time else 0
+        best_after = max(best_after, run)
+    return leading, best_after, run, True
+
+
+def streak_update(outcomes: list) -> list:
+    """
+    Update pipeline applying outcomes (oldest first) to a member's streak,
+    computed from the stored values in one atomic write
+    """
+    leading, best_after, trailing, broken = _runs(outcomes)
+    current = {"$ifNull": ["$streak.current", 0]}
+    extended = {"$add": [current, leading]}
+    return [
+        # best first: it needs the current streak before this update
+        {"$set": {"streak.best": {"$max": [{"$ifNull": ["$streak.best", 0]}, extended, best_after]}}},
+        {"$set": {"streak.current": trailing if broken else extended, "streak.updated_at": datetime.now()}}
+    ]
+
+
+def record_payments(paid: Iterable[dict], paid_date: Optional[str] = None) -> None:
+    """
+    Apply newly paid contributions (member_id and due_date) to their
+    members' streaks. Without paid_date each contribution carries its own.
+    """
+    outcomes = defaultdict(list)
+    for contribution in sorted(paid, key=lambda c: c["due_date"]):
+        # Its due date already broke the streak (record_missed)
+        if contribution.get("missed_recorded"):
+            continue
+        outcomes[contribution["member_id"]].append(is_on_time(contribution, paid_date))
+
+    if outcomes:
+        members_collection.bulk_write([
+            UpdateOne({"member_id": member_id}, streak_update(member_outcomes))
+            for member_id, member_outcomes in outcomes.items()
+        ], ordered=False)
+
+
+def record_missed(today: Optional[str] = None) -> int:
+    """
+    Break the streaks of members with contributions that passed their due
+    date unpaid. Each missed contribution is counted once; returns how
+    many members were affected.
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    missed = {"paid_date": UNPAID, "due_date": {"$lt": today}, "missed_recorded": {"$ne": True}}
+
+    member_ids = contributions_collection.distinct("member_id", missed)
+    if not member_ids:
+        return 0
+
+    members_collection.update_many(
+        {"member_id": {"$in": member_ids}},
+        {"$set": {"streak.current": 0, "streak.updated_at": datetime.now()}}
+    )
+    contributions_collection.update_many(missed, {"$set": {"missed_recorded": True}})
+    return len(member_ids)
+
+
+def rebuild_streaks(database: Optional[Database] = None, batch_size: int = 1000) -> int:
+    """
+    Recompute every member's streak from their full history (compacted
+    contributions included) in due date order and mark past-due unpaid
+    contributions as recorded. The incremental updates follow payment
+    order, so the two agree as long as payments arrive in due date order.
+    Returns the number of members updated.
+    """
+    database = database if database is not None else get_database()
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    def flush(updates):
+        if updates:
+            database.members.bulk_write(updates, ordered=False)
+        return []
+
+    updates, updated = [], 0
+    member_id, current, best = None, 0, 0
+    # Compacted contributions are part of the history too
+    history = full_history(database)
+
+    for contribution in history:
+        # Not due yet and unpaid: no outcome
+        if not contribution.get("paid_date") and contribution["due_date"] >= today:
+            continue
+        if contribution["member_id"] != member_id:
+            if member_id is not None:
+                updates.append(UpdateOne({"member_id": member_id},
+                                         {"$set": {"streak": {"current": current, "best": best}}}))
+                updated += 1
+                if len(updates) >= batch_size:
+                    updates = flush(updates)
+            member_id, current, best = contribution["member_id"], 0, 0
+
+        current = current + 1 if is_on_time(contribution) else 0
+        best = max(best, current)
+
+    if member_id is not None:
+        updates.append(UpdateOne({"member_id": member_id},
+                                 {"$set": {"streak": {"current": current, "best": best}}}))
+        updated += 1
+    flush(updates)
+
+    database.contributions.update_many(
+        {"paid_date": UNPAID, "due_date": {"$lt": today}},
+        {"$set": {"missed_recorded": True}}
+    )
+    return updated
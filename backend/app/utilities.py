@@ -3,7 +3,8 @@ Utility functions for the Contribution Tracking API.
 Contains helper functions used across multiple modules.
 """
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+import math
 import random
 import re
 
@@ -84,6 +85,37 @@ def classify_member(missed_payments: int, avg_delay_days: float) -> str:
         return "High-risk Delay"
 
 
+def contribution_stats(contributions: List[dict], compacted: Optional[dict] = None) -> dict:
+    """
+    Payment statistics over a member's raw contributions plus the totals of
+    their compacted ones (member["compacted"], see compaction.py)
+    """
+    compacted = compacted or {}
+    delays = [calculate_delay_days(c["due_date"], c["paid_date"]) for c in contributions if c.get("paid_date")]
+
+    total = len(contributions) + compacted.get("count", 0)
+    paid_count = len(delays) + compacted.get("paid_count", 0)
+    delay_sum = sum(delays) + compacted.get("delay_sum", 0)
+    delay_sum_sq = sum(d * d for d in delays) + compacted.get("delay_sum_sq", 0)
+
+    avg_delay = delay_sum / paid_count if paid_count else 0
+    # Sample standard deviation from the sums, so compacted years need no raw delays
+    variance = (delay_sum_sq - delay_sum * delay_sum / paid_count) / (paid_count - 1) if paid_count > 1 else 0
+    current_delay = max([calculate_delay_days(c["due_date"]) for c in contributions if not c.get("paid_date")],
+                        default=0)
+    missed_count = total - paid_count
+
+    return {
+        "total_contributions": total,
+        "paid_count": paid_count,
+        "missed_count": missed_count,
+        "avg_delay": avg_delay,
+        "delay_stdev": math.sqrt(max(variance, 0)),
+        "current_delay": current_delay,
+        "classification": classify_member(missed_count, avg_delay)
+    }
+
+
 def calculate_payment_status(contribution):
     """
     Calculate detailed payment status with 5-day grace period.
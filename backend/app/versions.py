@@ -0,0 +1,121 @@
+"""
+Collection version counters and conditional GET support.
+Every write path bumps the version of the collections it touches; read
+endpoints derive their ETag from those versions and answer
+304 Not Modified without running the heavy computation.
+"""
+from datetime import date
+from typing import Dict, Iterable, Optional
+import hashlib
+
+from fastapi import HTTPException, Request, status
+from pymongo import UpdateOne
+
+from .db import versions_collection
+from .cache import request_versions, response_cache
+
+
+def bump_versions(*collections: str) -> None:
+    """Record a write to the given collections and drop dependent cache entries"""
+    if not collections:
+        return
+
+    versions_collection.bulk_write([
+        UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+        for name in collections
+    ])
+    response_cache.invalidate_tags(*collections)
+
+
+def get_versions(collections: Iterable[str]) -> Dict[str, int]:
+    """Current version of each collection (0 if it was never written)"""
+    collections = list(collections)
+    versions = {name: 0 for name in collections}
+    for doc in versions_collection.find({"_id": {"$in": collections}}):
+        versions[doc["_id"]] = doc.get("version", 0)
+    return versions
+
+
+def compute_etag(request: Request, collections: Iterable[str], versions: Optional[Dict[str, int]] = None) -> str:
+    """
+    Build a weak ETag for a read endpoint.
+
+    Besides the collection versions it covers the URL, the caller's
+    credentials (responses differ per user) and today's date (delay
+    days and current-month figures change without any write).
+    """
+    versions = get_versions(collections) if versions is None else versions
+    parts = [
+        str(request.url.path),
+        str(request.url.query),
+        request.headers.get("authorization", ""),
+        date.today().isoformat(),
+    ] + [f"{name}={version}" for name, version in sorted(versions.items())]
+
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in candidates)
+
+
+def conditional_get(*collections: str):
+    """
+    Dependency factory for read endpoints backed by the given collections.
+    Raises 304 when the client already holds the current representation,
+    otherwise records the ETag for ETagMiddleware to send and the versions
+    for cached() to key on.
+    """
+    async def dependency(request: Request) -> None:
+        versions = get_versions(collections)
+        etag = compute_etag(request, collections, versions)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"}
+            )
+
+        request.state.etag = etag
+        request.state.versions = ",".join(f"{name}={version}" for name, version in sorted(versions.items()))
+        # Async dependencies run in the endpoint's context, so cached() sees this
+        request_versions.set(request.state.versions)
+
+    return dependency
+
+
+class ETagMiddleware:
+    """
+    ASGI middleware that attaches the ETag chosen by conditional_get()
+    to successful responses, including ones returned as Response objects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Share one state dict with the request so the dependency's ETag is visible here
+        state = scope.setdefault("state", {})
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = state.get("etag")
+                if etag:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"etag", etag.encode("latin-1")))
+                    headers.append((b"cache-control", b"no-cache"))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
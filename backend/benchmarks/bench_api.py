@@ -0,0 +1,294 @@
+"""
+End-to-end API benchmark.
+Seeds a local MongoDB at several scales with scripts/generate_dataset.py,
+starts the app under uvicorn against it and drives the key endpoints with
+concurrent clients. Reports p50/p95/p99 latency, throughput, errors and
+the server's peak RSS per scale as JSON, so successive versions can be
+compared (pass the previous run with --baseline to print the changes).
+
+Usage:
+    python benchmarks/bench_api.py --scales 1000,10000,100000 --output bench.json
+    python benchmarks/bench_api.py --scales 1000 --concurrency 32 --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MEMBER_PASSWORD = "password123"
+ADMIN_EMAIL = "admin@contribution.com"
+ADMIN_PASSWORD = "admin123"
+
+# name -> (method, path, caller); caller picks the token sent with the request
+ENDPOINTS = {
+    "login": ("POST", "/auth/login", None),
+    "member_dashboard": ("GET", "/member/dashboard", "member"),
+    "admin_members": ("GET", "/admin/members", "admin"),
+    "admin_dashboard_stats": ("GET", "/admin/dashboard/stats", "admin"),
+    "admin_predictions": ("GET", "/admin/predictions/", "admin"),
+    "contribution_status": ("GET", "/contributions/status", None),
+    "reminders_trigger": ("POST", "/admin/reminders/trigger", "admin"),
+    # Generated names are FIRST_NAMES x LAST_NAMES from scripts/generate_dataset.py
+    "admin_member_search": ("GET", "/admin/members/search?q=beena", "admin"),
+    "admin_member_search_fuzzy": ("GET", "/admin/members/search?q=bena%20kumr", "admin"),
+}
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_mb(pid: int):
+    """Peak resident set size of a process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(args, members: int) -> float:
+    """Populate the benchmark database; returns the seconds it took"""
+    started = time.perf_counter()
+    subprocess.run([
+        sys.executable, os.path.join(BACKEND_DIR, "scripts", "generate_dataset.py"),
+        "--members", str(members), "--months", str(args.months), "--seed", str(args.seed),
+        "--drop", "--uri", args.mongo_uri, "--database", args.database
+    ], check=True, cwd=BACKEND_DIR, stdout=sys.stderr)
+    return time.perf_counter() - started
+
+
+def start_server(args) -> subprocess.Popen:
+    # The login benchmark measures bcrypt throughput, so the login rate limiter is off
+    env = dict(os.environ, MONGO_URI=args.mongo_uri, DATABASE_NAME=args.database, RATE_LIMIT_ENABLED="false")
+    return subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"
+    ], cwd=BACKEND_DIR, env=env, stdout=sys.stderr)
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_endpoint(client, name: str, args, admin_token: str, member_logins: list) -> dict:
+    """Send requests to one endpoint from args.concurrency workers"""
+    method, path, caller = ENDPOINTS[name]
+    rng = random.Random(args.seed)
+    latencies, errors = [], 0
+    remaining = args.requests
+    deadline = time.monotonic() + args.max_seconds
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0 and time.monotonic() < deadline:
+            remaining -= 1
+            headers, body = {}, None
+            if name == "login":
+                email, _ = rng.choice(member_logins)
+                body = {"email": email, "password": MEMBER_PASSWORD}
+            elif caller == "admin":
+                headers["Authorization"] = f"Bearer {admin_token}"
+            elif caller == "member":
+                headers["Authorization"] = f"Bearer {rng.choice(member_logins)[1]}"
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - started
+
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0
+    }
+
+
+async def bench_scale(args, members: int, base_url: str) -> dict:
+    timeout = httpx.Timeout(args.request_timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        admin_token = await login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+
+        # A fixed sample of members so every run uses the same accounts
+        sample = random.Random(args.seed).sample(range(1, members + 1), min(args.member_sample, members))
+        emails = [f"member{number}@example.com" for number in sample]
+        tokens = await asyncio.gather(*(login(client, email, MEMBER_PASSWORD) for email in emails))
+        member_logins = list(zip(emails, tokens))
+
+        results = {}
+        for name in args.endpoints:
+            print(f"  {name:<24}", end="", flush=True, file=sys.stderr)
+            results[name] = await run_endpoint(client, name, args, admin_token, member_logins)
+            r = results[name]
+            print(f" p50 {r['p50_ms']:>9.1f} ms  p95 {r['p95_ms']:>9.1f} ms  p99 {r['p99_ms']:>9.1f} ms"
+                  f"  {r['throughput_rps']:>8.1f} req/s  errors {r['errors']}", file=sys.stderr)
+        return results
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    """Print p95 and throughput changes against a previous report (to stderr, like all progress)"""
+    previous = {run["members"]: run for run in baseline.get("runs", [])}
+    print("=" * 60, file=sys.stderr)
+    revision = baseline.get("meta", {}).get("git_revision") or "unknown revision"
+    print(f"CHANGE VS BASELINE ({revision})", file=sys.stderr)
+    print("=" * 60, file=sys.stderr)
+    for run in report["runs"]:
+        before = previous.get(run["members"])
+        if not before:
+            continue
+        print(f"{run['members']:,} members", file=sys.stderr)
+        for name, result in run["endpoints"].items():
+            old = before["endpoints"].get(name)
+            if not old or not old["p95_ms"]:
+                continue
+            change = (result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            print(f"  {name:<24} p95 {old['p95_ms']:>9.1f} -> {result['p95_ms']:>9.1f} ms ({change:+.0f}%)"
+                  f"  {old['throughput_rps']:>8.1f} -> {result['throughput_rps']:>8.1f} req/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1000,10000,100000", help="comma-separated member counts")
+    parser.add_argument("--months", type=int, default=12, help="months of history per member")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--max-seconds", type=float, default=60,
+                        help="stop sending to an endpoint after this long (slow endpoints at large scales)")
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--member-sample", type=int, default=50, help="member accounts to log in as")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--database", default="contribution_tracking_bench")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in --database")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout; progress goes to stderr)")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    args.endpoints = [e.strip() for e in args.endpoints.split(",")]
+    unknown = [e for e in args.endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "max_seconds_per_endpoint": args.max_seconds,
+            "months": args.months,
+            "seed": args.seed
+        },
+        "runs": []
+    }
+
+    for members in scales:
+        print("=" * 60, file=sys.stderr)
+        print(f"API BENCHMARK - {members:,} members x {args.months} months, concurrency {args.concurrency}",
+              file=sys.stderr)
+        print("=" * 60, file=sys.stderr)
+        seed_seconds = None if args.skip_seed else round(seed(args, members), 1)
+
+        server = start_server(args)
+        try:
+            wait_until_ready(base_url, server)
+            endpoints = asyncio.run(bench_scale(args, members, base_url))
+            rss = peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        report["runs"].append({
+            "members": members,
+            "seed_seconds": seed_seconds,
+            "server_peak_rss_mb": rss,
+            "endpoints": endpoints
+        })
+        print(f"  Server peak RSS: {rss} MB", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if baseline:
+        print_comparison(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
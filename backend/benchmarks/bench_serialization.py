@@ -0,0 +1,102 @@
+"""
+Serialization benchmark for large list responses.
+Builds a synthetic 50k-row payload shaped like GET /admin/members and
+compares FastAPI's default path (jsonable_encoder + stdlib json) with
+FastJSONResponse, plus gzip cost and size.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 50000] [--repeat 5]
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import FastJSONResponse, FAST_JSON_ENABLED, GZIP_COMPRESS_LEVEL
+
+CLASSIFICATIONS = ["Regular", "Occasional Delay", "High-risk Delay"]
+
+
+def build_members_payload(rows: int) -> list:
+    """Rows matching the /admin/members response shape"""
+    payload = []
+    for i in range(rows):
+        classification = CLASSIFICATIONS[i % 3]
+        payload.append({
+            "member_id": f"M{i:06d}",
+            "employee_id": f"EMP-20260101-{1000 + i % 9000}",
+            "name": f"Member {i}",
+            "phone": f"98{i:08d}",
+            "email": f"member{i}@example.com",
+            "monthly_amount": 500 + (i % 4) * 250,
+            "due_day": 1 + i % 28,
+            "total_contributions": 24,
+            "paid_count": 24 - i % 5,
+            "missed_count": i % 5,
+            "avg_delay_days": round((i % 200) / 10, 1),
+            "current_delay_days": i % 40,
+            "classification": classification,
+            "priority": "Early Reminder" if classification == "High-risk Delay" else "Normal",
+            "active": True,
+            # Fields seen in ticket/notification lists
+            "created_at": datetime(2026, 1, 1 + i % 28, 9, 30),
+            "last_reminder_id": ObjectId()
+        })
+    return payload
+
+
+def time_it(label: str, func, repeat: int):
+    """Run func repeat times and print the best wall time"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<40} {best * 1000:>9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = build_members_payload(args.rows)
+
+    print("=" * 60)
+    print(f"SERIALIZATION BENCHMARK - {args.rows} rows (best of {args.repeat})")
+    print(f"orjson enabled: {FAST_JSON_ENABLED}")
+    print("=" * 60)
+
+    def default_path():
+        # What FastAPI does for a plain list return value
+        return JSONResponse(jsonable_encoder(payload, custom_encoder={ObjectId: str})).body
+
+    def fast_path():
+        return FastJSONResponse(payload).body
+
+    default_body = time_it("jsonable_encoder + stdlib json", default_path, args.repeat)
+    fast_body = time_it("FastJSONResponse", fast_path, args.repeat)
+    compressed = time_it(f"gzip level {GZIP_COMPRESS_LEVEL}",
+                         lambda: gzip.compress(fast_body, compresslevel=GZIP_COMPRESS_LEVEL), args.repeat)
+
+    print("-" * 60)
+    print(f"  Body size (default): {len(default_body) / 1024:>10.1f} KiB")
+    print(f"  Body size (fast):    {len(fast_body) / 1024:>10.1f} KiB")
+    print(f"  Gzipped size:        {len(compressed) / 1024:>10.1f} KiB")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
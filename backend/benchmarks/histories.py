@@ -0,0 +1,34 @@
+"""
+Contribution histories for microbenchmarks.
+Built with the dataset generator's behavior models and a fixed seed and
+end month, so every run benchmarks exactly the same inputs.
+"""
+from datetime import datetime
+from functools import lru_cache
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from generate_dataset import BEHAVIORS, build_chunk, month_starts
+
+HISTORY_MONTHS = [6, 24, 120]
+END_MONTH = "2026-01"
+SEED = 42
+
+
+@lru_cache(maxsize=None)
+def member_history(behavior: str, months: int):
+    """(member, contributions oldest first) for one member following behavior"""
+    members, contributions, _ = build_chunk(
+        chunk_index=0, start=1, stop=2,
+        months=month_starts(END_MONTH, months),
+        mix={behavior: 1.0},
+        seed=SEED,
+        today=datetime(2026, 1, 31),
+        password_hash=""
+    )
+    return members[0], contributions
+
+
+BEHAVIOR_NAMES = list(BEHAVIORS)
@@ -0,0 +1,198 @@
+"""
+Local payment gateway simulator.
+Replays signed payment.succeeded webhooks for unpaid contributions in the
+target database at a fixed rate (or as fast as the server accepts them),
+resending a share of them to exercise deduplication, then waits until
+every event is applied. Reports webhook latency percentiles, accepted and
+rejected deliveries, throughput and how long the queue took to drain, so
+the ingestion pipeline can be load tested without a real gateway.
+
+Usage:
+    python benchmarks/simulate_gateway.py --start-server --events 20000 --rate 5000
+    python benchmarks/simulate_gateway.py --url http://127.0.0.1:8000 --events 5000 --duplicates 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.gateway import PAYMENT_SUCCEEDED, SIGNATURE_HEADER, sign  # noqa: E402
+from bench_api import percentile, start_server, wait_until_ready  # noqa: E402
+
+DEFAULT_SECRET = "simulator-secret"
+
+
+def build_events(db, count: int, run_id: str, seed: int) -> list:
+    """Webhook bodies paying unpaid contributions (cycling when there are fewer than count)"""
+    unpaid = list(db.contributions.find({"paid_date": {"$in": [None, ""]}},
+                                        {"amount": 1, "due_date": 1}).limit(count))
+    if not unpaid:
+        raise SystemExit("No unpaid contributions in the database; seed it with scripts/generate_dataset.py")
+
+    rng = random.Random(seed)
+    events = []
+    for n in range(count):
+        contribution = unpaid[n % len(unpaid)]
+        paid_at = f"{contribution['due_date']}T{rng.randint(8, 20):02d}:{rng.randint(0, 59):02d}:00"
+        events.append(json.dumps({
+            "id": f"evt-{run_id}-{n}",
+            "type": PAYMENT_SUCCEEDED,
+            "created": int(time.time()),
+            "data": {
+                "transaction_id": f"sim-{run_id}-{n}",
+                "contribution_id": str(contribution["_id"]),
+                "amount": contribution["amount"],
+                "paid_at": paid_at
+            }
+        }).encode())
+    return events
+
+
+async def replay(args, events: list) -> dict:
+    """Deliver every event (plus resent duplicates) with args.concurrency senders"""
+    rng = random.Random(args.seed)
+    deliveries = list(events)
+    deliveries += [rng.choice(events) for _ in range(int(len(events) * args.duplicates))]
+    rng.shuffle(deliveries)
+
+    latencies, statuses = [], {}
+    interval = args.concurrency / args.rate if args.rate else 0
+    next_index = 0
+
+    async def sender(client):
+        nonlocal next_index
+        while next_index < len(deliveries):
+            body = deliveries[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            headers = {SIGNATURE_HEADER: sign(body, args.secret), "Content-Type": "application/json"}
+            while True:
+                try:
+                    response = await client.post("/webhooks/gateway", content=body, headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = "error"
+                # A gateway retries what the server couldn't take
+                if status != 503 or time.perf_counter() - started > args.request_timeout:
+                    break
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")) / 10)
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+            if interval:
+                await asyncio.sleep(max(0.0, interval - elapsed))
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    timeout = httpx.Timeout(args.request_timeout)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(*(sender(client) for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "deliveries": len(deliveries),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        "seconds": round(wall, 2),
+        "deliveries_per_second": round(len(deliveries) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2)
+    }
+
+
+def wait_until_applied(db, run_id: str, expected: int, timeout: float) -> dict:
+    """Poll gateway_events until every event of the run is applied; returns status counts"""
+    started = time.perf_counter()
+    run_events = {"_id": {"$regex": f"^sim-{run_id}-"}}
+    while True:
+        counts = {row["_id"]: row["count"] for row in db.gateway_events.aggregate([
+            {"$match": run_events},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ])}
+        applied = sum(count for status, count in counts.items() if status != "received")
+        if applied >= expected or time.perf_counter() - started > timeout:
+            return {"applied": applied, "statuses": counts,
+                    "drain_seconds": round(time.perf_counter() - started, 2)}
+        time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10000, help="distinct payment events to send")
+    parser.add_argument("--rate", type=float, default=0, help="target deliveries per second (0: as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent senders")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="share of events delivered twice")
+    parser.add_argument("--secret", default=os.getenv("GATEWAY_WEBHOOK_SECRET", DEFAULT_SECRET))
+    parser.add_argument("--url", default=None, help="running API to send to (default: the one --start-server starts)")
+    parser.add_argument("--start-server", action="store_true", help="start the app under uvicorn for the run")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--database", default="contribution_tracking_bench")
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+    if not args.url and not args.start_server:
+        parser.error("pass --url of a running API or --start-server")
+    args.url = args.url or f"http://127.0.0.1:{args.port}"
+
+    client = MongoClient(args.mongo_uri)
+    db = client[args.database]
+    run_id = uuid.uuid4().hex[:8]
+    events = build_events(db, args.events, run_id, args.seed)
+
+    server = None
+    if args.start_server:
+        os.environ["GATEWAY_WEBHOOK_SECRET"] = args.secret
+        server = start_server(args)
+    try:
+        if server:
+            wait_until_ready(args.url, server)
+        print(f"Replaying {len(events):,} events (+{args.duplicates:.0%} duplicates) to {args.url}")
+        delivery = asyncio.run(replay(args, events))
+        print(f"  {delivery['deliveries_per_second']:,.1f} deliveries/s  p50 {delivery['p50_ms']} ms"
+              f"  p99 {delivery['p99_ms']} ms  statuses {delivery['statuses']}")
+        applied = wait_until_applied(db, run_id, len(events), args.drain_timeout)
+        print(f"  {applied['applied']:,} events applied {applied['drain_seconds']} s after the last delivery"
+              f"  {applied['statuses']}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        client.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "run_id": run_id,
+            "events": args.events,
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duplicates": args.duplicates
+        },
+        "delivery": delivery,
+        "apply": applied
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Microbenchmarks for the helpers that run inside per-member loops.
+Covers the utilities and every IntelligenceEngine static method with
+6, 24 and 120 months of history for each payment behavior.
+
+Run with pytest-benchmark (see requirements-dev.txt):
+    python -m pytest benchmarks/test_microbenchmarks.py --benchmark-compare
+"""
+import pytest
+
+from app.intelligence import IntelligenceEngine
+from app.utilities import (
+    calculate_delay_days,
+    calculate_member_status,
+    calculate_payment_status,
+    classify_member,
+)
+
+from histories import BEHAVIOR_NAMES, HISTORY_MONTHS, member_history
+
+HISTORY_PARAMS = [
+    pytest.param(behavior, months, id=f"{behavior}-{months}m")
+    for behavior in BEHAVIOR_NAMES
+    for months in HISTORY_MONTHS
+]
+
+PAID = {"due_date": "2025-06-05", "paid_date": "2025-06-19", "amount": 500}
+UNPAID = {"due_date": "2025-06-05", "paid_date": None, "amount": 500}
+
+
+# Per-contribution helpers
+
+@pytest.mark.parametrize("contribution", [PAID, UNPAID], ids=["paid", "unpaid"])
+def test_calculate_delay_days(benchmark, contribution):
+    benchmark(calculate_delay_days, contribution["due_date"], contribution["paid_date"])
+
+
+@pytest.mark.parametrize("contribution", [PAID, UNPAID], ids=["paid", "unpaid"])
+def test_calculate_payment_status(benchmark, contribution):
+    benchmark(calculate_payment_status, contribution)
+
+
+@pytest.mark.parametrize("missed, avg_delay", [(0, 0.0), (2, 10.0), (5, 40.0)],
+                         ids=["regular", "occasional", "high_risk"])
+def test_classify_member(benchmark, missed, avg_delay):
+    benchmark(classify_member, missed, avg_delay)
+
+
+# Per-member helpers over a full history
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_calculate_member_status(benchmark, behavior, months):
+    _, contributions = member_history(behavior, months)
+    benchmark(calculate_member_status, contributions)
+
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_member_stats_loop(benchmark, behavior, months):
+    """The delay/classification block repeated in the member list endpoints"""
+    _, contributions = member_history(behavior, months)
+
+    def member_stats():
+        paid_count = sum(1 for c in contributions if c.get("paid_date"))
+        missed_count = len(contributions) - paid_count
+        delays = [calculate_delay_days(c["due_date"], c["paid_date"])
+                  for c in contributions if c.get("paid_date")]
+        avg_delay = sum(delays) / len(delays) if delays else 0
+        current_delay = max([calculate_delay_days(c["due_date"])
+                             for c in contributions if not c.get("paid_date")], default=0)
+        return classify_member(missed_count, avg_delay), current_delay
+
+    benchmark(member_stats)
+
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_calculate_risk_score(benchmark, behavior, months):
+    member, contributions = member_history(behavior, months)
+    benchmark(IntelligenceEngine.calculate_risk_score, contributions, member)
+
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_predict_delay_likelihood(benchmark, behavior, months):
+    member, contributions = member_history(behavior, months)
+    benchmark(IntelligenceEngine.predict_delay_likelihood, contributions, member)
+
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_analyze_payment_patterns(benchmark, behavior, months):
+    _, contributions = member_history(behavior, months)
+    benchmark(IntelligenceEngine.analyze_payment_patterns, contributions)
+
+
+@pytest.mark.parametrize("behavior, months", HISTORY_PARAMS)
+def test_calculate_member_insights(benchmark, behavior, months):
+    member, contributions = member_history(behavior, months)
+    benchmark(IntelligenceEngine.calculate_member_insights, member, contributions)
+
+
+@pytest.mark.parametrize("classification", ["Regular", "Occasional Delay", "High-risk Delay"])
+def test_generate_adaptive_reminder(benchmark, classification):
+    member, contributions = member_history("occasional", 24)
+    prediction = IntelligenceEngine.predict_delay_likelihood(contributions, member)
+    benchmark(IntelligenceEngine.generate_adaptive_reminder, member, classification, prediction, 3)
@@ -3,6 +3,7 @@ Quick script to clear existing contributions for testing
 This allows you to test the email automation again
 """
 from app.db import contributions_collection
+from app.payments import rebuild_fund_totals
 from datetime import datetime
 
 # Get current month
@@ -12,4 +13,7 @@ current_month = f"{now.year}-{now.month:02d}"
 # Delete all contributions for current month
 result = contributions_collection.delete_many({"month": current_month})
 
+# Paid contributions may have been deleted
+rebuild_fund_totals()
+
 print(f"✅ Cleared {result.deleted_count} contributions for {current_month}")
@@ -0,0 +1,67 @@
+"""
+Move notifications older than the retention period into the compressed
+notifications_archive collection. The API does this nightly; run it to
+backfill after lowering NOTIFICATION_RETENTION_DAYS, or with
+--rebuild-summary to recompute the per-member notification counters.
+
+Usage:
+    python scripts/archive_notifications.py
+    python scripts/archive_notifications.py --days 30 --batch-size 5000
+    python scripts/archive_notifications.py --rebuild-summary
+"""
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.indexes import ensure_indexes
+from app.notification_history import (
+    NOTIFICATION_ARCHIVE_BATCH_SIZE,
+    NOTIFICATION_RETENTION_DAYS,
+    archive_notifications,
+    rebuild_notification_summary
+)
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    parser.add_argument("--days", type=int, default=NOTIFICATION_RETENTION_DAYS,
+                        help="archive notifications older than this (default: NOTIFICATION_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=NOTIFICATION_ARCHIVE_BATCH_SIZE,
+                        help="notifications moved per batch")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="recompute the per-member notification counters afterwards")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+    # Creates notifications_archive with compression if it doesn't exist yet
+    ensure_indexes(db)
+
+    started = time.perf_counter()
+    moved = archive_notifications(args.days, args.batch_size, db)
+    print(f"Archived {moved:,} notifications older than {args.days} days "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"  Live: {db.notifications.estimated_document_count():,}, "
+          f"archived: {db.notifications_archive.estimated_document_count():,}")
+
+    if args.rebuild_summary:
+        print(f"Rebuilt notification summaries for {rebuild_notification_summary(db):,} members")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
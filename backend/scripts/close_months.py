@@ -0,0 +1,86 @@
+"""
+Close monthly summaries (monthly_summary) for trend analytics.
+The API closes the previous month on the 1st of every month; use this to
+backfill history after importing data or to recompute months whose
+contributions were changed directly in the database. Months with compacted
+contributions keep the summary frozen before compaction.
+
+Usage:
+    python scripts/close_months.py --all
+    python scripts/close_months.py --month 2025-06 --month 2025-07
+"""
+import argparse
+import os
+import re
+import sys
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.rollups import CompactedMonthError, close_month, current_month, next_month
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+
+def month_arg(value: str) -> str:
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", value):
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM, got {value!r}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--month", type=month_arg, action="append", default=[],
+                        help="month to close, YYYY-MM (repeatable)")
+    parser.add_argument("--all", action="store_true",
+                        help="close every month from the oldest contribution up to last month")
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    args = parser.parse_args()
+
+    if not args.month and not args.all:
+        parser.error("pass --month YYYY-MM or --all")
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+
+    months = set(args.month)
+    if args.all:
+        oldest = db.contributions.find_one({}, {"due_date": 1}, sort=[("due_date", 1)])
+        month = oldest["due_date"][:7] if oldest else current_month()
+        while month < current_month():
+            months.add(month)
+            month = next_month(month)
+
+    open_months = sorted(m for m in months if m >= current_month())
+    if open_months:
+        parser.error(f"Can't close the current or a future month: {', '.join(open_months)}")
+
+    closed = 0
+    for month in sorted(months):
+        try:
+            summary = close_month(month, db)
+        except CompactedMonthError:
+            # Old unpaid contributions stay live after compaction; keep the summary frozen before
+            print(f"  {month}: compacted, summary kept")
+            continue
+        closed += 1
+        rate = summary["collected"] / summary["expected"] * 100 if summary["expected"] else 0
+        print(f"  {month}: {summary['contribution_count']:,} contributions, "
+              f"{rate:.1f}% collected, {summary['late_count']:,} late, "
+              f"{summary['high_risk_count']:,} high-risk members")
+
+    # Change the trend endpoint's ETag
+    db.collection_versions.update_one({"_id": "monthly_summary"}, {"$inc": {"version": 1}}, upsert=True)
+    print(f"Closed {closed} month(s) in {args.database}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
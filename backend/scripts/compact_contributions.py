@@ -0,0 +1,70 @@
+"""
+Fold paid contributions due before the compaction horizon into per-member
+yearly summaries and move them to the compressed contributions_archive
+collection. The API does this monthly; run it to backfill after lowering
+CONTRIBUTION_COMPACTION_MONTHS, or with --rebuild to recompute the
+summaries and member totals from the archive.
+
+Usage:
+    python scripts/compact_contributions.py
+    python scripts/compact_contributions.py --months 12 --batch-size 5000
+    python scripts/compact_contributions.py --rebuild
+"""
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.compaction import (
+    CONTRIBUTION_COMPACTION_BATCH_SIZE,
+    CONTRIBUTION_COMPACTION_MONTHS,
+    compact_contributions,
+    rebuild_contribution_summaries
+)
+from app.indexes import ensure_indexes
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    parser.add_argument("--months", type=int, default=CONTRIBUTION_COMPACTION_MONTHS,
+                        help="compact paid contributions due more than this many months ago "
+                             "(default: CONTRIBUTION_COMPACTION_MONTHS)")
+    parser.add_argument("--batch-size", type=int, default=CONTRIBUTION_COMPACTION_BATCH_SIZE,
+                        help="contributions compacted per batch")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="recompute the yearly summaries and member totals afterwards")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+    # Creates contributions_archive with compression if it doesn't exist yet
+    ensure_indexes(db)
+
+    started = time.perf_counter()
+    compacted = compact_contributions(args.months, args.batch_size, db)
+    print(f"Compacted {compacted:,} paid contributions older than {args.months} months "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"  Live: {db.contributions.estimated_document_count():,}, "
+          f"archived: {db.contributions_archive.estimated_document_count():,}, "
+          f"yearly summaries: {db.contribution_summaries.estimated_document_count():,}")
+
+    if args.rebuild:
+        print(f"Rebuilt contribution summaries for {rebuild_contribution_summaries(db):,} members")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
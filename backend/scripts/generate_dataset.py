@@ -0,0 +1,312 @@
+"""
+Synthetic dataset generator for benchmarking and capacity planning.
+Creates N members (up to 1M) with M months of contribution history,
+following a configurable mix of the payment behaviors seeded by
+init_db_enhanced.py (regular, occasional delay, high-risk).
+
+Members are generated in fixed-size chunks, each with its own random
+generator seeded from --seed and the chunk number, so the same arguments
+always produce the same data regardless of --workers (pin --end-month as
+well, since payments after today are left unpaid). Chunks are inserted
+with insert_many in parallel worker processes.
+
+Usage:
+    python scripts/generate_dataset.py --members 100000 --months 24 --drop
+    python scripts/generate_dataset.py --members 10000 --mix regular=0.5,occasional=0.3,high_risk=0.2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.auth import get_password_hash
+from app.indexes import ensure_indexes
+from app.payments import rebuild_fund_totals
+from app.search import with_search_fields
+from app.streaks import rebuild_streaks
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+MAX_MEMBERS = 1_000_000
+MEMBER_PASSWORD = "password123"
+ADMIN_EMAIL = "admin@contribution.com"
+ADMIN_PASSWORD = "admin123"
+
+FIRST_NAMES = ["Arun", "Beena", "Charan", "Divya", "Eswar", "Farah", "Gopal", "Hema",
+               "Imran", "Jaya", "Kiran", "Lakshmi", "Manoj", "Nisha", "Omar", "Priya"]
+LAST_NAMES = ["Kumar", "Joseph", "Singh", "Nair", "Reddy", "Khan", "Menon", "Iyer",
+              "Das", "Pillai", "Rao", "Thomas", "Varma", "Shah", "George", "Bose"]
+MONTHLY_AMOUNTS = [500, 500, 1000, 1500]
+DUE_DAYS = [1, 5, 5, 10, 15]
+
+
+def _regular(rng: random.Random):
+    """Pays on time or a few days late (M001 / M004 in init_db_enhanced.py)"""
+    return rng.randint(0, 5)
+
+
+def _occasional(rng: random.Random):
+    """Mostly on time, sometimes one to two weeks late, rarely skips (M002 / M005)"""
+    r = rng.random()
+    if r < 0.15:
+        return None
+    if r < 0.45:
+        return rng.randint(8, 15)
+    return rng.randint(1, 5)
+
+
+def _high_risk(rng: random.Random):
+    """Misses most months and pays the rest over a month late (M003)"""
+    if rng.random() < 0.6:
+        return None
+    return rng.randint(30, 60)
+
+
+# Behavior name -> function returning the paid_offset in days (None = unpaid)
+BEHAVIORS = {
+    "regular": _regular,
+    "occasional": _occasional,
+    "high_risk": _high_risk,
+}
+
+DEFAULT_MIX = "regular=0.6,occasional=0.3,high_risk=0.1"
+
+
+def parse_mix(value: str) -> dict:
+    """Parse "regular=0.6,occasional=0.3,high_risk=0.1" into normalized weights"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in BEHAVIORS:
+            raise argparse.ArgumentTypeError(f"Unknown behavior '{name}' (choose from {', '.join(BEHAVIORS)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for '{name}': {weight!r}")
+
+    total = sum(mix.values())
+    if total <= 0 or any(w < 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError("Mix weights must be non-negative and sum to more than 0")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def month_starts(end_month: str, months: int) -> list:
+    """First day of each of the `months` months ending with end_month (oldest first)"""
+    year, month = (int(p) for p in end_month.split("-"))
+    starts = []
+    for _ in range(months):
+        starts.append(datetime(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return starts[::-1]
+
+
+def build_chunk(chunk_index: int, start: int, stop: int, months: list, mix: dict,
+                seed: int, today: datetime, password_hash: str):
+    """
+    Build member and contribution documents for members start..stop-1.
+    Deterministic for a given (seed, chunk_index).
+    """
+    rng = random.Random(seed * 1_000_003 + chunk_index)
+    names, weights = list(mix), list(mix.values())
+
+    members, contributions = [], []
+    behavior_counts = {name: 0 for name in BEHAVIORS}
+    for number in range(start, stop):
+        member_id = f"M{number:03d}"
+        behavior = rng.choices(names, weights)[0]
+        behavior_counts[behavior] += 1
+        monthly_amount = rng.choice(MONTHLY_AMOUNTS)
+        due_day = rng.choice(DUE_DAYS)
+
+        members.append(with_search_fields({
+            "member_id": member_id,
+            "employee_id": f"EMP-SYN-{number:07d}",
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone": f"9{number:09d}",
+            "email": f"member{number}@example.com",
+            "password_hash": password_hash,
+            "role": "member",
+            "monthly_amount": monthly_amount,
+            "due_day": due_day,
+            "notification_preferences": {
+                "email": False,
+                "sms": False,
+                "whatsapp": False,
+                "reminder_days_before": 3
+            },
+            "created_at": months[0],
+            "synthetic": True
+        }))
+
+        paid_offset_for = BEHAVIORS[behavior]
+        for month_start in months:
+            due_date = month_start.replace(day=due_day)
+            paid_offset = paid_offset_for(rng)
+            paid_date = None
+            if paid_offset is not None:
+                paid_on = due_date + timedelta(days=paid_offset)
+                # Payments can't be in the future
+                if paid_on <= today:
+                    paid_date = paid_on.strftime("%Y-%m-%d")
+
+            contributions.append({
+                "member_id": member_id,
+                "due_date": due_date.strftime("%Y-%m-%d"),
+                "amount": monthly_amount,
+                "paid_date": paid_date,
+                "month": month_start.strftime("%Y-%m")
+            })
+
+    return members, contributions, behavior_counts
+
+
+def _insert_batches(collection, documents: list, batch_size: int) -> None:
+    for i in range(0, len(documents), batch_size):
+        collection.insert_many(documents[i:i + batch_size], ordered=False)
+
+
+_worker_client = None
+
+
+def generate_chunk(task: dict) -> dict:
+    """Worker entry point: build one chunk and insert it"""
+    global _worker_client
+    if _worker_client is None:
+        # One client per process; MongoClient must not be shared across a fork
+        _worker_client = MongoClient(task["uri"])
+    db = _worker_client[task["database"]]
+
+    members, contributions, behavior_counts = build_chunk(
+        task["chunk_index"], task["start"], task["stop"], task["months"], task["mix"],
+        task["seed"], task["today"], task["password_hash"]
+    )
+    _insert_batches(db.members, members, task["batch_size"])
+    _insert_batches(db.contributions, contributions, task["batch_size"])
+
+    return {"members": len(members), "contributions": len(contributions), "behaviors": behavior_counts}
+
+
+def ensure_admin(db) -> None:
+    """Create the default admin account if there is none"""
+    if db.admins.find_one({"email": ADMIN_EMAIL}):
+        return
+    db.admins.insert_one({
+        "member_id": "ADMIN001",
+        "name": "Administrator",
+        "phone": "+91-9999999999",
+        "email": ADMIN_EMAIL,
+        "password_hash": get_password_hash(ADMIN_PASSWORD),
+        "role": "admin",
+        "monthly_amount": 0,
+        "due_day": 1,
+        "created_at": datetime.now()
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=1000, help=f"members to create (max {MAX_MEMBERS:,})")
+    parser.add_argument("--months", type=int, default=12, help="months of contribution history per member")
+    parser.add_argument("--end-month", default=datetime.now().strftime("%Y-%m"),
+                        help="last month of history, YYYY-MM (default: current month)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"behavior weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel insert processes")
+    parser.add_argument("--chunk-size", type=int, default=5000,
+                        help="members generated per chunk (part of the seed: keep it fixed for reproducible data)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="documents per insert_many call")
+    parser.add_argument("--drop", action="store_true", help="delete existing members and contributions first")
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    args = parser.parse_args()
+
+    if not 1 <= args.members <= MAX_MEMBERS:
+        parser.error(f"--members must be between 1 and {MAX_MEMBERS:,}")
+    if args.months < 1:
+        parser.error("--months must be at least 1")
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+
+    if args.drop:
+        db.members.delete_many({})
+        db.contributions.delete_many({})
+        db.collection_versions.delete_many({})
+    elif db.members.estimated_document_count():
+        parser.error(f"{args.database}.members is not empty; pass --drop to replace it")
+
+    # bcrypt is deliberately slow: hash once and share it across all members
+    password_hash = get_password_hash(MEMBER_PASSWORD)
+    ensure_admin(db)
+
+    months = month_starts(args.end_month, args.months)
+    today = datetime.now()
+    tasks = [{
+        "chunk_index": index,
+        "start": start,
+        "stop": min(start + args.chunk_size, args.members + 1),
+        "months": months,
+        "mix": args.mix,
+        "seed": args.seed,
+        "today": today,
+        "password_hash": password_hash,
+        "batch_size": args.batch_size,
+        "uri": args.uri,
+        "database": args.database
+    } for index, start in enumerate(range(1, args.members + 1, args.chunk_size))]
+
+    print(f"Generating {args.members:,} members x {args.months} months into {args.database} "
+          f"({len(tasks)} chunks, {args.workers} workers, seed {args.seed})")
+    started = time.perf_counter()
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(generate_chunk, tasks))
+    else:
+        results = [generate_chunk(task) for task in tasks]
+
+    totals = {"members": 0, "contributions": 0, "behaviors": {name: 0 for name in BEHAVIORS}}
+    for result in results:
+        totals["members"] += result["members"]
+        totals["contributions"] += result["contributions"]
+        for name, count in result["behaviors"].items():
+            totals["behaviors"][name] += count
+
+    elapsed = time.perf_counter() - started
+    documents = totals["members"] + totals["contributions"]
+    print(f"Inserted {totals['members']:,} members and {totals['contributions']:,} contributions "
+          f"in {elapsed:.1f}s ({documents / elapsed:,.0f} docs/s)")
+    print("Behavior mix: " + ", ".join(f"{name}={count:,}" for name, count in totals["behaviors"].items()))
+
+    # Building indexes after the bulk insert is faster than maintaining them during it
+    started = time.perf_counter()
+    ensure_indexes(db)
+    print(f"Indexes built in {time.perf_counter() - started:.1f}s")
+
+    # Contributions were inserted directly, so the running totals need a rebuild
+    fund_totals = rebuild_fund_totals(db)
+    print(f"Fund totals rebuilt: {fund_totals['total_raised']:,} raised")
+    print(f"Streaks rebuilt for {rebuild_streaks(db):,} members")
+    print("Run scripts/close_months.py --all to build the monthly trend summaries")
+    print(f"Members log in with '{MEMBER_PASSWORD}'; admin: {ADMIN_EMAIL} / {ADMIN_PASSWORD}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
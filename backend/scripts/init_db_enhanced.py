@@ -1,6 +1,9 @@
 from pymongo import MongoClient
 from datetime import datetime, timedelta
 from app.auth import get_password_hash
+from app.payments import rebuild_fund_totals
+from app.search import with_search_fields
+from app.streaks import rebuild_streaks
 import os
 from dotenv import load_dotenv
 
@@ -19,6 +22,8 @@ db.admins.delete_many({})
 db.members.delete_many({})
 db.contributions.delete_many({})
 db.notifications.delete_many({})
+db.notifications_archive.delete_many({})
+db.notification_summary.delete_many({})
 db.predictions.delete_many({})
 
 # Admin data (separate collection)
@@ -133,7 +138,7 @@ members_data = [
 
 # Insert into separate collections
 db.admins.insert_many(admin_data)
-db.members.insert_many(members_data)
+db.members.insert_many([with_search_fields(member) for member in members_data])
 
 # Generate contribution records
 contributions_data = []
@@ -188,6 +193,8 @@ contributions_data.append(create_contribution("M005", 2, 500, paid_offset=None))
 contributions_data.append(create_contribution("M005", 1, 500, paid_offset=None))
 
 db.contributions.insert_many(contributions_data)
+rebuild_fund_totals(db)
+rebuild_streaks(db)
 
 # Print summary
 print("=" * 60)
@@ -0,0 +1,52 @@
+"""
+Recompute the community fund running totals (fund_totals) from the
+contribution history. The API keeps them up to date as payments are
+recorded; run this after importing or deleting contributions directly,
+or to repair drift. Run it while the API is idle: payments recorded
+during the rebuild may be lost.
+
+Usage:
+    python scripts/rebuild_fund_totals.py
+    python scripts/rebuild_fund_totals.py --database contribution_tracking_bench
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.payments import FUND_TOTALS_ID, rebuild_fund_totals
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+
+    previous = db.fund_totals.find_one({"_id": FUND_TOTALS_ID}) or {}
+    totals = rebuild_fund_totals(db)
+
+    print(f"Rebuilt fund totals for {args.database}")
+    print(f"  Total raised: {totals['total_raised']:,} from {totals['paid_count']:,} paid contributions "
+          f"(was {previous.get('total_raised', 0):,})")
+    print(f"  Months: {len(totals['months'])}")
+    for key, raised in totals["initiatives"].items():
+        print(f"  {key}: {raised:,.2f}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
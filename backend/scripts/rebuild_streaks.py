@@ -0,0 +1,51 @@
+"""
+Recompute every member's on-time payment streak (streak.current and
+streak.best) from the contribution history. The API and the daily streak
+check keep them up to date; run this after importing or deleting
+contributions directly, or to repair drift. Run it while the API is idle:
+payments recorded during the rebuild may be lost.
+
+Usage:
+    python scripts/rebuild_streaks.py
+    python scripts/rebuild_streaks.py --database contribution_tracking_bench
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.streaks import rebuild_streaks
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "contribution_tracking_db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=MONGO_URI, help="MongoDB URI (default: MONGO_URI)")
+    parser.add_argument("--database", default=DATABASE_NAME, help="database name (default: DATABASE_NAME)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="member updates per bulk write (default: 1000)")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client[args.database]
+
+    updated = rebuild_streaks(db, batch_size=args.batch_size)
+
+    print(f"Rebuilt streaks for {updated:,} members in {args.database}")
+    top = db.members.find({}, {"_id": 0, "name": 1, "streak": 1}).sort("streak.best", -1).limit(5)
+    for member in top:
+        streak = member.get("streak", {})
+        print(f"  {member['name']}: current {streak.get('current', 0)}, best {streak.get('best', 0)}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Shared fixtures for the backend test suite.
+
+The query-count tests need a real MongoDB server (command monitoring
+events come from the driver talking to mongod). They use a throwaway
+database, TEST_DATABASE_NAME, on TEST_MONGO_URI and are skipped when no
+server is reachable.
+"""
+import os
+import threading
+
+import pytest
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017/")
+TEST_DATABASE_NAME = os.getenv("TEST_DATABASE_NAME", "contribution_tracking_test")
+
+# Point the app at the test database before app.db creates its client
+os.environ["MONGO_URI"] = TEST_MONGO_URI
+os.environ["DATABASE_NAME"] = TEST_DATABASE_NAME
+# Webhook signatures in tests are made with this secret
+TEST_GATEWAY_SECRET = "test-gateway-secret"
+os.environ["GATEWAY_WEBHOOK_SECRET"] = TEST_GATEWAY_SECRET
+# The suite logs in far more often than the login rate limits allow;
+# tests/test_rate_limit.py tightens them where it needs to
+os.environ["LOGIN_IP_BURST"] = "100000"
+os.environ["LOGIN_EMAIL_BURST"] = "100000"
+
+# Batching and driver housekeeping, not application round trips
+NON_QUERY_COMMANDS = {
+    "getMore", "killCursors", "endSessions", "hello", "ismaster", "isMaster",
+    "ping", "saslStart", "saslContinue", "buildInfo"
+}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """
+    Records the MongoDB commands the app sends to the test database as
+    (command, collection, read preference mode)
+    """
+
+    def __init__(self, database_name: str):
+        self.database_name = database_name
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.database_name != self.database_name or event.command_name in NON_QUERY_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        # The driver only sends $readPreference when it isn't primary
+        mode = event.command.get("$readPreference", {}).get("mode", "primary")
+        with self._lock:
+            self.commands.append((event.command_name, collection if isinstance(collection, str) else None, mode))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self) -> None:
+        with self._lock:
+            self.commands = []
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.commands)
+
+
+# Registered globally so the app's client (created on import) picks it up
+command_recorder = CommandRecorder(TEST_DATABASE_NAME)
+monitoring.register(command_recorder)
+
+
+@pytest.fixture(scope="session")
+def mongo_db():
+    """Test database handle; skips the test when MongoDB is unavailable"""
+    client = MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"MongoDB not reachable at {TEST_MONGO_URI}: {e}")
+
+    yield client[TEST_DATABASE_NAME]
+
+    client.drop_database(TEST_DATABASE_NAME)
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def api(mongo_db):
+    """TestClient for the app (lifespan is not entered, so no scheduler or event broker)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def recorder():
+    command_recorder.reset()
+    return command_recorder
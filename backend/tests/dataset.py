@@ -0,0 +1,147 @@
+"""
+Synthetic dataset for query-count tests.
+Members cycle through the regular / occasional delay / high-risk payment
+patterns used by scripts/init_db_enhanced.py so every code path that
+branches on classification gets exercised.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from bson import ObjectId
+
+from app.auth import create_access_token, get_password_hash
+from app.notification_history import rebuild_notification_summary
+from app.payments import rebuild_fund_totals
+from app.refresh_tokens import issue_refresh_token
+from app.rollups import close_month, current_month
+from app.search import with_search_fields
+from app.streaks import rebuild_streaks
+
+MEMBER_PASSWORD = "password123"
+ADMIN_EMAIL = "admin@example.com"
+
+# paid_offset per month (oldest first); None means unpaid
+PAYMENT_PATTERNS = [
+    [0, 2, 0, 0, 0, 0],               # Regular
+    [1, 10, 3, 15, 5, None],          # Occasional delay
+    [None, None, 45, None, None, None]  # High-risk
+]
+
+COLLECTIONS = ["admins", "members", "contributions", "notifications",
+               "predictions", "tickets", "collection_versions", "fund_totals",
+               "monthly_summary", "notifications_archive", "notification_summary",
+               "contributions_archive", "contribution_summaries", "idempotency_keys",
+               "gateway_events", "refresh_tokens"]
+
+
+@lru_cache(maxsize=None)
+def _password_hash() -> str:
+    # bcrypt is deliberately slow; hash once per run
+    return get_password_hash(MEMBER_PASSWORD)
+
+
+def _contribution(member_id: str, month_offset: int, amount: float, paid_offset):
+    base_date = datetime.now() - timedelta(days=30 * month_offset)
+    due_date = base_date.replace(day=5)
+    return {
+        "_id": ObjectId(),
+        "member_id": member_id,
+        "due_date": due_date.strftime("%Y-%m-%d"),
+        "amount": amount,
+        "paid_date": (due_date + timedelta(days=paid_offset)).strftime("%Y-%m-%d")
+        if paid_offset is not None else None
+    }
+
+
+def seed_dataset(db, member_count: int) -> dict:
+    """
+    Replace the contents of db with an admin, member_count members with six
+    months of contributions (past months closed into monthly summaries), a
+    ticket per five members and some reminders.
+    Returns ids and tokens the tests need to build requests.
+    """
+    for name in COLLECTIONS:
+        db[name].delete_many({})
+
+    password_hash = _password_hash()
+    db.admins.insert_one({
+        "member_id": "ADMIN001",
+        "name": "Administrator",
+        "phone": "9999999999",
+        "email": ADMIN_EMAIL,
+        "password_hash": password_hash,
+        "role": "admin",
+        "monthly_amount": 0,
+        "due_day": 1,
+        "created_at": datetime.now()
+    })
+
+    members, contributions, tickets, notifications = [], [], [], []
+    for i in range(1, member_count + 1):
+        member_id = f"M{i:03d}"
+        members.append(with_search_fields({
+            "member_id": member_id,
+            "employee_id": f"EMP-TEST-{i:04d}",
+            "name": f"Test Member {i}",
+            "phone": f"9{i:09d}",
+            "email": f"member{i}@example.com",
+            "password_hash": password_hash,
+            "role": "member",
+            "monthly_amount": 500,
+            "due_day": 5,
+            # Email off so reminder endpoints never try to reach an SMTP server
+            "notification_preferences": {"email": False, "sms": False, "whatsapp": False,
+                                         "reminder_days_before": 3},
+            "created_at": datetime.now()
+        }))
+
+        pattern = PAYMENT_PATTERNS[i % len(PAYMENT_PATTERNS)]
+        for month_offset, paid_offset in zip(range(len(pattern), 0, -1), pattern):
+            contributions.append(_contribution(member_id, month_offset, 500, paid_offset))
+
+        if i % 5 == 1:
+            tickets.append({
+                "ticket_id": str(ObjectId()),
+                "member_id": member_id,
+                "employee_id": f"EMP-TEST-{i:04d}",
+                "request_type": "monthly_amount",
+                "reason": "Salary revision",
+                "current_value": 500.0,
+                "new_value": 750.0,
+                "status": "pending",
+                "created_at": datetime.now(),
+                "updated_at": None,
+                "admin_response": None
+            })
+        notifications.append({
+            "member_id": member_id,
+            "notification_type": "reminder",
+            "sent_at": datetime.now() - timedelta(days=i % 10),
+            "message": "Friendly reminder",
+            "priority": "Normal",
+            "status": "sent"
+        })
+
+    db.members.insert_many(members)
+    db.contributions.insert_many(contributions)
+    db.tickets.insert_many(tickets)
+    db.notifications.insert_many(notifications)
+    rebuild_fund_totals(db)
+    rebuild_streaks(db)
+    rebuild_notification_summary(db)
+    for month in sorted({c["due_date"][:7] for c in contributions}):
+        if month < current_month():
+            close_month(month, db)
+
+    first = members[0]
+    return {
+        "member_id": first["member_id"],
+        "employee_id": first["employee_id"],
+        "member_email": first["email"],
+        "ticket_id": tickets[0]["ticket_id"],
+        "contribution_id": str(next(c["_id"] for c in contributions
+                                    if c["member_id"] == first["member_id"] and not c["paid_date"])),
+        "admin_token": create_access_token({"sub": ADMIN_EMAIL, "role": "admin"}),
+        "member_token": create_access_token({"sub": first["email"], "role": "member"}),
+        "refresh_token": issue_refresh_token(first["email"], "member")
+    }
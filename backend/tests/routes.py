@@ -0,0 +1,19 @@
+"""
+Route listing shared by the tests that check every endpoint.
+"""
+from fastapi.routing import APIRoute
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # Older FastAPI copies included routes into app.routes
+    iter_route_contexts = None
+
+
+def api_routes(app):
+    """(method, path, route) for every HTTP route, including those of included routers"""
+    routes = iter_route_contexts(app.routes) if iter_route_contexts else app.routes
+    for route in routes:
+        if not isinstance(getattr(route, "original_route", route), APIRoute):
+            continue
+        for method in route.methods:
+            yield method, route.path, route
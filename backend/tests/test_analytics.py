@@ -0,0 +1,113 @@
+"""
+Community analytics aggregations.
+
+Each server-side pipeline must agree with the Python helpers it replaces
+and, with the app's indexes in place, must not scan the collection.
+"""
+import pytest
+
+from app import aggregations
+from app.indexes import ensure_indexes
+from app.intelligence import IntelligenceEngine
+from app.utilities import calculate_delay_days
+
+from .dataset import seed_dataset
+
+PIPELINES = {
+    "delay_histogram": aggregations.delay_histogram_pipeline,
+    "due_day_cohorts": aggregations.due_day_cohort_pipeline,
+    "join_month_cohorts": aggregations.join_month_cohort_pipeline,
+    "payment_patterns": aggregations.payment_pattern_pipeline,
+}
+
+
+@pytest.fixture
+def seeded(mongo_db):
+    ids = seed_dataset(mongo_db, 12)
+    return mongo_db, {"Authorization": f"Bearer {ids['admin_token']}"}
+
+
+def _members(mongo_db) -> dict:
+    by_member = {}
+    for contribution in mongo_db.contributions.find():
+        by_member.setdefault(contribution["member_id"], []).append(contribution)
+    return by_member
+
+
+def test_delay_distribution_matches_python(api, seeded):
+    mongo_db, headers = seeded
+    delays = [calculate_delay_days(c["due_date"], c["paid_date"])
+              for c in mongo_db.contributions.find({"paid_date": {"$ne": None}})]
+
+    body = api.get("/admin/analytics/delay-distribution", headers=headers).json()
+
+    assert body["total_paid"] == len(delays)
+    for bucket in body["buckets"]:
+        upper = bucket["max_days"] if bucket["max_days"] is not None else float("inf")
+        assert bucket["count"] == sum(1 for d in delays if bucket["min_days"] <= d <= upper), bucket["label"]
+
+
+def test_due_day_cohorts_match_python(api, seeded):
+    mongo_db, headers = seeded
+    cohorts = {}
+    for c in mongo_db.contributions.find():
+        cohort = cohorts.setdefault(int(c["due_date"][8:10]), {"expected": 0, "collected": 0})
+        cohort["expected"] += c["amount"]
+        cohort["collected"] += c["amount"] if c.get("paid_date") else 0
+
+    body = api.get("/admin/analytics/cohorts/due-day", headers=headers).json()
+
+    assert {row["due_day"]: (row["expected"], row["collected"]) for row in body} == {
+        day: (cohort["expected"], cohort["collected"]) for day, cohort in cohorts.items()
+    }
+
+
+def test_join_month_cohorts_match_python(api, seeded):
+    mongo_db, headers = seeded
+    expected_members = {}
+    for contributions in _members(mongo_db).values():
+        month = min(c["due_date"] for c in contributions)[:7]
+        expected_members[month] = expected_members.get(month, 0) + 1
+
+    body = api.get("/admin/analytics/cohorts/join-month", headers=headers).json()
+
+    assert {row["join_month"]: row["members"] for row in body} == expected_members
+
+
+def test_pattern_distribution_matches_intelligence_engine(api, seeded):
+    mongo_db, headers = seeded
+    expected = {}
+    for contributions in _members(mongo_db).values():
+        pattern = IntelligenceEngine.analyze_payment_patterns(contributions)["pattern"]
+        expected[pattern] = expected.get(pattern, 0) + 1
+
+    body = api.get("/admin/analytics/patterns", headers=headers).json()
+
+    assert {p["pattern"]: p["members"] for p in body["patterns"]} == expected
+    assert body["total_members"] == sum(expected.values())
+
+
+def _plan_stages(explain) -> set:
+    """Every plan stage name anywhere in an explain document"""
+    stages = set()
+    if isinstance(explain, dict):
+        if isinstance(explain.get("stage"), str):
+            stages.add(explain["stage"])
+        for value in explain.values():
+            stages |= _plan_stages(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            stages |= _plan_stages(value)
+    return stages
+
+
+@pytest.mark.parametrize("name", list(PIPELINES))
+def test_pipelines_use_indexes(mongo_db, name):
+    seed_dataset(mongo_db, 5)
+    assert ensure_indexes(mongo_db)
+
+    explain = mongo_db.command("aggregate", "contributions", pipeline=PIPELINES[name](), explain=True)
+
+    stages = _plan_stages(explain)
+    assert "COLLSCAN" not in stages, f"{name} scans the collection: {sorted(stages)}"
+    assert "IXSCAN" in stages
@@ -0,0 +1,87 @@
+"""
+In-process response cache.
+
+Concurrent misses for a key share one computation, a failed computation
+releases everyone waiting on it, and a result computed across an
+invalidation is returned but not stored.
+"""
+import asyncio
+
+import pytest
+
+from app.cache import TTLCache
+
+
+def test_concurrent_misses_compute_once():
+    cache = TTLCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", 60, compute, namespace="ns") for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+    assert cache.stats()["namespaces"]["ns"] == {"hits": 0, "misses": 1, "coalesced": 4}
+    assert cache.get("key") == {"value": 1}
+
+
+def test_failed_compute_releases_waiters():
+    cache = TTLCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", 60, fail) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get("key") is None
+
+    # The next request computes again
+    async def succeed():
+        return "ok"
+
+    assert asyncio.run(cache.get_or_compute("key", 60, succeed)) == "ok"
+
+
+@pytest.mark.parametrize("invalidate", [
+    lambda cache: cache.invalidate_tags("contributions"),
+    lambda cache: cache.invalidate(),
+])
+def test_invalidation_during_compute_skips_the_store(invalidate):
+    cache = TTLCache()
+
+    async def compute():
+        await asyncio.sleep(0)
+        # A write lands while the (now stale) result is being computed
+        invalidate(cache)
+        return "stale"
+
+    result = asyncio.run(cache.get_or_compute("key", 60, compute, tags=("contributions",)))
+
+    assert result == "stale"
+    assert cache.get("key") is None
+
+
+def test_invalidate_tags_drops_dependent_entries_only():
+    cache = TTLCache()
+    cache.set("a", 1, 60, tags=("members",))
+    cache.set("b", 2, 60, tags=("contributions",))
+
+    cache.invalidate_tags("contributions")
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
@@ -0,0 +1,121 @@
+"""
+Contribution compaction.
+
+Statistics over compacted members must match the ones computed from
+their raw contributions, and rebuilding the summaries from the archive
+must agree with the incremental compaction.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.compaction import compact_contributions, compaction_cutoff, rebuild_contribution_summaries
+from app.intelligence import IntelligenceEngine
+from app.payments import rebuild_fund_totals
+from app.rollups import CompactedMonthError, close_month
+from app.streaks import rebuild_streaks
+from app.utilities import contribution_stats
+from app.versions import bump_versions
+
+from .dataset import seed_dataset
+
+# Paid delay (days, negative when early) of each old contribution
+OLD_DELAYS = [-2, 0, 3, 20, 1, 45, 0, 7]
+
+INSIGHT_FIELDS = ("risk_score", "total_contributions", "paid_count", "success_rate", "delay_stdev_days")
+PATTERN_FIELDS = ("pattern", "average_delay", "consistency")
+
+
+def _seed_with_old_history(mongo_db) -> dict:
+    """Dataset plus paid contributions due 30 to 37 months ago for every member"""
+    ids = seed_dataset(mongo_db, 6)
+    old = []
+    for member in mongo_db.members.find({}, {"member_id": 1}):
+        for n, delay in enumerate(OLD_DELAYS):
+            due_date = (datetime.now() - timedelta(days=30 * (30 + n))).replace(day=5)
+            old.append({
+                "_id": ObjectId(),
+                "member_id": member["member_id"],
+                "due_date": due_date.strftime("%Y-%m-%d"),
+                "amount": 500,
+                "paid_date": (due_date + timedelta(days=delay)).strftime("%Y-%m-%d")
+            })
+    mongo_db.contributions.insert_many(old)
+    rebuild_streaks(mongo_db)
+    rebuild_fund_totals(mongo_db)
+    return ids
+
+
+def _member_statistics(mongo_db) -> dict:
+    stats = {}
+    for member in mongo_db.members.find():
+        contributions = list(mongo_db.contributions.find({"member_id": member["member_id"]}))
+        insights = IntelligenceEngine.calculate_member_insights(member, contributions)
+        stats[member["member_id"]] = (
+            contribution_stats(contributions, member.get("compacted")),
+            {key: insights[key] for key in INSIGHT_FIELDS},
+            {key: insights["payment_patterns"][key] for key in PATTERN_FIELDS}
+        )
+    return stats
+
+
+def test_compaction_preserves_statistics(api, mongo_db):
+    ids = _seed_with_old_history(mongo_db)
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+    member_headers = {"Authorization": f"Bearer {ids['member_token']}"}
+
+    before = _member_statistics(mongo_db)
+    members_before = api.get("/members").json()
+    dashboard_before = api.get("/admin/dashboard/stats", headers=headers).json()
+    history_before = len(api.get("/member/contributions", headers=member_headers).json())
+    streaks_before = {m["member_id"]: m["streak"] for m in mongo_db.members.find()}
+    raised_before = mongo_db.fund_totals.find_one()["total_raised"]
+
+    compacted = compact_contributions(database=mongo_db)
+    bump_versions("contributions", "members")
+
+    assert compacted == len(OLD_DELAYS) * 6
+    assert not mongo_db.contributions.count_documents({"due_date": {"$lt": compaction_cutoff(24)}})
+    assert mongo_db.contributions_archive.count_documents({}) == compacted
+    assert _member_statistics(mongo_db) == before
+    assert api.get("/members").json() == members_before
+    assert api.get("/admin/dashboard/stats", headers=headers).json() == dashboard_before
+    assert len(api.get("/member/contributions", headers=member_headers).json()) == history_before
+
+    # Full-history rebuilds read the archive too
+    rebuild_streaks(mongo_db)
+    assert {m["member_id"]: m["streak"] for m in mongo_db.members.find()} == streaks_before
+    assert rebuild_fund_totals(mongo_db)["total_raised"] == raised_before
+
+
+def test_rebuild_matches_incremental(mongo_db):
+    _seed_with_old_history(mongo_db)
+    # Small batches split members and years across several updates
+    compact_contributions(batch_size=5, database=mongo_db)
+    summaries = {s["_id"]: s for s in mongo_db.contribution_summaries.find()}
+    totals = {m["member_id"]: m["compacted"] for m in mongo_db.members.find()}
+
+    assert rebuild_contribution_summaries(mongo_db) == len(totals)
+
+    assert {s["_id"]: s for s in mongo_db.contribution_summaries.find()} == summaries
+    assert {m["member_id"]: m["compacted"] for m in mongo_db.members.find()} == totals
+    # Nothing left to compact
+    assert compact_contributions(database=mongo_db) == 0
+
+
+def test_close_keeps_the_summary_of_a_compacted_month(mongo_db):
+    _seed_with_old_history(mongo_db)
+    month = mongo_db.contributions.find_one({}, sort=[("due_date", 1)])["due_date"][:7]
+    # An old contribution that was never paid stays live after compaction
+    mongo_db.contributions.insert_one({"member_id": "M001", "due_date": f"{month}-20", "amount": 500,
+                                       "paid_date": None})
+    frozen = close_month(month, mongo_db)
+    assert frozen["collected"] > 0
+
+    compact_contributions(database=mongo_db)
+
+    with pytest.raises(CompactedMonthError):
+        close_month(month, mongo_db)
+    summary = mongo_db.monthly_summary.find_one({"_id": month})
+    assert (summary["collected"], summary["paid_count"]) == (frozen["collected"], frozen["paid_count"])
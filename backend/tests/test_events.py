@@ -0,0 +1,44 @@
+"""
+Live update event broker.
+
+Only a contribution going from unpaid to paid is a payment event, and a
+change stream that can no longer resume from its token restarts from
+now and tells clients to refetch, instead of retrying the dead token.
+"""
+from pymongo.errors import OperationFailure
+
+from app.events import EventBroker, change_to_event
+
+
+def _update(updated_fields: dict) -> dict:
+    return {
+        "ns": {"coll": "contributions"}, "operationType": "update", "documentKey": {"_id": "c1"},
+        "fullDocument": {"member_id": "M001", "due_date": "2024-01-05", "amount": 500, **updated_fields},
+        "updateDescription": {"updatedFields": updated_fields}
+    }
+
+
+def test_only_paying_updates_are_payments():
+    paid = change_to_event(_update({"paid_date": "2024-01-05", "payment_ref": "ref"}))
+
+    assert paid["type"] == "payment_recorded" and paid["data"]["paid_date"] == "2024-01-05"
+    # Correcting the date of an already paid contribution
+    assert change_to_event(_update({"paid_date": "2024-01-06"})) is None
+
+
+def test_lost_resume_token_restarts_stream_and_resyncs():
+    broker = EventBroker()
+    broker._resume_token = {"_data": "dead"}
+    tokens = []
+
+    def watch():
+        tokens.append(broker._resume_token)
+        if len(tokens) == 1:
+            raise OperationFailure("Resume of change stream was not possible", code=286)
+        broker._stop.set()
+
+    broker._watch_change_streams = watch
+    broker._run()
+
+    assert tokens == [{"_data": "dead"}, None]
+    assert [event["type"] for event in broker.events_since(0)] == ["resync"]
@@ -0,0 +1,156 @@
+"""
+Payment gateway webhook ingestion.
+
+Only correctly signed, fresh events are accepted; events are applied in
+batches, each gateway transaction at most once, and the running totals
+agree with a rebuild afterwards.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from bson import ObjectId
+
+from app.gateway import (
+    PAYMENT_SUCCEEDED, RECEIVED, SIGNATURE_HEADER, InvalidEvent, WebhookIngestor,
+    apply_events, parse_event, recover_received, sign, store_events, verify_signature
+)
+from app.routers import webhook_routes
+from app.payments import FUND_TOTALS_ID, rebuild_fund_totals
+
+from .conftest import TEST_GATEWAY_SECRET
+from .dataset import seed_dataset
+
+
+def _body(transaction_id: str, contribution: dict, event_type: str = PAYMENT_SUCCEEDED) -> bytes:
+    return json.dumps({"id": f"evt-{transaction_id}", "type": event_type, "data": {
+        "transaction_id": transaction_id, "contribution_id": str(contribution["_id"]),
+        "amount": contribution["amount"], "paid_at": f"{contribution['due_date']}T10:30:00"
+    }}).encode()
+
+
+@pytest.fixture
+def unpaid(mongo_db):
+    seed_dataset(mongo_db, 6)
+    return list(mongo_db.contributions.find({"paid_date": None}).sort("due_date", 1))
+
+
+def test_signature_checks_body_secret_and_age():
+    body = b'{"type": "payment.succeeded"}'
+    header = sign(body, "secret")
+
+    assert verify_signature(body, header, "secret")
+    assert not verify_signature(body + b" ", header, "secret")
+    assert not verify_signature(body, header, "other")
+    assert not verify_signature(body, sign(body, "secret", int(time.time()) - 3600), "secret")
+    # Either of two signatures is accepted while the secret is rotated
+    assert verify_signature(body, f"{header},v1={'0' * 64}", "secret")
+    assert not verify_signature(body, "garbage", "secret")
+
+
+def test_parse_event():
+    contribution = {"_id": ObjectId(), "amount": 500, "due_date": "2024-01-05"}
+    event = parse_event(_body("txn-1", contribution))
+
+    assert event["transaction_id"] == "txn-1"
+    assert event["paid_date"] == "2024-01-05"
+    assert parse_event(_body("txn-2", contribution, "payment.refunded")) is None
+    with pytest.raises(InvalidEvent):
+        parse_event(b"not json")
+    with pytest.raises(InvalidEvent):
+        parse_event(json.dumps({"type": PAYMENT_SUCCEEDED, "data": {"transaction_id": "x"}}).encode())
+
+
+def test_duplicate_transactions_apply_once(mongo_db, unpaid):
+    before = mongo_db.fund_totals.find_one({"_id": FUND_TOTALS_ID})["total_raised"]
+    events = [parse_event(_body(f"txn-{i}", c)) for i, c in enumerate(unpaid)]
+
+    first = apply_events(events + events[:2])
+    again = apply_events(events)
+
+    assert first["paid"] == len(unpaid) and first["duplicate"] == 2
+    assert again == {"duplicate": len(unpaid)}
+    total = mongo_db.fund_totals.find_one({"_id": FUND_TOTALS_ID})["total_raised"]
+    assert total == before + sum(c["amount"] for c in unpaid)
+    assert rebuild_fund_totals(mongo_db)["total_raised"] == total
+
+
+def test_stored_but_unapplied_events_are_recovered(mongo_db, unpaid):
+    event = parse_event(_body("txn-crash", unpaid[0]))
+    mongo_db.gateway_events.insert_one({"_id": "txn-crash", **{k: v for k, v in event.items()
+                                                               if k != "transaction_id"}, "status": RECEIVED})
+
+    # A redelivery applies it instead of treating it as a duplicate
+    assert apply_events([event])["paid"] == 1
+    mongo_db.gateway_events.update_one({"_id": "txn-crash"}, {"$set": {"status": RECEIVED}})
+    assert recover_received() == 1
+    assert mongo_db.gateway_events.find_one({"_id": "txn-crash"})["status"] == "updated"
+
+
+def test_webhook_endpoint(api, mongo_db, unpaid):
+    body = _body("txn-api", unpaid[0])
+
+    def post(content, headers):
+        return api.post("/webhooks/gateway", content=content, headers=headers)
+
+    assert post(body, {}).status_code == 401
+    assert post(body, {SIGNATURE_HEADER: sign(body, "wrong")}).status_code == 401
+    bad = b'{"type": "payment.succeeded", "data": {}}'
+    assert post(bad, {SIGNATURE_HEADER: sign(bad, TEST_GATEWAY_SECRET)}).status_code == 400
+
+    # No ingestor runs without the lifespan, so the event is applied inline
+    response = post(body, {SIGNATURE_HEADER: sign(body, TEST_GATEWAY_SECRET)})
+    assert response.status_code == 200 and response.json()["events"] == {"paid": 1, "duplicate": 0}
+    assert mongo_db.contributions.find_one({"_id": unpaid[0]["_id"]})["paid_date"] == unpaid[0]["due_date"]
+
+
+class QueueStub:
+    """Stands in for a running ingestor"""
+
+    running, full = True, False
+
+    def __init__(self):
+        self.queued = []
+
+    def enqueue(self, transaction_id):
+        self.queued.append(transaction_id)
+        return True
+
+
+def test_event_is_stored_before_it_is_acknowledged(api, mongo_db, unpaid, monkeypatch):
+    queue = QueueStub()
+    monkeypatch.setattr(webhook_routes, "gateway_ingestor", queue)
+    body = _body("txn-durable", unpaid[0])
+    headers = {SIGNATURE_HEADER: sign(body, TEST_GATEWAY_SECRET)}
+
+    response = api.post("/webhooks/gateway", content=body, headers=headers)
+
+    assert response.status_code == 202 and queue.queued == ["txn-durable"]
+    # A crash now loses nothing: the startup recovery applies it
+    assert mongo_db.gateway_events.find_one({"_id": "txn-durable"})["status"] == RECEIVED
+    assert recover_received() == 1
+    response = api.post("/webhooks/gateway", content=body, headers=headers)
+    assert response.status_code == 200 and response.json()["status"] == "duplicate"
+
+
+def test_ingestor_applies_queued_events_in_batches(mongo_db, unpaid):
+    events = [parse_event(_body(f"txn-q{i}", c)) for i, c in enumerate(unpaid)]
+    transaction_ids = store_events(events)
+
+    async def run():
+        ingestor = WebhookIngestor(queue_size=len(events), batch_size=4, batch_wait_ms=20)
+        ingestor.start()
+        for transaction_id in transaction_ids:
+            assert ingestor.enqueue(transaction_id)
+        assert ingestor.full and not ingestor.enqueue(transaction_ids[0])
+        await ingestor.stop()
+        return ingestor.stats()
+
+    stats = asyncio.run(run())
+
+    assert transaction_ids == [e["transaction_id"] for e in events]
+    assert stats["events"]["paid"] == len(unpaid)
+    assert stats["batches"] == -(-len(unpaid) // 4)
+    assert mongo_db.contributions.count_documents({"_id": {"$in": [c["_id"] for c in unpaid]},
+                                                   "paid_date": None}) == 0
@@ -0,0 +1,84 @@
+"""
+Idempotency-Key support.
+
+A retry with the same key replays the first response without redoing
+the work, a key reused for a different request is rejected, and
+contribution generation can't run twice for a month concurrently.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.idempotency import REPLAYED_HEADER, claim
+from app.indexes import ensure_indexes
+from app.routers.admin_routes import GENERATION_SCOPE
+
+from .dataset import seed_dataset
+
+
+@pytest.fixture
+def ids(api, mongo_db):
+    assert ensure_indexes(mongo_db)
+    return seed_dataset(mongo_db, 5)
+
+
+def test_retry_replays_first_response(api, mongo_db, ids):
+    headers = {"Authorization": f"Bearer {ids['member_token']}", "Idempotency-Key": "pay-1"}
+
+    first = api.post("/contributions/pay-all", headers=headers)
+    retry = api.post("/contributions/pay-all", headers=headers)
+
+    assert first.json()["contributions_paid"] > 0
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    # A new key runs the request again (nothing left to pay)
+    fresh = api.post("/contributions/pay-all", headers={**headers, "Idempotency-Key": "pay-2"})
+    assert fresh.json()["contributions_paid"] == 0
+
+
+def test_key_reused_with_another_body_is_rejected(api, ids):
+    payment = {"member_id": ids["member_id"], "contribution_id": ids["contribution_id"], "paid_date": "2024-01-05"}
+    headers = {"Authorization": f"Bearer {ids['admin_token']}", "Idempotency-Key": "payment-1"}
+
+    assert api.post("/contributions/payment", json=payment, headers=headers).status_code == 200
+    response = api.post("/contributions/payment", json={**payment, "paid_date": "2024-01-06"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_failed_request_releases_its_key(api, ids):
+    payment = {"member_id": ids["member_id"], "contribution_id": "not-an-id", "paid_date": "2024-01-05"}
+    headers = {"Authorization": f"Bearer {ids['admin_token']}", "Idempotency-Key": "payment-2"}
+
+    assert api.post("/contributions/payment", json=payment, headers=headers).status_code == 404
+    response = api.post("/contributions/payment", json=payment, headers=headers)
+    assert response.status_code == 404
+    assert REPLAYED_HEADER not in response.headers
+
+
+def test_keys_are_per_caller(api, ids):
+    key = {"Idempotency-Key": "shared"}
+    admin = api.post("/admin/contributions/generate",
+                     headers={**key, "Authorization": f"Bearer {ids['admin_token']}"})
+    member = api.post("/contributions/pay-all",
+                      headers={**key, "Authorization": f"Bearer {ids['member_token']}"})
+
+    assert admin.status_code == member.status_code == 200
+    assert REPLAYED_HEADER not in member.headers
+
+
+def test_generation_runs_once_per_month(api, mongo_db, ids):
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+    month = datetime.now().strftime("%Y-%m")
+
+    # Another admin is generating this month
+    assert claim(GENERATION_SCOPE, month) is None
+    assert api.post("/admin/contributions/generate", headers=headers).json()["status"] == "in_progress"
+    assert mongo_db.contributions.count_documents({"month": month}) == 0
+
+    # An abandoned claim is taken over once it is stale
+    mongo_db.idempotency_keys.update_one({"scope": GENERATION_SCOPE, "key": month},
+                                         {"$set": {"claimed_at": datetime.utcnow() - timedelta(hours=1)}})
+    assert api.post("/admin/contributions/generate", headers=headers).json()["status"] == "success"
+    assert api.post("/admin/contributions/generate", headers=headers).json()["status"] == "already_exists"
+    assert mongo_db.idempotency_keys.count_documents({"scope": GENERATION_SCOPE}) == 0
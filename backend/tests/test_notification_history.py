@@ -0,0 +1,76 @@
+"""
+Notification retention.
+
+Archival must move only notifications past the retention period, survive
+being rerun after an interruption and leave the per-member counters
+unchanged apart from the archived count.
+"""
+from datetime import datetime, timedelta
+
+from app.notification_history import (
+    archive_notifications,
+    get_notification_summary,
+    rebuild_notification_summary,
+    record_notification
+)
+
+from .dataset import seed_dataset
+
+
+def _record_old_reminders(member_id: str, count: int, days_ago: int = 120):
+    for i in range(count):
+        record_notification({
+            "member_id": member_id,
+            "notification_type": "reminder",
+            "sent_at": datetime.now() - timedelta(days=days_ago + i),
+            "message": "Old reminder",
+            "priority": "Normal",
+            "status": "sent"
+        })
+
+
+def test_archive_moves_old_notifications(mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    member_id = ids["member_id"]
+    _record_old_reminders(member_id, 3)
+    live = mongo_db.notifications.count_documents({})
+    before = get_notification_summary(member_id)
+
+    assert archive_notifications(90, batch_size=2, database=mongo_db) == 3
+
+    assert mongo_db.notifications.count_documents({}) == live - 3
+    assert mongo_db.notifications_archive.count_documents({"member_id": member_id, "archived_at": {"$ne": None}}) == 3
+    after = get_notification_summary(member_id)
+    assert after["total"] == before["total"]
+    assert after["archived"] == 3
+
+    rebuild_notification_summary(mongo_db)
+    assert get_notification_summary(member_id) == after
+
+
+def test_archive_resumes_after_interruption(mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    _record_old_reminders(ids["member_id"], 2)
+    # A previous run copied one notification but stopped before deleting it
+    copied = mongo_db.notifications.find_one({"message": "Old reminder"})
+    mongo_db.notifications_archive.insert_one(copied)
+
+    assert archive_notifications(90, database=mongo_db) == 2
+    assert mongo_db.notifications_archive.count_documents({}) == 2
+    assert archive_notifications(90, database=mongo_db) == 0
+
+
+def test_history_reads_archive_on_request(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    member_id = ids["member_id"]
+    _record_old_reminders(member_id, 2)
+    archive_notifications(90, database=mongo_db)
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+    params = {"member_id": member_id, "limit": 100}
+
+    live = api.get("/admin/reminders/history", params=params, headers=headers).json()
+    full = api.get("/admin/reminders/history", params={**params, "include_archive": True}, headers=headers).json()
+
+    assert full["total"] == live["total"] + 2
+    assert all("archived_at" in r for r in full["reminders"][live["total"]:])
+    assert full["member_summary"]["archived"] == 2
@@ -0,0 +1,139 @@
+"""
+Community fund running totals.
+
+Recording payments must add each contribution to fund_totals exactly
+once, and a rebuild from history must agree with the incremental totals.
+"""
+import pytest
+from bson import ObjectId
+
+from app.indexes import ensure_indexes
+from app.payments import FUND_TOTALS_ID, mark_paid, paid_by_batch, rebuild_fund_totals
+
+from .dataset import seed_dataset
+from .test_analytics import _plan_stages
+
+
+def _totals(mongo_db) -> dict:
+    return mongo_db.fund_totals.find_one({"_id": FUND_TOTALS_ID}, {"_id": 0, "updated_at": 0, "rebuilt_at": 0})
+
+
+def _paid_sum(mongo_db) -> int:
+    return sum(c["amount"] for c in mongo_db.contributions.find({"paid_date": {"$nin": [None, ""]}}))
+
+
+def test_rebuild_counts_only_paid_contributions(mongo_db):
+    seed_dataset(mongo_db, 5)
+
+    totals = _totals(mongo_db)
+    assert totals["total_raised"] == _paid_sum(mongo_db)
+    assert totals["total_raised"] < sum(c["amount"] for c in mongo_db.contributions.find())
+    assert sum(totals["months"].values()) == totals["total_raised"]
+
+
+def test_mark_paid_counts_a_contribution_once(mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    contribution_id = ObjectId(ids["contribution_id"])
+    contribution = mongo_db.contributions.find_one({"_id": contribution_id})
+    before = _totals(mongo_db)
+
+    assert mark_paid(contribution_id, "2024-01-05")
+    # Paying again only corrects the date
+    assert mark_paid(contribution_id, "2024-01-06")
+    assert not mark_paid(ObjectId(), "2024-01-05")
+    with pytest.raises(ValueError):
+        mark_paid(contribution_id, "garbage")
+
+    after = _totals(mongo_db)
+    month = contribution["due_date"][:7]
+    assert after["total_raised"] == before["total_raised"] + contribution["amount"]
+    assert after["paid_count"] == before["paid_count"] + 1
+    assert after["months"][month] == before["months"].get(month, 0) + contribution["amount"]
+
+
+def test_pay_all_matches_rebuild(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    headers = {"Authorization": f"Bearer {ids['member_token']}"}
+    unpaid = sum(c["amount"] for c in mongo_db.contributions.find({"member_id": ids["member_id"], "paid_date": None}))
+    before = _totals(mongo_db)
+
+    assert api.post("/contributions/pay-all", headers=headers).json()["contributions_paid"] > 0
+    assert api.post("/contributions/pay-all", headers=headers).json()["contributions_paid"] == 0
+
+    incremental = _totals(mongo_db)
+    assert incremental["total_raised"] == before["total_raised"] + unpaid
+
+    rebuilt = rebuild_fund_totals(mongo_db)
+    assert rebuilt["total_raised"] == incremental["total_raised"] == _paid_sum(mongo_db)
+    assert rebuilt["months"] == incremental["months"]
+
+    stats = api.get("/member/impact/stats", headers=headers).json()
+    assert stats["total_raised"] == rebuilt["total_raised"]
+
+
+def test_payment_route_converts_contribution_id(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    payment = {"member_id": ids["member_id"], "contribution_id": ids["contribution_id"], "paid_date": "2024-01-05"}
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+    before = mongo_db.fund_totals.find_one({"_id": FUND_TOTALS_ID})
+
+    assert api.post("/contributions/payment", json=payment).status_code in (401, 403)
+    member = {"Authorization": f"Bearer {ids['member_token']}"}
+    assert api.post("/contributions/payment", json=payment, headers=member).status_code == 403
+    # A bad date is rejected before anything is written
+    response = api.post("/contributions/payment", json={**payment, "paid_date": "garbage"}, headers=headers)
+    assert response.status_code == 422
+    assert mongo_db.fund_totals.find_one({"_id": FUND_TOTALS_ID}) == before
+
+    assert api.post("/contributions/payment", json=payment, headers=headers).status_code == 200
+    assert mongo_db.contributions.find_one({"_id": ObjectId(ids["contribution_id"])})["paid_date"] == "2024-01-05"
+    response = api.post("/contributions/payment", json={**payment, "contribution_id": "nope"}, headers=headers)
+    assert response.status_code == 404
+
+
+def test_batch_payments_match_rebuild(api, mongo_db):
+    ids = seed_dataset(mongo_db, 6)
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+    unpaid = list(mongo_db.contributions.find({"paid_date": None}).sort("due_date", 1))
+    paid = mongo_db.contributions.find_one({"paid_date": {"$ne": None}})
+    before = _totals(mongo_db)
+
+    entries = [{"contribution_id": str(c["_id"]), "paid_date": c["due_date"], "amount": c["amount"]}
+               for c in unpaid[:-1]]
+    entries += [
+        {"contribution_id": str(unpaid[-1]["_id"]), "paid_date": "2024-01-05", "amount": 1},
+        {"contribution_id": entries[0]["contribution_id"], "paid_date": "2024-01-05"},
+        {"contribution_id": str(paid["_id"]), "paid_date": paid["paid_date"]},
+        {"contribution_id": str(ObjectId()), "paid_date": "2024-01-05"},
+        {"contribution_id": "not-an-id", "paid_date": "2024-01-05"},
+        {"contribution_id": str(unpaid[-1]["_id"]), "paid_date": "05/01/2024"},
+    ]
+    body = api.post("/contributions/payments/batch", json={"payments": entries}, headers=headers).json()
+
+    assert [r["status"] for r in body["results"]] == ["paid"] * (len(unpaid) - 1) + [
+        "amount_mismatch", "duplicate", "updated", "not_found", "invalid", "invalid"]
+    assert body["recorded"] == len(unpaid) - 1
+    assert mongo_db.contributions.find_one({"_id": unpaid[-1]["_id"]})["paid_date"] is None
+
+    # Applied once for the batch, and equal to recomputing from history
+    incremental = _totals(mongo_db)
+    assert incremental["total_raised"] == before["total_raised"] + sum(c["amount"] for c in unpaid[:-1])
+    rebuilt = rebuild_fund_totals(mongo_db)
+    assert rebuilt["total_raised"] == incremental["total_raised"]
+    assert rebuilt["months"] == incremental["months"]
+
+    # Paying the same contributions again records nothing new
+    again = api.post("/contributions/payments/batch", json={"payments": entries[:2]}, headers=headers).json()
+    assert again["recorded"] == 0 and again["updated"] == 2
+    assert _totals(mongo_db)["total_raised"] == incremental["total_raised"]
+
+
+def test_batch_read_back_uses_an_index(mongo_db):
+    seed_dataset(mongo_db, 5)
+    assert ensure_indexes(mongo_db)
+    ids = [c["_id"] for c in mongo_db.contributions.find({}, {"_id": 1}).limit(3)]
+
+    explain = mongo_db.command("explain", {"find": "contributions", "filter": paid_by_batch(ids, "ref")})
+
+    stages = _plan_stages(explain)
+    assert "COLLSCAN" not in stages, f"batch read-back scans contributions: {sorted(stages)}"
@@ -0,0 +1,188 @@
+"""
+Query-count regression tests.
+
+Seeds the test database at two sizes, calls every route of the app
+through TestClient and counts the MongoDB commands each request sends.
+A test fails when an endpoint's count grows with the number of members
+(an N+1 pattern) or exceeds its budget in query_budgets.json.
+
+Endpoints that are known to issue per-member queries are marked as
+strict xfails in the budget file; once one is fixed the xfail starts
+passing, which fails the run until its entry is updated.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from .dataset import MEMBER_PASSWORD, ADMIN_EMAIL, seed_dataset
+from .routes import api_routes
+
+SMALL_SCALE = int(os.getenv("QUERY_TEST_SMALL_MEMBERS", "5"))
+LARGE_SCALE = int(os.getenv("QUERY_TEST_LARGE_MEMBERS", "25"))
+
+BUDGETS = json.loads((Path(__file__).parent / "query_budgets.json").read_text())
+
+# (method, route path, caller, request kwargs); {placeholders} are filled from the dataset
+ENDPOINTS = [
+    ("GET", "/", None, {}),
+    ("GET", "/health", None, {}),
+    ("GET", "/metrics", None, {}),
+    ("GET", "/members", None, {}),
+    ("GET", "/dashboard/high-risk", None, {}),
+    ("GET", "/reminders/{member_id}", None, {}),
+
+    ("POST", "/auth/register", None, {"json": {
+        "email": "new.member@example.com", "name": "New Member",
+        "phone": "9123456789", "password": "secret123"}}),
+    ("POST", "/auth/login", None, {"json": {"email": ADMIN_EMAIL, "password": MEMBER_PASSWORD}}),
+    ("POST", "/auth/refresh", None, {"json": {"refresh_token": "{refresh_token}"}}),
+    ("POST", "/auth/logout", None, {"json": {"refresh_token": "{refresh_token}"}}),
+    ("GET", "/auth/me", "member", {}),
+    ("POST", "/auth/change-password", "member", {"json": {
+        "current_password": MEMBER_PASSWORD, "new_password": "changed123"}}),
+
+    ("GET", "/member/dashboard", "member", {}),
+    ("GET", "/member/contributions", "member", {}),
+    ("GET", "/member/notifications", "member", {}),
+    ("POST", "/member/preferences", "member", {"json": {"email": False}}),
+    ("GET", "/member/impact/stats", "member", {}),
+    ("GET", "/member/leaderboard", "member", {"params": {"limit": 5}}),
+    ("POST", "/member/tickets/", "member", {"json": {
+        "request_type": "due_day", "reason": "Salary date moved", "new_value": 10}}),
+    ("GET", "/member/tickets/", "member", {}),
+    ("GET", "/member/tickets/generate-employee-id", None, {}),
+
+    ("GET", "/contributions/status", None, {}),
+    ("POST", "/contributions/payment", "admin", {"json": {
+        "member_id": "{member_id}", "contribution_id": "{contribution_id}", "paid_date": "2024-01-05"}}),
+    ("POST", "/contributions/payments/batch", "admin", {"json": {"payments": [
+        {"contribution_id": "{contribution_id}", "paid_date": "2024-01-05", "amount": 500},
+        {"contribution_id": "not-an-id", "paid_date": "2024-01-05"}]}}),
+    ("POST", "/contributions/reconcile", "admin", {"files": {"file": (
+        "statement.csv", "Date,Description,Amount\n2024-01-05,{member_id} contribution,500\n"
+        "2024-01-05,{employee_id} contribution,500\n2024-01-05,Unknown,500\n", "text/csv")}}),
+    ("POST", "/contributions/reconcile/apply", "admin", {"json": {"payments": [
+        {"contribution_id": "{contribution_id}", "paid_date": "2024-01-05", "amount": 500}]}}),
+    ("POST", "/contributions/pay-all", "member", {}),
+    ("GET", "/contributions/failed-payment-stats", "admin", {}),
+
+    ("POST", "/admin/members", "admin", {"json": {
+        "name": "Admin Added", "phone": "9234567890", "email": "added@example.com"}}),
+    ("GET", "/admin/members", "admin", {}),
+    ("PATCH", "/admin/members/{member_id}/payment-settings", "admin", {
+        "params": {"monthly_amount": 600, "due_day": 7}}),
+    ("GET", "/admin/tickets", "admin", {}),
+    ("PATCH", "/admin/{ticket_id}", "admin", {"params": {"status": "approved"}}),
+    ("GET", "/admin/search", "admin", {"params": {"employee_id": "{employee_id}"}}),
+    ("GET", "/admin/members/search", "admin", {"params": {"q": "test member"}}),
+    ("GET", "/admin/dashboard/stats", "admin", {}),
+    ("GET", "/admin/cache/stats", "admin", {}),
+    ("POST", "/admin/reminders/{member_id}", "admin", {"json": {"custom_message": "Hello"}}),
+    ("POST", "/admin/contributions/generate", "admin", {}),
+    ("GET", "/admin/reminders/schedule", "admin", {}),
+    ("POST", "/admin/reminders/trigger", "admin", {}),
+    ("GET", "/admin/reminders/history", "admin", {}),
+
+    ("GET", "/admin/predictions/", "admin", {}),
+    ("GET", "/admin/predictions/{member_id}", "admin", {}),
+    ("GET", "/admin/predictions/insights/{member_id}", "admin", {}),
+
+    ("GET", "/events", "admin", {"params": {"since": 0}}),
+
+    ("GET", "/admin/analytics/trends", "admin", {}),
+    ("GET", "/admin/analytics/delay-distribution", "admin", {}),
+    ("GET", "/admin/analytics/cohorts/due-day", "admin", {}),
+    ("GET", "/admin/analytics/cohorts/join-month", "admin", {}),
+    ("GET", "/admin/analytics/patterns", "admin", {}),
+
+    # Unsigned: rejected before any database work
+    ("POST", "/webhooks/gateway", None, {"json": {"type": "payment.succeeded", "data": {}}}),
+    ("GET", "/webhooks/gateway/stats", "admin", {}),
+]
+
+# Routes that can't be measured as a single request/response
+EXCLUDED_ROUTES = {
+    "GET /events/stream": "long-lived Server-Sent Events stream",
+}
+
+
+def endpoint_key(method: str, path: str) -> str:
+    return f"{method} {path}"
+
+
+def _fill(value, ids: dict):
+    """Substitute {placeholders} in strings nested inside request kwargs"""
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_fill(v, ids) for v in value)
+    return value
+
+
+def _cases():
+    for method, path, caller, kwargs in ENDPOINTS:
+        key = endpoint_key(method, path)
+        budget = BUDGETS.get(key, {})
+        marks = []
+        if budget.get("known_linear"):
+            marks.append(pytest.mark.xfail(reason=budget["known_linear"], strict=True))
+        yield pytest.param(method, path, caller, kwargs, id=key, marks=marks)
+
+
+def count_queries(api, mongo_db, recorder, member_count, method, path, caller, kwargs) -> int:
+    """Seed member_count members, call the endpoint once and return the commands it sent"""
+    expected_status = BUDGETS.get(endpoint_key(method, path), {}).get("status", 200)
+    from app.cache import response_cache
+
+    ids = seed_dataset(mongo_db, member_count)
+    response_cache.invalidate()
+
+    headers = {}
+    if caller:
+        headers["Authorization"] = f"Bearer {ids[caller + '_token']}"
+
+    recorder.reset()
+    response = api.request(method, path.format(**ids), headers=headers, **_fill(kwargs, ids))
+    commands = recorder.snapshot()
+
+    # A rejected request would measure the wrong code path
+    assert response.status_code == expected_status, f"{method} {path}: {response.status_code} {response.text}"
+    return len(commands)
+
+
+@pytest.mark.parametrize("method, path, caller, kwargs", list(_cases()))
+def test_query_count(api, mongo_db, recorder, method, path, caller, kwargs):
+    key = endpoint_key(method, path)
+    assert key in BUDGETS, f"No query budget for {key}; add one to query_budgets.json"
+
+    small = count_queries(api, mongo_db, recorder, SMALL_SCALE, method, path, caller, kwargs)
+    large = count_queries(api, mongo_db, recorder, LARGE_SCALE, method, path, caller, kwargs)
+
+    assert large <= small, (
+        f"{key} sent {small} queries with {SMALL_SCALE} members and {large} with "
+        f"{LARGE_SCALE}: the query count grows with the member count"
+    )
+    assert large <= BUDGETS[key]["max_queries"], (
+        f"{key} sent {large} queries, over its budget of {BUDGETS[key]['max_queries']}"
+    )
+
+
+def test_every_route_is_covered():
+    """New routes must be added to ENDPOINTS (and given a budget) or excluded explicitly"""
+    from app.main import app
+
+    covered = {endpoint_key(method, path) for method, path, _, _ in ENDPOINTS}
+    missing = []
+    for method, path, _ in api_routes(app):
+        key = endpoint_key(method, path)
+        if key not in covered and key not in EXCLUDED_ROUTES:
+            missing.append(key)
+
+    assert not missing, f"Routes without a query-count test: {sorted(missing)}"
+    assert covered <= set(BUDGETS), f"Endpoints without a budget: {sorted(covered - set(BUDGETS))}"
@@ -0,0 +1,74 @@
+"""
+Login rate limiting.
+
+Buckets refill at their rate up to their burst size, and a login over the
+limit is answered with 429 before the database is queried.
+"""
+import pytest
+
+from app.metrics import login_rate_limited_total
+from app.rate_limit import LocalBackend, RateLimiter, login_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_up_to_its_burst():
+    clock = Clock()
+    backend = LocalBackend(clock=clock)
+
+    assert [backend.take("k", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert backend.take("k", 3, 1.0) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert backend.take("k", 3, 1.0) == pytest.approx(0.5)
+    clock.now = 100
+    assert [backend.take("k", 3, 1.0) for _ in range(4)][-1] > 0
+    # Other keys have their own bucket
+    assert backend.take("other", 3, 1.0) == 0
+
+
+def test_least_recently_used_buckets_are_dropped():
+    backend = LocalBackend(max_keys=2, clock=Clock())
+    backend.take("a", 1, 1.0)
+    backend.take("b", 1, 1.0)
+    backend.take("c", 1, 1.0)
+
+    assert backend.take("a", 1, 1.0) == 0
+    assert backend.take("c", 1, 1.0) > 0
+
+
+@pytest.fixture
+def tight_limits(monkeypatch):
+    monkeypatch.setattr(login_limiter, "rules", {"ip": (5, 1), "email": (2, 1)})
+    login_limiter.reset()
+    yield
+    login_limiter.reset()
+
+
+def test_login_over_the_limit_is_rejected_without_queries(api, mongo_db, recorder, tight_limits):
+    credentials = {"email": "nobody@example.com", "password": "wrong"}
+    rejected = login_rate_limited_total._values.get(("email",), 0)
+
+    assert [api.post("/auth/login", json=credentials).status_code for _ in range(2)] == [401, 401]
+    recorder.reset()
+    response = api.post("/auth/login", json=credentials)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert recorder.snapshot() == []
+    assert login_rate_limited_total._values[("email",)] == rejected + 1
+
+    # Another email from the same client still has attempts left, until the IP runs out
+    other = {"email": "someone@example.com", "password": "wrong"}
+    assert [api.post("/auth/login", json=other).status_code for _ in range(3)] == [401, 401, 429]
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = RateLimiter(LocalBackend(clock=Clock()), {"ip": (1, 1)}, enabled=False)
+    for _ in range(5):
+        limiter.check("ip", "10.0.0.1")
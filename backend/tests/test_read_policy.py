@@ -0,0 +1,121 @@
+"""
+Read policy tests.
+
+The route wiring and collection options are checked without a server.
+The end-to-end tests need a replica set: the driver only sends
+$readPreference to replica set members it discovered itself, not to a
+standalone or over directConnection. Point TEST_MONGO_URI at one, e.g.
+mongodb://localhost:27017/?replicaSet=rs0 (see MONGODB_SETUP.md).
+"""
+import pytest
+from pymongo import ReadPreference
+
+from app import db
+from app.dependencies import analytics_reads
+
+from .dataset import seed_dataset
+from .routes import api_routes
+
+ANALYTICS_ROUTES = [
+    ("GET", "/members"),
+    ("GET", "/dashboard/high-risk"),
+    ("GET", "/admin/dashboard/stats"),
+    ("GET", "/admin/reminders/history"),
+    ("GET", "/admin/predictions/"),
+    ("GET", "/admin/predictions/{member_id}"),
+    ("GET", "/admin/predictions/insights/{member_id}"),
+    ("GET", "/admin/analytics/trends"),
+    ("GET", "/admin/analytics/delay-distribution"),
+    ("GET", "/admin/analytics/cohorts/due-day"),
+    ("GET", "/admin/analytics/cohorts/join-month"),
+    ("GET", "/admin/analytics/patterns"),
+]
+
+PRIMARY_ROUTES = [
+    ("POST", "/auth/register"),
+    ("POST", "/auth/login"),
+    ("POST", "/auth/refresh"),
+    ("POST", "/auth/logout"),
+    ("GET", "/auth/me"),
+    ("POST", "/auth/change-password"),
+    ("POST", "/contributions/payment"),
+    ("POST", "/contributions/payments/batch"),
+    ("POST", "/contributions/reconcile"),
+    ("POST", "/contributions/reconcile/apply"),
+    ("POST", "/webhooks/gateway"),
+    ("POST", "/contributions/pay-all"),
+]
+
+
+def _route(method: str, path: str):
+    from app.main import app
+
+    for route_method, route_path, route in api_routes(app):
+        if (route_method, route_path) == (method, path):
+            return route
+    raise AssertionError(f"No route {method} {path}")
+
+
+def _dependency_calls(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+@pytest.mark.parametrize("method, path", ANALYTICS_ROUTES)
+def test_analytics_routes_use_analytics_policy(method, path):
+    assert analytics_reads in _dependency_calls(_route(method, path).dependant)
+
+
+@pytest.mark.parametrize("method, path", PRIMARY_ROUTES)
+def test_auth_and_payment_routes_use_default_policy(method, path):
+    assert analytics_reads not in _dependency_calls(_route(method, path).dependant)
+
+
+def test_read_policy_applies_to_collections():
+    analytics = db.READ_POLICIES[db.ANALYTICS]
+    assert analytics.document["mode"] == db.ANALYTICS_READ_PREFERENCE
+
+    assert db.members_collection.read_preference == db.get_client().read_preference
+    with db.read_policy(db.ANALYTICS):
+        assert db.members_collection.read_preference == analytics
+        with db.read_policy(db.PRIMARY):
+            assert db.members_collection.read_preference == ReadPreference.PRIMARY
+        assert db.members_collection.read_preference == analytics
+    assert db.members_collection.read_preference == db.get_client().read_preference
+
+
+@pytest.fixture
+def replica_set(mongo_db):
+    """Skips unless the app's client is connected to a replica set"""
+    db.ping()
+    if db.get_client().topology_description.topology_type_name != "ReplicaSetWithPrimary":
+        pytest.skip("TEST_MONGO_URI is not a replica set (add ?replicaSet=<name>)")
+    return mongo_db
+
+
+def _request(api, recorder, mongo_db, method, path, caller):
+    from app.cache import response_cache
+
+    ids = seed_dataset(mongo_db, 5)
+    response_cache.invalidate()
+    recorder.reset()
+    response = api.request(method, path, headers={"Authorization": f"Bearer {ids[caller + '_token']}"})
+    assert response.status_code == 200, response.text
+    return recorder.snapshot()
+
+
+def test_analytics_route_reads_from_secondaries(api, replica_set, recorder):
+    commands = _request(api, recorder, replica_set, "GET", "/admin/dashboard/stats", "admin")
+
+    # The token lookup stays on the primary even inside an analytics route
+    assert {mode for _, collection, mode in commands if collection == "admins"} == {"primary"}
+    data_modes = {mode for _, collection, mode in commands if collection in ("members", "contributions")}
+    assert data_modes == {db.ANALYTICS_READ_PREFERENCE}
+
+
+def test_payment_route_reads_from_primary(api, replica_set, recorder):
+    commands = _request(api, recorder, replica_set, "POST", "/contributions/pay-all", "member")
+
+    assert commands
+    assert {mode for _, _, mode in commands} == {"primary"}
@@ -0,0 +1,103 @@
+"""
+Bank statement reconciliation.
+
+Statement rows are matched to unpaid contributions by member reference,
+amount and date window, each contribution at most once; confirmed
+matches are recorded as payments.
+"""
+from decimal import Decimal
+
+import pytest
+from bson import ObjectId
+
+from app.reconciliation import StatementError, parse_amount, parse_date, read_statement
+from app.search import with_search_fields
+
+from .dataset import seed_dataset
+
+DUE_DATES = ["2024-01-05", "2024-02-05", "2024-03-05"]
+
+STATEMENT = """Txn Date,Narration,Debit,Credit
+06/01/2024,NEFT M901 January,,500.00
+20/03/2024,EMP-RECON-0001 contribution,,"500"
+06/01/2024,M901,,750
+01/01/2025,M901 late,,500
+06/01/2024,Grocery store,,500
+someday,M901,,500
+07/01/2024,M901 rent,1200,
+07/01/2024,m901 again,,500
+"""
+
+
+@pytest.fixture
+def statement_admin(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    mongo_db.members.insert_one(with_search_fields({
+        "member_id": "M901", "employee_id": "EMP-RECON-0001", "name": "Recon Member",
+        "phone": "9000000901", "email": "recon@example.com", "role": "member",
+        "monthly_amount": 500, "due_day": 5
+    }))
+    mongo_db.contributions.insert_many([
+        {"_id": ObjectId(), "member_id": "M901", "due_date": due_date, "amount": 500, "paid_date": None}
+        for due_date in DUE_DATES
+    ])
+    return {"Authorization": f"Bearer {ids['admin_token']}"}
+
+
+def _upload(api, headers, text: str, **params):
+    response = api.post("/contributions/reconcile", params=params, headers=headers,
+                        files={"file": ("statement.csv", text.encode(), "text/csv")})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_parses_common_formats():
+    assert parse_date("06/01/2024") == parse_date("2024-01-06") == parse_date("06 Jan 2024") == "2024-01-06"
+    assert parse_date("someday") is None
+    assert parse_amount("₹1,250.50") == Decimal("1250.50")
+    assert parse_amount("") is None
+
+
+def test_debits_are_skipped():
+    rows = list(read_statement(STATEMENT.splitlines(keepends=True)))
+    assert len(rows) == 7
+    assert [row["line"] for row in rows if row.get("error")] == [7]
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(StatementError):
+        list(read_statement(["Date,Amount\n", "2024-01-05,500\n"]))
+
+
+def test_rows_are_classified(api, mongo_db, statement_admin):
+    body = _upload(api, statement_admin, STATEMENT)
+
+    assert body["rows"] == 7
+    assert [(m["line"], m["due_date"], m["paid_date"]) for m in body["matched"]] == [(2, "2024-01-05", "2024-01-06")]
+    assert [m["line"] for m in body["ambiguous"]] == [3]
+    assert [c["due_date"] for c in body["ambiguous"][0]["candidates"]] == ["2024-02-05", "2024-03-05"]
+    # The second January payment can't take the contribution already matched
+    assert [(u["line"], u["reason"]) for u in body["unmatched"]] == [
+        (4, "no_open_contribution"), (5, "outside_window"), (6, "no_reference"),
+        (7, "invalid"), (9, "outside_window")]
+    # Previewing records nothing
+    assert mongo_db.contributions.count_documents({"member_id": "M901", "paid_date": None}) == 3
+
+
+def test_apply_records_matches_once(api, mongo_db, statement_admin):
+    body = _upload(api, statement_admin, STATEMENT, apply="true")
+    assert body["applied"]["recorded"] == 1
+
+    # The admin resolves the ambiguous row to February
+    february = body["ambiguous"][0]["candidates"][0]
+    response = api.post("/contributions/reconcile/apply", headers=statement_admin, json={"payments": [
+        {"contribution_id": february["contribution_id"], "paid_date": "2024-03-20", "amount": 500}]})
+    assert response.json()["recorded"] == 1
+
+    paid = {c["due_date"]: c["paid_date"] for c in mongo_db.contributions.find({"member_id": "M901"})}
+    assert paid == {"2024-01-05": "2024-01-06", "2024-02-05": "2024-03-20", "2024-03-05": None}
+
+    # Reconciling the same statement again leaves only March open
+    again = _upload(api, statement_admin, STATEMENT)
+    assert [(m["line"], m["due_date"]) for m in again["matched"]] == [(3, "2024-03-05")]
+    assert again["ambiguous"] == []
@@ -0,0 +1,84 @@
+"""
+Rotating refresh tokens.
+
+A refresh token buys a new access token without a password check and is
+replaced on every use; reusing a replaced token revokes the whole login,
+and changing the password revokes every session.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.auth import decode_access_token
+
+from .dataset import MEMBER_PASSWORD, seed_dataset
+
+
+@pytest.fixture
+def member(api, mongo_db):
+    ids = seed_dataset(mongo_db, 3)
+    response = api.post("/auth/login", json={"email": ids["member_email"], "password": MEMBER_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {**ids, **response.json()}
+
+
+def _refresh(api, token):
+    return api.post("/auth/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_the_token(api, mongo_db, member):
+    response = _refresh(api, member["refresh_token"])
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["refresh_token"] != member["refresh_token"]
+    assert decode_access_token(body["access_token"])["sub"] == member["member_email"]
+    assert api.get("/auth/me", headers={"Authorization": f"Bearer {body['access_token']}"}).status_code == 200
+    # Only hashes are stored
+    assert mongo_db.refresh_tokens.count_documents({"_id": member["refresh_token"]}) == 0
+
+    assert _refresh(api, body["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_token_revokes_the_login(api, mongo_db, member):
+    rotated = _refresh(api, member["refresh_token"]).json()["refresh_token"]
+
+    # Within the grace window a second use is only refused
+    assert _refresh(api, member["refresh_token"]).status_code == 401
+    assert _refresh(api, rotated).status_code == 200
+
+    mongo_db.refresh_tokens.update_many({"rotated_at": {"$ne": None}},
+                                        {"$set": {"rotated_at": datetime.utcnow() - timedelta(minutes=5)}})
+    assert _refresh(api, member["refresh_token"]).status_code == 401
+    # Every token of that login is gone, including the latest one
+    assert mongo_db.refresh_tokens.count_documents({"email": member["member_email"], "rotated_at": None}) == 1
+    assert _refresh(api, "not-a-token").status_code == 401
+
+
+def test_expired_token_is_refused(api, mongo_db, member):
+    mongo_db.refresh_tokens.update_many({}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+    assert _refresh(api, member["refresh_token"]).status_code == 401
+
+
+def test_deleted_account_cannot_refresh(api, mongo_db, member):
+    mongo_db.members.delete_one({"email": member["member_email"]})
+
+    assert _refresh(api, member["refresh_token"]).status_code == 401
+    assert mongo_db.refresh_tokens.count_documents({"email": member["member_email"]}) == 0
+
+
+def test_password_change_revokes_other_sessions(api, member):
+    headers = {"Authorization": f"Bearer {member['access_token']}"}
+    response = api.post("/auth/change-password", headers=headers,
+                        json={"current_password": MEMBER_PASSWORD, "new_password": "changed123"})
+
+    assert response.status_code == 200
+    assert _refresh(api, member["refresh_token"]).status_code == 401
+    assert _refresh(api, response.json()["refresh_token"]).status_code == 200
+
+
+def test_logout_revokes_the_login(api, member):
+    rotated = _refresh(api, member["refresh_token"]).json()["refresh_token"]
+
+    assert api.post("/auth/logout", json={"refresh_token": rotated}).status_code == 200
+    assert _refresh(api, rotated).status_code == 401
@@ -0,0 +1,82 @@
+"""
+Monthly summary rollups.
+
+A closed month must match the contributions it summarizes, and payments
+recorded after the close must be added to it incrementally.
+"""
+from app.payments import mark_paid
+from app.rollups import close_month, current_month, next_month, previous_month
+from app.utilities import calculate_delay_days
+
+from .dataset import seed_dataset
+
+
+def test_month_arithmetic():
+    assert next_month("2025-12") == "2026-01"
+    assert next_month("2025-06") == "2025-07"
+    assert previous_month("2026-01") == "2025-12"
+    assert previous_month("2025-07") == "2025-06"
+
+
+def _expected_summary(mongo_db, month: str) -> dict:
+    contributions = list(mongo_db.contributions.find({"due_date": {"$regex": f"^{month}"}}))
+    paid = [c for c in contributions if c.get("paid_date")]
+    delays = [calculate_delay_days(c["due_date"], c["paid_date"]) for c in paid]
+    return {
+        "expected": sum(c["amount"] for c in contributions),
+        "collected": sum(c["amount"] for c in paid),
+        "paid_count": len(paid),
+        "late_count": sum(1 for d in delays if d > 0),
+        "delay_total": sum(delays)
+    }
+
+
+def _closed_month_with_unpaid(mongo_db):
+    """(month, an unpaid contribution due in it) for a closed month"""
+    for contribution in mongo_db.contributions.find({"paid_date": None}).sort("due_date", 1):
+        month = contribution["due_date"][:7]
+        if month < current_month():
+            return month, contribution
+    raise AssertionError("dataset has no unpaid contribution in a closed month")
+
+
+def test_close_month_matches_contributions(mongo_db):
+    seed_dataset(mongo_db, 5)
+    month, _ = _closed_month_with_unpaid(mongo_db)
+
+    summary = close_month(month, mongo_db)
+    assert {key: summary[key] for key in _expected_summary(mongo_db, month)} == _expected_summary(mongo_db, month)
+
+
+def test_late_payment_updates_closed_month(mongo_db):
+    seed_dataset(mongo_db, 5)
+    month, contribution = _closed_month_with_unpaid(mongo_db)
+    before = mongo_db.monthly_summary.find_one({"_id": month})
+
+    assert mark_paid(contribution["_id"], current_month() + "-01")
+
+    after = mongo_db.monthly_summary.find_one({"_id": month})
+    assert after["collected"] == before["collected"] + contribution["amount"]
+    assert after["paid_count"] == before["paid_count"] + 1
+    assert after["late_payments_after_close"] == 1
+    # Incremental updates agree with recomputing the month
+    recomputed = close_month(month, mongo_db)
+    for key in ("collected", "paid_count", "late_count", "delay_total"):
+        assert after[key] == recomputed[key]
+
+
+def test_trends_endpoint(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    closed = mongo_db.monthly_summary.count_documents({"closed": True})
+
+    response = api.get("/admin/analytics/trends", params={"months": 3},
+                       headers={"Authorization": f"Bearer {ids['admin_token']}"})
+    assert response.status_code == 200
+    months = response.json()["months"]
+
+    assert len(months) == min(3, closed)
+    assert [m["month"] for m in months] == sorted(m["month"] for m in months)
+    assert response.json()["closed_through"] == months[-1]["month"]
+    for month in months:
+        expected = _expected_summary(mongo_db, month["month"])
+        assert month["collection_rate"] == round(expected["collected"] / expected["expected"] * 100, 1)
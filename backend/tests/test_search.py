@@ -0,0 +1,83 @@
+"""
+Admin member search.
+
+Exact matches rank above name prefixes and other prefixes, partial phone
+numbers match, misspelled names fall back to fuzzy matching and results
+are paginated.
+"""
+import pytest
+
+from app.search import TrigramIndex, search_fields, with_search_fields
+
+from .dataset import seed_dataset
+
+MEMBERS = [
+    ("M901", "EMP-SEARCH-0001", "Beena Joseph", "9876543210", "beena.j@example.com"),
+    ("M902", "EMP-SEARCH-0002", "Beenamol Nair", "9123456780", "nair@example.com"),
+    ("M903", "EMP-SEARCH-0003", "Rajesh Beena", "9988776655", "rajesh@example.com"),
+]
+
+
+@pytest.fixture
+def admin_search(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    mongo_db.members.insert_many([with_search_fields({
+        "member_id": member_id, "employee_id": employee_id, "name": name, "phone": phone,
+        "email": email, "role": "member", "monthly_amount": 500, "due_day": 5
+    }) for member_id, employee_id, name, phone, email in MEMBERS])
+    headers = {"Authorization": f"Bearer {ids['admin_token']}"}
+
+    def search(q, **params):
+        response = api.get("/admin/members/search", params={"q": q, **params}, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return search
+
+
+def test_search_fields_are_normalized():
+    fields = search_fields({"name": "Béena  O'Neil", "phone": "+91 98765-43210",
+                            "email": "Beena@Example.com", "member_id": "M001"})
+    assert fields["words"] == ["beena", "neil", "o"]
+    assert {"beena o neil", "919876543210", "beena@example.com", "m001"} <= set(fields["terms"])
+
+
+def test_trigram_index_finds_close_words():
+    index = TrigramIndex(["beena", "joseph", "kumar"])
+    assert set(index.similar("bena")) == {"beena"}
+    assert set(index.similar("josef")) == {"joseph"}
+    assert index.similar("xyz") == {}
+
+
+def test_exact_matches_rank_first(admin_search):
+    body = admin_search("Beena")
+
+    assert [r["member_id"] for r in body["results"]] == ["M901", "M903", "M902"]
+    assert [r["match"] for r in body["results"]] == ["exact", "exact", "prefix"]
+    assert body["results"][0]["total_contributions"] == 0
+
+
+def test_partial_phone_email_and_id(admin_search):
+    assert [r["member_id"] for r in admin_search("98765-4")["results"]] == ["M901"]
+    assert [r["member_id"] for r in admin_search("nair@")["results"]] == ["M902"]
+    assert [r["member_id"] for r in admin_search("emp-search-0003")["results"]] == ["M903"]
+
+
+def test_misspelled_name_is_fuzzy_matched(admin_search):
+    results = admin_search("Bena Josef")["results"]
+    assert results[0]["member_id"] == "M901"
+    assert results[0]["match"] == "fuzzy"
+
+
+def test_pagination(admin_search):
+    body = admin_search("test member", page=2, page_size=2)
+
+    assert body["total"] == 5
+    assert [r["name"] for r in body["results"]] == ["Test Member 3", "Test Member 4"]
+    assert all(r["total_contributions"] == 6 for r in body["results"])
+
+
+def test_query_too_short(api, mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    response = api.get("/admin/members/search", params={"q": "b"},
+                       headers={"Authorization": f"Bearer {ids['admin_token']}"})
+    assert response.status_code == 422
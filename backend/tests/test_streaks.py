@@ -0,0 +1,90 @@
+"""
+On-time payment streaks.
+
+Incremental updates from payments and missed due dates must agree with
+rebuilding the streaks from the contribution history.
+"""
+from datetime import datetime, timedelta
+
+from app.payments import mark_paid
+from app.streaks import _runs, record_missed, rebuild_streaks
+
+from .dataset import seed_dataset
+
+
+def _streaks(mongo_db) -> dict:
+    return {m["member_id"]: m.get("streak", {}).get("current", 0) for m in mongo_db.members.find()}
+
+
+def _best(mongo_db) -> dict:
+    return {m["member_id"]: m.get("streak", {}).get("best", 0) for m in mongo_db.members.find()}
+
+
+def test_runs():
+    assert _runs([True, True]) == (2, 0, 2, False)
+    assert _runs([True, False, True, True, False, True]) == (1, 2, 1, True)
+
+
+def test_on_time_payments_extend_streak(mongo_db):
+    ids = seed_dataset(mongo_db, 5)
+    member_id = ids["member_id"]
+    upcoming = [{"member_id": member_id, "amount": 500, "paid_date": None,
+                 "due_date": (datetime.now() + timedelta(days=30 * n)).strftime("%Y-%m-%d")}
+                for n in (1, 2, 3)]
+    mongo_db.contributions.insert_many(upcoming)
+    before = mongo_db.members.find_one({"member_id": member_id})["streak"]
+
+    for contribution in upcoming:
+        assert mark_paid(contribution["_id"], contribution["due_date"])
+
+    after = mongo_db.members.find_one({"member_id": member_id})["streak"]
+    assert after["current"] == before["current"] + len(upcoming)
+    assert after["best"] == max(before["best"], after["current"])
+
+    rebuild_streaks(mongo_db)
+    assert mongo_db.members.find_one({"member_id": member_id})["streak"] == {
+        "current": after["current"], "best": after["best"]}
+
+
+def test_missed_due_date_breaks_streak_once(mongo_db):
+    seed_dataset(mongo_db, 5)
+    member = mongo_db.members.find_one({"streak.current": {"$gt": 0}})
+    assert member, "dataset has no member with a streak"
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    mongo_db.contributions.insert_one({
+        "member_id": member["member_id"], "amount": member["monthly_amount"],
+        "due_date": yesterday, "paid_date": None
+    })
+
+    assert record_missed() == 1
+    assert record_missed() == 0
+
+    streak = mongo_db.members.find_one({"member_id": member["member_id"]})["streak"]
+    assert streak["current"] == 0
+    assert streak["best"] == member["streak"]["best"]
+
+    # Paying it late afterwards doesn't break the streak a second time
+    incremental = _streaks(mongo_db)
+    missed = mongo_db.contributions.find_one({"member_id": member["member_id"], "due_date": yesterday})
+    assert mark_paid(missed["_id"], datetime.now().strftime("%Y-%m-%d"))
+    assert _streaks(mongo_db) == incremental
+
+    rebuild_streaks(mongo_db)
+    assert _streaks(mongo_db) == incremental
+    assert _best(mongo_db)[member["member_id"]] == member["streak"]["best"]
+
+
+def test_leaderboard(api, mongo_db):
+    ids = seed_dataset(mongo_db, 12)
+    headers = {"Authorization": f"Bearer {ids['member_token']}"}
+
+    for by in ("current", "best"):
+        response = api.get("/member/leaderboard", params={"limit": 3, "by": by}, headers=headers)
+        assert response.status_code == 200
+        leaders = response.json()
+
+        expected = sorted((s for s in (_streaks if by == "current" else _best)(mongo_db).values() if s), reverse=True)
+        assert [row[f"{by}_streak"] for row in leaders] == expected[:3]
+        assert [row["rank"] for row in leaders] == list(range(1, len(leaders) + 1))
+
+    assert api.get("/member/leaderboard", params={"by": "worst"}, headers=headers).status_code == 422
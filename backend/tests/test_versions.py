@@ -0,0 +1,49 @@
+"""
+Conditional GET and cached responses.
+
+If-None-Match matching follows the weak comparison rules, and a write
+made by another worker (which can't drop this worker's cache entries)
+still changes what a cached endpoint returns along with its ETag.
+"""
+from app.cache import response_cache
+from app.versions import _etag_matches
+
+from .dataset import seed_dataset
+
+
+def test_etag_matching():
+    etag = 'W/"abc"'
+
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('"old", W/"abc"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('W/"abd"', etag)
+
+
+def test_unchanged_representation_is_not_modified(api, mongo_db):
+    seed_dataset(mongo_db, 3)
+    response_cache.invalidate()
+    first = api.get("/contributions/status")
+
+    again = api.get("/contributions/status", headers={"If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_write_from_another_worker_misses_the_cache(api, mongo_db):
+    seed_dataset(mongo_db, 3)
+    response_cache.invalidate()
+    first = api.get("/contributions/status")
+    unpaid = mongo_db.contributions.find_one({"paid_date": None})
+
+    # Another worker pays a contribution: the versions move, this worker's cache is untouched
+    mongo_db.contributions.update_one({"_id": unpaid["_id"]}, {"$set": {"paid_date": unpaid["due_date"]}})
+    mongo_db.collection_versions.update_one({"_id": "contributions"}, {"$inc": {"version": 1}}, upsert=True)
+    second = api.get("/contributions/status", headers={"If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert sum(1 for row in second.json() if row["paid_date"]) == \
+        sum(1 for row in first.json() if row["paid_date"]) + 1
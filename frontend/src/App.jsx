@@ -14,6 +14,7 @@ import PredictiveAnalytics from './components/PredictiveAnalytics'
 import ImpactDashboard from './components/ImpactDashboard'
 import MembersList from './components/MembersList'
 import ChangePasswordModal from './components/ChangePasswordModal'
+import { clearTokens, installTokenRefresh, refreshAccessToken } from './authTokens'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
 
@@ -29,6 +30,9 @@ function App() {
     if (storedToken) {
       verifyToken(storedToken)
     }
+    // Renew expired access tokens instead of logging out every 30 minutes
+    const interceptor = installTokenRefresh(API_BASE_URL, handleLogout, setToken)
+    return () => axios.interceptors.response.eject(interceptor)
   }, [])
 
   const verifyToken = async (storedToken) => {
@@ -39,7 +43,17 @@ function App() {
       setUser(response.data)
       setToken(storedToken)
     } catch (err) {
-      localStorage.removeItem('token')
+      try {
+        // The stored access token expired; the refresh token may still be valid
+        const refreshedToken = await refreshAccessToken(API_BASE_URL)
+        const response = await axios.get(`${API_BASE_URL}/auth/me`, {
+          headers: { 'Authorization': `Bearer ${refreshedToken}` }
+        })
+        setUser(response.data)
+        setToken(refreshedToken)
+      } catch (refreshError) {
+        clearTokens(API_BASE_URL)
+      }
     }
   }
 
@@ -49,7 +63,7 @@ function App() {
   }
 
   const handleLogout = () => {
-    localStorage.removeItem('token')
+    clearTokens(API_BASE_URL)
     setUser(null)
     setToken(null)
     setActiveTab('dashboard')
@@ -0,0 +1,72 @@
+import axios from 'axios'
+
+const REFRESH_TOKEN_KEY = 'refresh_token'
+
+let pendingRefresh = null
+
+// Keep the tokens from /auth/login, /auth/register or /auth/refresh
+export function storeTokens(data) {
+    if (data.access_token) {
+        localStorage.setItem('token', data.access_token)
+    }
+    if (data.refresh_token) {
+        localStorage.setItem(REFRESH_TOKEN_KEY, data.refresh_token)
+    }
+}
+
+// Forget both tokens and revoke the refresh token on the server
+export function clearTokens(apiBaseUrl) {
+    const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY)
+    localStorage.removeItem('token')
+    localStorage.removeItem(REFRESH_TOKEN_KEY)
+    if (refreshToken) {
+        axios.post(`${apiBaseUrl}/auth/logout`, { refresh_token: refreshToken }).catch(() => {})
+    }
+}
+
+// Trade the refresh token for a new access token. Concurrent callers share
+// one request, since each refresh token can only be used once.
+export function refreshAccessToken(apiBaseUrl) {
+    const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY)
+    if (!refreshToken) {
+        return Promise.reject(new Error('No refresh token'))
+    }
+    if (!pendingRefresh) {
+        pendingRefresh = axios.post(`${apiBaseUrl}/auth/refresh`, { refresh_token: refreshToken })
+            .then(response => {
+                storeTokens(response.data)
+                return response.data.access_token
+            })
+            .finally(() => { pendingRefresh = null })
+    }
+    return pendingRefresh
+}
+
+// When a request fails with 401 because the access token expired, refresh
+// it and retry the request once, instead of sending the user back to login.
+// onTokenRefreshed gets the new access token so components holding the old
+// one (as a prop) switch to it instead of refreshing on every request.
+export function installTokenRefresh(apiBaseUrl, onSessionExpired, onTokenRefreshed) {
+    return axios.interceptors.response.use(undefined, async (error) => {
+        const config = error.config
+        const url = config?.url || ''
+        if (error.response?.status !== 401 || !config || config._retried || url.includes('/auth/')) {
+            return Promise.reject(error)
+        }
+        try {
+            // Sent with a token that has already been replaced: retry with the current one
+            const storedToken = localStorage.getItem('token')
+            const sentToken = String(config.headers?.Authorization || '').replace('Bearer ', '')
+            const accessToken = storedToken && sentToken && sentToken !== storedToken
+                ? storedToken
+                : await refreshAccessToken(apiBaseUrl)
+            if (onTokenRefreshed) onTokenRefreshed(accessToken)
+            config._retried = true
+            config.headers = { ...config.headers, Authorization: `Bearer ${accessToken}` }
+            return axios(config)
+        } catch (refreshError) {
+            onSessionExpired()
+            return Promise.reject(error)
+        }
+    })
+}
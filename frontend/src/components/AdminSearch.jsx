@@ -1,28 +1,45 @@
 import { useState } from 'react'
 import axios from 'axios'
 
+const MIN_QUERY_LENGTH = 2
+
 function AdminSearch({ apiBaseUrl, token }) {
     const [searchQuery, setSearchQuery] = useState('')
     const [searchResult, setSearchResult] = useState(null)
+    const [matches, setMatches] = useState([])
     const [searching, setSearching] = useState(false)
     const [error, setError] = useState('')
 
     const handleSearch = async (e) => {
         e.preventDefault()
-        if (!searchQuery.trim()) return
+        const query = searchQuery.trim()
+        if (!query) return
+        // The API rejects shorter queries
+        if (query.length < MIN_QUERY_LENGTH) {
+            setError(`Enter at least ${MIN_QUERY_LENGTH} characters`)
+            return
+        }
 
         setSearching(true)
         setError('')
         setSearchResult(null)
+        setMatches([])
 
         try {
             const response = await axios.get(
-                `${apiBaseUrl}/admin/search?employee_id=${encodeURIComponent(searchQuery)}`,
+                `${apiBaseUrl}/admin/members/search?q=${encodeURIComponent(query)}`,
                 { headers: { Authorization: `Bearer ${token}` } }
             )
-            setSearchResult(response.data)
+            const results = response.data.results
+            if (results.length === 0) {
+                setError('No members found')
+            }
+            setMatches(results)
+            setSearchResult(results[0] || null)
         } catch (err) {
-            setError(err.response?.data?.detail || 'Member not found')
+            // Validation errors carry a list of objects, which can't be rendered
+            const detail = err.response?.data?.detail
+            setError(typeof detail === 'string' ? detail : 'Member not found')
         } finally {
             setSearching(false)
         }
@@ -36,12 +53,12 @@ function AdminSearch({ apiBaseUrl, token }) {
 
     return (
         <div className="admin-search">
-            <h2>Search Member by Employee ID</h2>
+            <h2>Search Members</h2>
 
             <form onSubmit={handleSearch} className="search-form">
                 <input
                     type="text"
-                    placeholder="Enter Employee ID (e.g., EMP-20260116-1234)"
+                    placeholder="Name, phone, email, member ID or employee ID"
                     value={searchQuery}
                     onChange={(e) => setSearchQuery(e.target.value)}
                     className="search-input"
@@ -57,6 +74,21 @@ function AdminSearch({ apiBaseUrl, token }) {
                 </div>
             )}
 
+            {matches.length > 1 && (
+                <ul className="search-matches">
+                    {matches.map((match) => (
+                        <li
+                            key={match.member_id}
+                            className={match.member_id === searchResult?.member_id ? 'selected' : ''}
+                            onClick={() => setSearchResult(match)}
+                        >
+                            <span>{match.name}</span>
+                            <span className="match-meta">{match.employee_id} · {match.phone}</span>
+                        </li>
+                    ))}
+                </ul>
+            )}
+
             {searchResult && (
                 <div className="search-result">
                     <div className="result-header">
@@ -175,6 +207,34 @@ function AdminSearch({ apiBaseUrl, token }) {
                     margin-bottom: 20px;
                 }
 
+                .search-matches {
+                    list-style: none;
+                    padding: 0;
+                    margin: 0 0 20px;
+                    border: 1px solid #e0e0e0;
+                    border-radius: 8px;
+                    max-height: 240px;
+                    overflow-y: auto;
+                }
+
+                .search-matches li {
+                    display: flex;
+                    justify-content: space-between;
+                    padding: 10px 16px;
+                    cursor: pointer;
+                    border-bottom: 1px solid #f0f0f0;
+                }
+
+                .search-matches li.selected,
+                .search-matches li:hover {
+                    background: #f0f7ff;
+                }
+
+                .match-meta {
+                    color: #666;
+                    font-size: 14px;
+                }
+
                 .search-input {
                     flex: 1;
                     padding: 12px 16px;
@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import axios from 'axios'
+import { storeTokens } from '../authTokens'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
 
@@ -29,7 +30,7 @@ function ChangePasswordModal({ onPasswordChanged }) {
             setLoading(true)
             const token = localStorage.getItem('token')
 
-            await axios.post(
+            const response = await axios.post(
                 `${API_BASE_URL}/auth/change-password`,
                 {
                     current_password: currentPassword,
@@ -40,6 +41,9 @@ function ChangePasswordModal({ onPasswordChanged }) {
                 }
             )
 
+            // Other sessions were signed out; keep this one with its new refresh token
+            storeTokens(response.data)
+
             // Notify parent component
             onPasswordChanged()
         } catch (err) {
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import axios from 'axios'
+import { subscribeToLiveEvents } from '../liveEvents'
 
 function Dashboard({ apiBaseUrl, refreshKey }) {
     const [stats, setStats] = useState(null)
@@ -12,6 +13,49 @@ function Dashboard({ apiBaseUrl, refreshKey }) {
         fetchStats()
     }, [refreshKey])
 
+    // Keep totals current from live events without refetching the stats
+    useEffect(() => {
+        return subscribeToLiveEvents(apiBaseUrl, (type, data) => {
+            if (type === 'payment_recorded') {
+                setStats(prev => {
+                    if (!prev) return prev
+                    const amount = data.amount || 0
+                    const inMonth = data.due_date && data.due_date.startsWith(prev.current_month.month)
+                    return {
+                        ...prev,
+                        paid_contributions: prev.paid_contributions + 1,
+                        unpaid_contributions: Math.max(0, prev.unpaid_contributions - 1),
+                        total_collected: prev.total_collected + amount,
+                        total_pending: Math.max(0, prev.total_pending - amount),
+                        current_month: inMonth ? {
+                            ...prev.current_month,
+                            paid_contributions: prev.current_month.paid_contributions + 1,
+                            collected_amount: prev.current_month.collected_amount + amount
+                        } : prev.current_month
+                    }
+                })
+            } else if (type === 'contribution_generated') {
+                setStats(prev => {
+                    if (!prev) return prev
+                    const amount = data.amount || 0
+                    const inMonth = data.due_date && data.due_date.startsWith(prev.current_month.month)
+                    return {
+                        ...prev,
+                        total_contributions: prev.total_contributions + 1,
+                        unpaid_contributions: prev.unpaid_contributions + 1,
+                        total_pending: prev.total_pending + amount,
+                        current_month: inMonth ? {
+                            ...prev.current_month,
+                            total_contributions: prev.current_month.total_contributions + 1
+                        } : prev.current_month
+                    }
+                })
+            } else if (type === 'resync') {
+                fetchStats()
+            }
+        })
+    }, [apiBaseUrl])
+
     const fetchStats = async () => {
         try {
             setLoading(true)
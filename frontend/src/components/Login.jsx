@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import axios from 'axios'
+import { storeTokens } from '../authTokens'
 import '../App.css'
 
 function Login({ onLoginSuccess }) {
@@ -41,8 +42,8 @@ function Login({ onLoginSuccess }) {
 
             const response = await axios.post(`${API_BASE_URL}${endpoint}`, payload)
 
-            // Store token
-            localStorage.setItem('token', response.data.access_token)
+            // Store the access and refresh tokens
+            storeTokens(response.data)
 
             // Get user profile
             const profileResponse = await axios.get(`${API_BASE_URL}/auth/me`, {
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import axios from 'axios'
+import { subscribeToLiveEvents } from '../liveEvents'
 
 function PaymentTracking({ apiBaseUrl, refreshKey, onUpdate }) {
     const [members, setMembers] = useState([])
@@ -13,6 +14,47 @@ function PaymentTracking({ apiBaseUrl, refreshKey, onUpdate }) {
         fetchData()
     }, [refreshKey])
 
+    // Patch local state from live events instead of re-downloading the lists
+    useEffect(() => {
+        return subscribeToLiveEvents(apiBaseUrl, (type, data) => {
+            if (type === 'payment_recorded') {
+                const delayDays = Math.max(0, Math.round(
+                    (new Date(data.paid_date) - new Date(data.due_date)) / 86400000
+                ))
+                setPaymentStatuses(prev => prev.map(p =>
+                    p.member_id === data.member_id && p.due_date === data.due_date
+                        ? { ...p, paid_date: data.paid_date, status: 'Paid', delay_days: delayDays }
+                        : p
+                ))
+                setMembers(prev => prev.map(m =>
+                    m.member_id === data.member_id
+                        ? { ...m, paid_count: m.paid_count + 1, missed_count: Math.max(0, m.missed_count - 1) }
+                        : m
+                ))
+            } else if (type === 'contribution_generated') {
+                setPaymentStatuses(prev => {
+                    const member = prev.find(p => p.member_id === data.member_id)
+                    return [...prev, {
+                        member_id: data.member_id,
+                        member_name: member ? member.member_name : data.member_id,
+                        due_date: data.due_date,
+                        amount: data.amount,
+                        paid_date: null,
+                        status: 'Pending',
+                        delay_days: 0
+                    }]
+                })
+                setMembers(prev => prev.map(m =>
+                    m.member_id === data.member_id
+                        ? { ...m, total_contributions: m.total_contributions + 1, missed_count: m.missed_count + 1 }
+                        : m
+                ))
+            } else if (type === 'resync') {
+                fetchData()
+            }
+        })
+    }, [apiBaseUrl])
+
     const fetchData = async () => {
         try {
             setLoading(true)
@@ -39,6 +81,8 @@ function PaymentTracking({ apiBaseUrl, refreshKey, onUpdate }) {
                 member_id: memberId,
                 contribution_id: contributionId,
                 paid_date: today
+            }, {
+                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             })
 
             fetchData()
@@ -0,0 +1,74 @@
+import axios from 'axios'
+
+const EVENT_TYPES = [
+    'payment_recorded',
+    'contribution_generated',
+    'ticket_created',
+    'ticket_updated',
+    'reminder_sent',
+    'resync'
+]
+
+const POLL_INTERVAL_MS = 5000
+const MAX_STREAM_ERRORS = 3
+
+// Subscribe to live dashboard events. Uses Server-Sent Events and falls back
+// to polling /events when the stream keeps failing (e.g. behind a proxy that
+// buffers responses). Returns an unsubscribe function.
+export function subscribeToLiveEvents(apiBaseUrl, onEvent) {
+    const token = localStorage.getItem('token')
+    let source = null
+    let pollTimer = null
+    let lastEventId = null
+    let streamErrors = 0
+    let closed = false
+
+    const handle = (type, id, data) => {
+        lastEventId = id
+        onEvent(type, data)
+    }
+
+    const poll = async () => {
+        try {
+            const params = lastEventId === null ? {} : { since: lastEventId }
+            const response = await axios.get(`${apiBaseUrl}/events`, {
+                params,
+                headers: { Authorization: `Bearer ${token}` }
+            })
+            response.data.events.forEach(event => handle(event.type, event.id, event.data))
+            lastEventId = response.data.last_event_id
+        } catch (err) {
+            console.error(err)
+        }
+        if (!closed) pollTimer = setTimeout(poll, POLL_INTERVAL_MS)
+    }
+
+    const startPolling = () => {
+        if (source) source.close()
+        source = null
+        poll()
+    }
+
+    if (typeof EventSource === 'undefined') {
+        startPolling()
+    } else {
+        source = new EventSource(`${apiBaseUrl}/events/stream?token=${encodeURIComponent(token)}`)
+        EVENT_TYPES.forEach(type => {
+            source.addEventListener(type, (e) => {
+                streamErrors = 0
+                handle(type, Number(e.lastEventId), JSON.parse(e.data))
+            })
+        })
+        source.onopen = () => { streamErrors = 0 }
+        source.onerror = () => {
+            streamErrors += 1
+            if (streamErrors >= MAX_STREAM_ERRORS) startPolling()
+        }
+    }
+
+    return () => {
+        closed = true
+        if (source) source.close()
+        if (pollTimer) clearTimeout(pollTimer)
+    }
+}